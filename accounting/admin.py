@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.db.models import Sum, Q
 from django.utils.html import format_html
-from .models import LedgerAccount, JournalEntry, JournalLine, PostingRule, Expense
+from .models import (LedgerAccount, JournalEntry, JournalLine, PostingRule, Expense, PeriodClose,
+                     PeriodBalance, PostingJob, BankStatement, BankStatementLine, LedgerCheck)
 
 
 class JournalLineInline(admin.TabularInline):
@@ -18,14 +19,14 @@ class LedgerAccountAdmin(admin.ModelAdmin):
     search_fields = ['code', 'name']
     ordering = ['company', 'code']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('balances')
+    
     def get_balance(self, obj):
-        """Calculate current balance for the account"""
-        lines = JournalLine.objects.filter(
-            account=obj,
-            entry__posted=True
-        )
-        total_debit = lines.aggregate(Sum('debit'))['debit__sum'] or 0
-        total_credit = lines.aggregate(Sum('credit'))['credit__sum'] or 0
+        """Current balance for the account, read from the maintained balance table"""
+        row = next(iter(obj.balances.all()), None)
+        total_debit = row.debit if row else 0
+        total_credit = row.credit if row else 0
         
         # For debit accounts (Asset, Expense), balance = debit - credit
         # For credit accounts (Liability, Equity, Revenue), balance = credit - debit
@@ -42,15 +43,158 @@ class LedgerAccountAdmin(admin.ModelAdmin):
     get_balance.short_description = 'Balance'
 
 
+class PeriodBalanceInline(admin.TabularInline):
+    model = PeriodBalance
+    extra = 0
+    fields = ['account', 'debit', 'credit']
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(PeriodClose)
+class PeriodCloseAdmin(admin.ModelAdmin):
+    list_display = ['period_end', 'company', 'closed_at', 'closed_by']
+    list_filter = ['company']
+    readonly_fields = ['company', 'period_end', 'closed_at', 'closed_by']
+    inlines = [PeriodBalanceInline]
+    actions = ['reopen_periods']
+    
+    def has_add_permission(self, request):
+        # Periods are closed through accounting.periods.close_period (manage.py close_period)
+        return False
+    
+    def reopen_periods(self, request, queryset):
+        from accounting.periods import reopen_period
+        reopened = 0
+        for period in queryset.order_by('period_end'):
+            reopened += reopen_period(period.company, period.period_end)
+        self.message_user(request, f'{reopened} closed period(s) reopened.')
+    reopen_periods.short_description = 'Reopen selected periods (and every later close)'
+
+
+@admin.register(PostingJob)
+class PostingJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'source_content_type', 'source_object_id', 'company', 'status',
+                    'attempts', 'available_at', 'processed_at']
+    list_filter = ['status', 'source_content_type', 'company']
+    search_fields = ['source_object_id', 'last_error']
+    readonly_fields = ['company', 'source_content_type', 'source_object_id', 'status', 'attempts',
+                       'last_error', 'available_at', 'locked_by', 'locked_at', 'created_at',
+                       'processed_at']
+    actions = ['retry_jobs']
+    
+    def has_add_permission(self, request):
+        # Jobs are created when documents are approved (accounting.posting_queue.enqueue)
+        return False
+    
+    def retry_jobs(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(status=PostingJob.Status.DONE).update(
+            status=PostingJob.Status.PENDING, attempts=0, available_at=timezone.now(),
+            locked_by='', locked_at=None
+        )
+        self.message_user(request, f'{updated} posting job(s) queued for retry.')
+    retry_jobs.short_description = 'Retry selected jobs'
+
+
+@admin.register(LedgerCheck)
+class LedgerCheckAdmin(admin.ModelAdmin):
+    list_display = ['id', 'started_at', 'incremental', 'entries_checked', 'unbalanced',
+                    'orphaned_lines', 'stale_lines', 'flag_mismatches', 'finished_at']
+    list_filter = ['incremental']
+    readonly_fields = ['incremental', 'first_entry_id', 'last_entry_id', 'entries_checked',
+                       'unbalanced', 'orphaned_lines', 'stale_lines', 'flag_mismatches', 'issues',
+                       'started_at', 'finished_at']
+    
+    def has_add_permission(self, request):
+        # Checks are run with manage.py verify_ledger (accounting.integrity.verify)
+        return False
+
+
+class MatchedFilter(admin.SimpleListFilter):
+    title = 'reconciled'
+    parameter_name = 'matched'
+    
+    def lookups(self, request, model_admin):
+        return [('yes', 'Matched'), ('no', 'Unmatched')]
+    
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(matched_line__isnull=False)
+        if self.value() == 'no':
+            return queryset.filter(matched_line__isnull=True)
+        return queryset
+
+
+@admin.register(BankStatement)
+class BankStatementAdmin(admin.ModelAdmin):
+    list_display = ['id', 'financial_account', 'file_name', 'line_count', 'imported_at', 'imported_by']
+    list_filter = ['financial_account', 'company']
+    readonly_fields = ['company', 'financial_account', 'file_name', 'line_count', 'imported_at', 'imported_by']
+    
+    def has_add_permission(self, request):
+        # Statements are imported through accounting.reconciliation (manage.py import_bank_statement)
+        return False
+
+
+@admin.register(BankStatementLine)
+class BankStatementLineAdmin(admin.ModelAdmin):
+    list_display = ['date', 'financial_account', 'amount', 'description', 'reference', 'matched_line', 'matched_at']
+    list_filter = [MatchedFilter, 'financial_account']
+    search_fields = ['description', 'reference']
+    date_hierarchy = 'date'
+    raw_id_fields = ['matched_line']
+    readonly_fields = ['statement', 'financial_account', 'date', 'amount', 'description', 'reference',
+                       'fingerprint', 'matched_at']
+    actions = ['unmatch_lines', 'rematch_accounts']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def unmatch_lines(self, request, queryset):
+        from accounting.reconciliation import unmatch
+        updated = unmatch(queryset.filter(matched_line__isnull=False))
+        self.message_user(request, f'{updated} line(s) unmatched.')
+    unmatch_lines.short_description = 'Unmatch selected lines'
+    
+    def rematch_accounts(self, request, queryset):
+        from django.core.exceptions import ValidationError
+        from accounting.reconciliation import match_account
+        from customer.models import FinancialAccount
+        accounts = FinancialAccount.objects.filter(pk__in=queryset.values('financial_account'))
+        for account in accounts:
+            try:
+                result = match_account(account)
+            except ValidationError as e:
+                self.message_user(request, e.messages[0], level='ERROR')
+                continue
+            self.message_user(request, f"{account}: matched {result['matched']}, {result['unmatched']} unmatched.")
+    rematch_accounts.short_description = 'Run matching for the accounts of selected lines'
+
+
 @admin.register(JournalEntry)
 class JournalEntryAdmin(admin.ModelAdmin):
     list_display = ['id', 'date', 'company', 'memo', 'get_customer_supplier', 
                     'posted', 'get_total_amount', 'created_at']
-    list_filter = ['posted', 'date', 'company']
+    list_filter = ['posted', 'date', 'company', 'source_content_type']
     search_fields = ['memo', 'customer__name', 'supplier__name']
     date_hierarchy = 'date'
     readonly_fields = ['source_content_type', 'source_object_id', 'created_at']
     inlines = [JournalLineInline]
+    actions = ['rollback_entries']
+    
+    def rollback_entries(self, request, queryset):
+        from django.core.exceptions import ValidationError
+        from accounting.services import bulk_rollback_journal_entries
+        try:
+            result = bulk_rollback_journal_entries(queryset)
+        except ValidationError as e:
+            self.message_user(request, ' '.join(e.messages), level='ERROR')
+            return
+        documents = sum(result['documents'].values())
+        self.message_user(request, f"{result['entries']} journal entries rolled back, "
+                                   f"{documents} source document(s) marked as unposted.")
+    rollback_entries.short_description = 'Roll back selected entries and unpost their documents'
     
     def get_customer_supplier(self, obj):
         if obj.customer:
@@ -172,15 +316,15 @@ class ExpenseAdmin(admin.ModelAdmin):
     mark_as_paid.short_description = 'Mark selected expenses as paid'
     
     def post_to_ledger(self, request, queryset):
-        from accounting.services import post_expense
+        from accounting.services import bulk_post_expenses
+        from customer.models import Organization as Company
         posted = 0
-        for expense in queryset.filter(status__in=['approved', 'paid']):
-            try:
-                post_expense(expense)
-                expense.status = 'posted'
-                expense.save()
-                posted += 1
-            except Exception as e:
-                self.message_user(request, f'Error posting expense {expense.expense_number}: {e}', level='ERROR')
+        eligible = queryset.filter(status__in=['approved', 'paid'])
+        for company_id in eligible.values_list('company_id', flat=True).distinct().order_by():
+            company = Company.objects.get(pk=company_id)
+            result = bulk_post_expenses(eligible.filter(company_id=company_id), company)
+            posted += result['posted'] + result['already_posted']
+            for expense, error in result['failed']:
+                self.message_user(request, f'Error posting expense {expense.expense_number}: {error}', level='ERROR')
         self.message_user(request, f'{posted} expense(s) posted to ledger.')
     post_to_ledger.short_description = 'Post selected expenses to ledger'
@@ -0,0 +1,171 @@
+# accounting/aging.py
+"""
+채권/채무 연령 분석(AR/AP aging).
+
+거래처별 0–30 / 31–60 / 61–90 / 90+ 일 구간 합계를 조건부 집계(SUM ... FILTER)
+한 번으로 구합니다. 구간 경계는 기준일에서 뺀 날짜로 미리 계산하므로 행마다 날짜
+연산을 하지 않고, 미결 문서만 담은 부분 인덱스를 그대로 탑니다.
+
+- 매출채권: 미결 Invoice.balance_due 를 due_date 기준으로 나눕니다.
+- 매입채무: PurchaseOrder.total_amount - 승인된 SupplierPayment 합계를
+  order_date 기준으로 나눕니다(발주에는 지급기일 필드가 없음).
+금액은 현재 잔액이며 기준일(as_of)은 경과일 계산에만 쓰입니다.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from accounting.balances import ZERO
+
+BUCKETS = [
+    ("days_0_30", "0-30"),
+    ("days_31_60", "31-60"),
+    ("days_61_90", "61-90"),
+    ("days_over_90", "90+"),
+]
+
+# 미결로 보지 않는 문서 상태
+CLOSED_INVOICE_STATUSES = ["draft", "cancelled", "refunded"]
+CLOSED_PURCHASE_STATUSES = ["draft", "cancelled"]
+
+
+def _bucket_sums(amount, date_field, as_of):
+    """구간별 SUM(amount) FILTER(...) 식. 기준일 이후(미도래)는 0–30 에 포함합니다."""
+    d30, d60, d90 = (as_of - timedelta(days=days) for days in (30, 60, 90))
+    money = DecimalField(max_digits=16, decimal_places=2)
+
+    def total(condition=None):
+        return Coalesce(Sum(amount, filter=condition), Value(ZERO), output_field=money)
+
+    return {
+        "days_0_30": total(Q(**{f"{date_field}__gte": d30})),
+        "days_31_60": total(Q(**{f"{date_field}__lt": d30, f"{date_field}__gte": d60})),
+        "days_61_90": total(Q(**{f"{date_field}__lt": d60, f"{date_field}__gte": d90})),
+        "days_over_90": total(Q(**{f"{date_field}__lt": d90})),
+        "total": total(),
+    }
+
+
+def open_invoices():
+    from sales.models import Invoice
+
+    return Invoice.objects.filter(balance_due__gt=0).exclude(
+        status__in=CLOSED_INVOICE_STATUSES
+    )
+
+
+def open_purchases():
+    """balance(미지급 잔액) 가 annotate 된 미결 PurchaseOrder."""
+    from purchases.models import PurchaseOrder, SupplierPayment
+
+    paid = (
+        SupplierPayment.objects.filter(
+            purchase_order=OuterRef("pk"), status=SupplierPayment.Status.APPROVED
+        )
+        .values("purchase_order")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    money = DecimalField(max_digits=16, decimal_places=2)
+    return (
+        PurchaseOrder.objects.exclude(status__in=CLOSED_PURCHASE_STATUSES)
+        .annotate(
+            paid=Coalesce(Subquery(paid), Value(ZERO), output_field=money),
+            balance=F("total_amount") - F("paid"),
+        )
+        .filter(balance__gt=0)
+    )
+
+
+def _totals(rows):
+    totals = {key: ZERO for key, _ in BUCKETS}
+    totals["total"] = ZERO
+    for row in rows:
+        for key in totals:
+            totals[key] += row[key]
+    return totals
+
+
+def receivables_aging(as_of):
+    """
+    고객별 매출채권 연령 분석.
+    반환: {'rows': [{'party_id', 'party', 'days_0_30', ..., 'total'}], 'totals': {...}}
+    """
+    from customer.models import Customer
+
+    rows = list(
+        open_invoices()
+        .values("customer_id")
+        .annotate(**_bucket_sums("balance_due", "due_date", as_of))
+        .order_by()
+    )
+    customers = Customer.objects.in_bulk([row["customer_id"] for row in rows if row["customer_id"]])
+    for row in rows:
+        row["party_id"] = row.pop("customer_id")
+        customer = customers.get(row["party_id"])
+        row["party"] = str(customer) if customer else "No customer (walk-in)"
+    rows.sort(key=lambda row: row["total"], reverse=True)
+    return {"rows": rows, "totals": _totals(rows)}
+
+
+def payables_aging(as_of):
+    """공급처별 매입채무 연령 분석(반환 형식은 receivables_aging 과 같음)."""
+    from purchases.models import Supplier
+
+    rows = list(
+        open_purchases()
+        .values("supplier_id")
+        .annotate(**_bucket_sums("balance", "order_date", as_of))
+        .order_by()
+    )
+    suppliers = Supplier.objects.in_bulk([row["supplier_id"] for row in rows])
+    for row in rows:
+        row["party_id"] = row.pop("supplier_id")
+        supplier = suppliers.get(row["party_id"])
+        row["party"] = supplier.name if supplier else "-"
+    rows.sort(key=lambda row: row["total"], reverse=True)
+    return {"rows": rows, "totals": _totals(rows)}
+
+
+def bucket_label(age_days):
+    if age_days <= 30:
+        return "0-30"
+    if age_days <= 60:
+        return "31-60"
+    if age_days <= 90:
+        return "61-90"
+    return "90+"
+
+
+def receivable_detail_rows(as_of, chunk_size=2000):
+    """미결 Invoice 한 건씩(내보내기용): 번호, 고객, 청구일, 만기일, 경과일, 구간, 잔액."""
+    invoices = (
+        open_invoices()
+        .order_by("due_date", "id")
+        .values_list(
+            "invoice_number", "customer__company_name", "customer__first_name",
+            "customer__last_name", "invoice_date", "due_date", "balance_due",
+        )
+    )
+    for number, company_name, first_name, last_name, issued, due, balance in invoices.iterator(
+        chunk_size=chunk_size
+    ):
+        party = f"{first_name} {last_name}" if first_name is not None else ""
+        if company_name:
+            party = f"{company_name} - {party}"
+        age = (as_of - due).days
+        yield [number, party, issued, due, age, bucket_label(age), Decimal(balance)]
+
+
+def payable_detail_rows(as_of, chunk_size=2000):
+    """미결 PurchaseOrder 한 건씩(내보내기용)."""
+    purchases = (
+        open_purchases()
+        .order_by("order_date", "id")
+        .values_list("order_number", "supplier__name", "order_date", "expected_delivery_date", "balance")
+    )
+    for number, supplier, ordered, expected, balance in purchases.iterator(chunk_size=chunk_size):
+        age = (as_of - ordered).days
+        yield [number, supplier, ordered, expected, age, bucket_label(age), Decimal(balance)]
@@ -0,0 +1,126 @@
+# accounting/balances.py
+"""
+계정별 누적 잔액(AccountBalance) 유지 로직.
+
+JournalLine 시그널(accounting.signals)이 호출하며, 신호를 우회하는
+bulk_create / QuerySet.update / QuerySet.delete 를 쓰는 코드는
+apply_deltas() 를(일자별 표는 rollups.apply_daily_deltas() 도) 직접 호출해야 합니다.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction, IntegrityError
+from django.db.models import F, Sum
+
+from accounting.models import AccountBalance, JournalLine, LedgerAccount
+
+ZERO = Decimal("0.00")
+
+# 차변 잔액 계정 (나머지는 대변 잔액)
+DEBIT_NORMAL_TYPES = (LedgerAccount.Type.ASSET, LedgerAccount.Type.EXPENSE)
+
+
+def normal_balance(account_type, debit, credit):
+    """계정 유형에 맞는 방향으로 잔액을 계산합니다."""
+    if account_type in DEBIT_NORMAL_TYPES:
+        return debit - credit
+    return credit - debit
+
+
+def apply_deltas(deltas):
+    """
+    deltas: {(company_id, account_id): (debit, credit)}
+    각 계정 잔액에 증감분을 더합니다(음수면 차감). 호출자의 트랜잭션 안에서 실행됩니다.
+    """
+    with transaction.atomic():
+        for (company_id, account_id), (debit, credit) in deltas.items():
+            if not debit and not credit:
+                continue
+            updated = AccountBalance.objects.filter(
+                company_id=company_id, account_id=account_id
+            ).update(debit=F("debit") + debit, credit=F("credit") + credit)
+            if updated:
+                continue
+            try:
+                with transaction.atomic():
+                    AccountBalance.objects.create(
+                        company_id=company_id,
+                        account_id=account_id,
+                        debit=debit,
+                        credit=credit,
+                    )
+            except IntegrityError:
+                # 동시에 다른 트랜잭션이 행을 만든 경우
+                AccountBalance.objects.filter(
+                    company_id=company_id, account_id=account_id
+                ).update(debit=F("debit") + debit, credit=F("credit") + credit)
+
+
+def collect_deltas(rows, sign=1):
+    """
+    rows: (company_id, account_id, debit, credit) 튜플의 iterable.
+    같은 계정끼리 합산한 deltas dict 를 돌려줍니다.
+    """
+    deltas = defaultdict(lambda: (ZERO, ZERO))
+    for company_id, account_id, debit, credit in rows:
+        d, c = deltas[(company_id, account_id)]
+        deltas[(company_id, account_id)] = (
+            d + sign * (debit or ZERO),
+            c + sign * (credit or ZERO),
+        )
+    return dict(deltas)
+
+
+def apply_entry(entry, sign=1):
+    """전표 전체 분개행을 계정별로 묶어 잔액에 반영(sign=-1 이면 차감)합니다."""
+    rows = (
+        entry.lines.values("account_id")
+        .annotate(debit=Sum("debit"), credit=Sum("credit"))
+        .values_list("account_id", "debit", "credit")
+    )
+    apply_deltas(
+        collect_deltas(
+            ((entry.company_id, account_id, d, c) for account_id, d, c in rows), sign
+        )
+    )
+
+
+def account_balances(company):
+    """{account_id: (debit, credit)} — 분개행을 스캔하지 않고 잔액 테이블만 읽습니다."""
+    return {
+        account_id: (debit, credit)
+        for account_id, debit, credit in AccountBalance.objects.filter(
+            company=company
+        ).values_list("account_id", "debit", "credit")
+    }
+
+
+@transaction.atomic
+def rebuild_account_balances(company=None):
+    """
+    posted 분개행 전체로부터 잔액 테이블을 다시 만듭니다(백필/불일치 복구용).
+    company 를 생략하면 모든 회사를 다시 계산합니다.
+    """
+    balances = AccountBalance.objects.all()
+    lines = JournalLine.objects.filter(posted=True)
+    if company is not None:
+        balances = balances.filter(company=company)
+        lines = lines.filter(company=company)
+    balances.delete()
+
+    rows = (
+        lines.values("company_id", "account_id")
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+    )
+    objs = [
+        AccountBalance(
+            company_id=row["company_id"],
+            account_id=row["account_id"],
+            debit=row["debit_sum"] or ZERO,
+            credit=row["credit_sum"] or ZERO,
+        )
+        for row in rows
+    ]
+    AccountBalance.objects.bulk_create(objs, batch_size=500)
+    return len(objs)
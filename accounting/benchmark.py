@@ -0,0 +1,303 @@
+# accounting/benchmark.py
+"""
+회계 화면/전기 성능 측정(benchmark_accounting 명령).
+
+- 생성: 빈 DB 에 회사 하나를 만들고 initial_accounts.json / initial_postingrules.json 을
+  그 회사로 옮겨 담은 뒤, 송장·입금·비용을 bulk_create 로 만들어 services 의
+  bulk_post_* 로 전기합니다. 마지막 unposted 건씩은 post_documents 측정용으로 남깁니다.
+- 측정: 화면은 테스트 Client 로 미들웨어·템플릿까지 포함해 요청하고, 실행 시간(중앙값)과
+  쿼리 수를 기록합니다. 결과는 JSON 으로 저장해 다음 실행의 기준선으로 비교할 수 있습니다.
+
+화면들은 첫 번째 회사(Company.objects.first())를 보므로 빈 DB 에서 실행해야 합니다.
+"""
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounting.models import Expense, JournalLine, LedgerAccount, PostingRule
+from accounting.services import (
+    bulk_post_expenses,
+    bulk_post_incoming_payments,
+    bulk_post_sales,
+)
+from customer.models import Organization as Company
+from sales.models import Invoice, Payment
+
+FIXTURE_DIR = Path(__file__).resolve().parent
+BATCH_SIZE = 5000
+TAX_RATE = Decimal("0.08")
+EXPENSE_CATEGORIES = [value for value, _ in Expense.EXPENSE_CATEGORY_CHOICES]
+
+
+class Counter:
+    """connection.execute_wrapper 용: 쿼리를 저장하지 않고 수만 셉니다."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(fn):
+    """(초, 쿼리 수, 반환값)"""
+    counter = Counter()
+    with connection.execute_wrapper(counter):
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+    return elapsed, counter.count, value
+
+
+# -----------------------------
+# 생성
+# -----------------------------
+def load_chart(company):
+    """초기 계정과목표와 전기 규칙을 company 로 복사합니다(픽스처의 회사/계정 pk 는 바꿔 씀)."""
+    accounts = {}
+    rules = []
+    for path in ("initial_accounts.json", "initial_postingrules.json"):
+        with open(FIXTURE_DIR / path) as f:
+            for obj in json.load(f):
+                fields = obj["fields"]
+                if obj["model"] == "accounting.ledgeraccount":
+                    accounts[obj["pk"]] = LedgerAccount.objects.create(
+                        company=company,
+                        code=fields["code"],
+                        name=fields["name"],
+                        type=fields["type"],
+                        is_active=fields.get("is_active", True),
+                    )
+                elif obj["model"] == "accounting.postingrule":
+                    rules.append(fields)
+    for fields in rules:
+        PostingRule.objects.create(
+            company=company,
+            doc_type=fields["doc_type"],
+            debit_account=accounts[fields["debit_account"]],
+            credit_account=accounts[fields["credit_account"]],
+            tax_account=accounts.get(fields.get("tax_account")),
+        )
+    return len(accounts), len(rules)
+
+
+def _amounts(rng):
+    subtotal = Decimal(rng.randint(1000, 500000)) / 100
+    tax = (subtotal * TAX_RATE).quantize(Decimal("0.01"))
+    return subtotal, tax
+
+
+def _create_in_batches(model, objects):
+    """생성기 objects 를 BATCH_SIZE 단위로 bulk_create 하고 (첫 pk, 마지막 pk) 를 돌려줍니다."""
+    first = last = None
+    batch = []
+
+    def flush():
+        nonlocal first, last
+        created = model.objects.bulk_create(batch)
+        first = created[0].pk if first is None else first
+        last = created[-1].pk
+
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    return first, last
+
+
+def generate(invoices=10000, payments=5000, expenses=5000, unposted=200, days=365, seed=1, log=print):
+    """
+    벤치마크용 회사와 문서를 만들고 전기합니다.
+    반환: {이름: {'seconds', 'queries'}} (전기 단계 측정값)
+    """
+    if Company.objects.exists():
+        raise ValueError(
+            "The database already has companies. Run the benchmark against an empty "
+            "scratch database (for example DATABASE_NAME=bench.sqlite3)."
+        )
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    start = today - timedelta(days=days - 1)
+    payments = min(payments, invoices)
+
+    with transaction.atomic():
+        company = Company.objects.create(name="Benchmark Co")
+        account_count, rule_count = load_chart(company)
+    log(f"Created {company} with {account_count} accounts and {rule_count} posting rules.")
+
+    def invoice_rows():
+        for i in range(invoices):
+            subtotal, tax = _amounts(rng)
+            day = start + timedelta(days=rng.randrange(days))
+            yield Invoice(
+                invoice_number=f"BM-INV-{i + 1:07d}",
+                status="sent",
+                invoice_date=day,
+                due_date=day + timedelta(days=30),
+                subtotal=subtotal,
+                tax_amount=tax,
+                total_amount=subtotal + tax,
+            )
+
+    first_invoice, _ = _create_in_batches(Invoice, invoice_rows())
+
+    def payment_rows():
+        # 송장 pk 는 한 번에 만든 묶음이라 이어져 있다고 보지 않고 다시 읽음
+        paid = Invoice.objects.filter(pk__gte=first_invoice).order_by("pk")[:payments]
+        for i, (invoice_id, invoice_date, total) in enumerate(
+            paid.values_list("pk", "invoice_date", "total_amount").iterator()
+        ):
+            yield Payment(
+                payment_number=f"BM-PAY-{i + 1:07d}",
+                invoice_id=invoice_id,
+                amount=total,
+                payment_date=min(invoice_date + timedelta(days=rng.randrange(45)), today),
+                payment_method="bank_transfer",
+                status="pending",
+            )
+
+    _create_in_batches(Payment, payment_rows())
+
+    def expense_rows():
+        for i in range(expenses):
+            amount, _ = _amounts(rng)
+            yield Expense(
+                company=company,
+                expense_number=f"BM-EXP-{i + 1:07d}",
+                expense_date=start + timedelta(days=rng.randrange(days)),
+                vendor_name=f"Vendor {rng.randrange(200)}",
+                category=rng.choice(EXPENSE_CATEGORIES),
+                description="Benchmark expense",
+                amount=amount,
+                tax_amount=Decimal("0.00"),
+                total_amount=amount,
+                status="approved",
+            )
+
+    _create_in_batches(Expense, expense_rows())
+    log(f"Created {invoices} invoices, {payments} payments and {expenses} expenses.")
+
+    # 마지막 unposted 건은 post_documents 측정용으로 남김
+    def head(queryset):
+        keep = max(queryset.count() - unposted, 0)
+        last = queryset.order_by("pk").values_list("pk", flat=True)[keep - 1] if keep else 0
+        return queryset.filter(pk__lte=last)
+
+    results = {}
+    for name, post, queryset in (
+        ("bulk_post_sales", bulk_post_sales, Invoice.objects.filter(is_posted=False)),
+        ("bulk_post_incoming_payments", bulk_post_incoming_payments, Payment.objects.filter(status="pending")),
+        ("bulk_post_expenses", bulk_post_expenses, Expense.objects.filter(company=company, status="approved")),
+    ):
+        seconds, queries, result = measure(lambda: post(head(queryset), company))
+        results[name] = {"seconds": seconds, "queries": queries}
+        log(
+            f"{name}: posted {result['posted']}, failed {len(result['failed'])} "
+            f"in {seconds:.2f}s ({queries} queries)."
+        )
+    return results
+
+
+# -----------------------------
+# 측정
+# -----------------------------
+def _views(today):
+    year_start = today.replace(month=1, day=1).isoformat()
+    last_year = (today - timedelta(days=364)).isoformat()
+    return [
+        ("chart_of_accounts", "accounting:chart_of_accounts", {}),
+        ("trial_balance", "accounting:trial_balance", {}),
+        ("income_statement", "accounting:income_statement", {}),
+        ("income_statement (12 months)", "accounting:income_statement",
+         {"date_from": last_year, "date_to": today.isoformat()}),
+        ("balance_sheet", "accounting:balance_sheet", {}),
+        ("general_ledger", "accounting:general_ledger", {}),
+        ("general_ledger (YTD)", "accounting:general_ledger",
+         {"date_from": year_start, "date_to": today.isoformat()}),
+        ("post_documents", "accounting:post_documents", {}),
+    ]
+
+
+def _client():
+    User = get_user_model()
+    user = User.objects.filter(is_superuser=True, is_active=True).first()
+    if user is None:
+        # bulk_create: 사용자 post_save 시그널(고객 프로필 생성)을 거치지 않음
+        user = User(username="benchmark", is_staff=True, is_superuser=True, is_active=True)
+        user.set_unusable_password()
+        User.objects.bulk_create([user])
+        user = User.objects.get(username="benchmark")
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def run(repeat=5, log=print):
+    """화면별 {이름: {'seconds': 중앙값, 'queries'}}. post_documents POST 는 한 번만 잽니다."""
+    results = {}
+    today = date.today()
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        client = _client()
+        for name, url_name, params in _views(today):
+            url = reverse(url_name)
+            timings = []
+            for _ in range(repeat):
+                seconds, queries, response = measure(lambda: client.get(url, params))
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+                timings.append(seconds)
+            results[name] = {"seconds": statistics.median(timings), "queries": queries}
+            log(f"{name}: {results[name]['seconds'] * 1000:.1f} ms, {queries} queries")
+
+        # 남겨 둔 문서를 실제로 전기(한 번뿐인 동작이라 반복하지 않음)
+        seconds, queries, response = measure(lambda: client.post(reverse("accounting:post_documents")))
+        results["post_documents (POST)"] = {"seconds": seconds, "queries": queries}
+        log(f"post_documents (POST): {seconds * 1000:.1f} ms, {queries} queries")
+    return results
+
+
+def environment():
+    return {
+        "date": timezone.now().isoformat(timespec="seconds"),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "journal_lines": JournalLine.objects.count(),
+    }
+
+
+def compare(results, baseline):
+    """[(이름, 초, 쿼리, 기준 초 또는 None, 기준 쿼리 또는 None, 변화율 또는 None)]"""
+    rows = []
+    for name, current in results.items():
+        base = (baseline or {}).get(name)
+        change = None
+        if base and base["seconds"]:
+            change = (current["seconds"] - base["seconds"]) / base["seconds"]
+        rows.append(
+            (
+                name,
+                current["seconds"],
+                current["queries"],
+                base["seconds"] if base else None,
+                base["queries"] if base else None,
+                change,
+            )
+        )
+    return rows
@@ -0,0 +1,245 @@
+# accounting/expense_import.py
+"""
+비용 일괄 가져오기(카드 사용내역/영수증 묶음).
+
+- CSV 를 한 줄씩 읽어 검증하고 청크 단위로 Expense 를 bulk_create 합니다.
+  한 줄이라도 잘못되면 전체를 되돌리고 줄 번호가 붙은 오류 목록을 돌려줍니다.
+- ZIP 을 올리면 안의 첫 CSV 를 읽고, receipt 열에 적힌 파일을 같은 ZIP 에서 찾아
+  영수증으로 저장합니다.
+- 비용 번호(EXP-YYYYMMDD-NNNNN)는 Expense.save() 와 같은 시퀀스에서 묶음 단위로 받습니다.
+- 전기는 services.bulk_post_expenses 로 청크마다 전표를 한 번에 만듭니다.
+"""
+import csv
+import io
+import posixpath
+import zipfile
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from accounting.models import Expense
+from accounting.reconciliation import _parse_amount, _parse_date
+from accounting.services import _chunked, bulk_post_expenses
+from dogfoot.sequences import SequenceBlock, last_number
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 50  # 오류가 많을 때 돌려줄 최대 줄 수
+
+CSV_COLUMNS = {
+    "date": ("date", "expense date", "transaction date", "trans date", "posted date"),
+    "vendor": ("vendor", "vendor name", "payee", "merchant", "name"),
+    "description": ("description", "memo", "details"),
+    "category": ("category", "type"),
+    "amount": ("amount", "net amount", "subtotal"),
+    "tax": ("tax", "tax amount", "vat", "gst"),
+    "reference": ("reference", "reference number", "receipt number", "invoice number", "ref"),
+    "receipt": ("receipt", "receipt file", "attachment"),
+    "notes": ("notes", "note"),
+}
+
+# 분류 값(rent) 또는 표시 이름(Rent & Lease) 모두 받습니다.
+CATEGORY_ALIASES = {
+    **{value: value for value, _ in Expense.EXPENSE_CATEGORY_CHOICES},
+    **{label.lower(): value for value, label in Expense.EXPENSE_CATEGORY_CHOICES},
+}
+
+
+@dataclass
+class ExpenseRow:
+    line: int
+    date: date
+    vendor_name: str
+    description: str
+    category: str
+    amount: Decimal
+    tax_amount: Decimal
+    reference_number: str = ""
+    receipt: str = ""
+    notes: str = ""
+
+
+# -----------------------------
+# 파싱
+# -----------------------------
+def parse_csv(stream, default_category="other"):
+    """
+    헤더가 있는 CSV 를 ExpenseRow 로 읽습니다. 잘못된 줄은 (줄 번호, 메시지) 로 돌려줍니다.
+    카드 내역처럼 사용액이 음수로 적힌 파일도 있으므로 금액은 절댓값을 씁니다.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = [column.strip().lower() for column in next(reader, [])]
+    columns = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                columns[key] = header.index(alias)
+                break
+    if not {"date", "amount"} <= columns.keys() or not {"vendor", "description"} & columns.keys():
+        raise ValidationError("CSV needs date, amount and vendor (or description) columns.")
+
+    def cell(row, key):
+        index = columns.get(key)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    for number, row in enumerate(reader, start=2):
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            amount = abs(_parse_amount(cell(row, "amount")) or Decimal("0"))
+            tax = abs(_parse_amount(cell(row, "tax")) or Decimal("0"))
+            if not amount:
+                raise ValueError("amount must not be zero")
+            category = cell(row, "category").lower() or default_category
+            if category not in CATEGORY_ALIASES:
+                raise ValueError(f"unknown category {cell(row, 'category')!r}")
+            vendor = cell(row, "vendor") or cell(row, "description")
+            yield ExpenseRow(
+                line=number,
+                date=_parse_date(cell(row, "date")),
+                vendor_name=vendor[:255],
+                description=cell(row, "description") or vendor,
+                category=CATEGORY_ALIASES[category],
+                amount=amount.quantize(Decimal("0.01")),
+                tax_amount=tax.quantize(Decimal("0.01")),
+                reference_number=cell(row, "reference")[:100],
+                receipt=cell(row, "receipt"),
+                notes=cell(row, "notes"),
+            )
+        except ValueError as e:
+            yield number, str(e)
+
+
+def _open_upload(stream, file_name):
+    """(CSV 스트림, ZIP 또는 None). ZIP 이면 첫 번째 CSV 를 엽니다."""
+    if not file_name.lower().endswith(".zip"):
+        return stream, None
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise ValidationError("Upload is not a valid ZIP file.")
+    names = sorted(name for name in archive.namelist() if name.lower().endswith(".csv"))
+    if not names:
+        raise ValidationError("ZIP file does not contain a CSV file.")
+    return archive.open(names[0]), archive
+
+
+def _receipt(archive, name):
+    if archive is None:
+        raise ValueError("receipts can only be attached when uploading a ZIP file")
+    try:
+        return ContentFile(archive.read(name), name=posixpath.basename(name))
+    except KeyError:
+        raise ValueError(f"receipt {name!r} not found in ZIP file")
+
+
+# -----------------------------
+# 가져오기
+# -----------------------------
+def _expense_numbers(block_size=CHUNK_SIZE):
+    """
+    Expense.save() 와 같은 EXP 시퀀스에서 번호를 block_size 개씩 미리 받아
+    EXP-YYYYMMDD-NNNNN 을 만듭니다(마지막 블록의 남은 번호는 비어 있게 됨).
+    """
+    today = timezone.now().strftime("%Y%m%d")
+    prefix = f"EXP-{today}-"
+    numbers = SequenceBlock(
+        "EXP",
+        today,
+        block_size,
+        seed=lambda: last_number(Expense.objects, "expense_number", prefix),
+    )
+    for number in numbers:
+        yield f"{prefix}{number:05d}"
+
+
+def import_expenses(
+    company,
+    stream,
+    file_name="",
+    user=None,
+    financial_account=None,
+    default_category="other",
+    post=True,
+    chunk_size=CHUNK_SIZE,
+):
+    """
+    비용 파일(CSV 또는 영수증이 든 ZIP)을 가져옵니다.
+    financial_account 를 주면 그 계좌(카드)로 지급된 비용(paid)으로, 아니면 approved 로
+    만들고, post=True 면 바로 전기합니다.
+    반환: {'created', 'posted', 'failed': [(Expense, 사유), ...]}
+    오류가 있으면 아무것도 저장하지 않고 ValidationError(줄별 메시지 목록)를 냅니다.
+    """
+    csv_stream, archive = _open_upload(stream, file_name)
+    status = "paid" if financial_account else "approved"
+    payment_method = ""
+    if financial_account:
+        payment_method = "credit_card" if financial_account.account_type == "credit_card" else "bank_transfer"
+    errors = []
+    created_ids = []
+    saved_receipts = []
+
+    with transaction.atomic():
+        numbers = _expense_numbers(chunk_size)
+        rows = parse_csv(csv_stream, default_category)
+        for chunk in _chunked(rows, chunk_size):
+            expenses = []
+            for row in chunk:
+                if isinstance(row, tuple):
+                    errors.append(row)
+                    continue
+                expense = Expense(
+                    company=company,
+                    expense_number=next(numbers),
+                    expense_date=row.date,
+                    vendor_name=row.vendor_name,
+                    description=row.description,
+                    category=row.category,
+                    reference_number=row.reference_number,
+                    amount=row.amount,
+                    tax_amount=row.tax_amount,
+                    total_amount=row.amount + row.tax_amount,
+                    payment_method=payment_method,
+                    financial_account=financial_account,
+                    paid_date=row.date if financial_account else None,
+                    status=status,
+                    created_by=user,
+                    notes=row.notes,
+                )
+                if row.receipt:
+                    try:
+                        receipt = _receipt(archive, row.receipt)
+                    except ValueError as e:
+                        errors.append((row.line, str(e)))
+                        continue
+                    if not errors:  # 어차피 되돌릴 가져오기라면 파일을 쓰지 않음
+                        expense.receipt_file.save(receipt.name, receipt, save=False)
+                        saved_receipts.append(expense.receipt_file)
+                expenses.append(expense)
+            if errors:
+                continue  # 나머지 줄도 검증만 해서 오류를 한 번에 보여줌
+            created_ids += [expense.pk for expense in Expense.objects.bulk_create(expenses)]
+
+        if errors:
+            for receipt in saved_receipts:  # 저장소의 파일은 트랜잭션으로 되돌려지지 않음
+                receipt.storage.delete(receipt.name)
+            raise ValidationError(
+                [f"Line {line}: {message}" for line, message in errors[:MAX_ERRORS]]
+                + ([f"... and {len(errors) - MAX_ERRORS} more"] if len(errors) > MAX_ERRORS else [])
+            )
+        if not created_ids:
+            raise ValidationError("The file does not contain any expenses.")
+
+    result = {"created": len(created_ids), "posted": 0, "failed": []}
+    if post:
+        # 가져오기는 이미 커밋됨. 전기 실패(마감 기간 등)는 문서별로 남고 비용은 그대로 둠
+        for ids in _chunked(created_ids, chunk_size):
+            posted = bulk_post_expenses(Expense.objects.filter(pk__in=ids), company, chunk_size)
+            result["posted"] += posted["posted"]
+            result["failed"] += posted["failed"]
+    return result
@@ -0,0 +1,250 @@
+# accounting/exports.py
+"""
+원장/시산표 내보내기(CSV, XLSX).
+
+행은 values_list().iterator(chunk_size=...) 로 읽고 StreamingHttpResponse 로 바로
+내보내므로 행 수와 관계없이 메모리 사용량이 일정합니다. XLSX 는 추가 의존성 없이
+zipfile 스트림에 시트 XML 을 한 행씩 써서 만듭니다(인라인 문자열, 스타일 없음).
+"""
+import csv
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+
+from accounting.balances import ZERO, normal_balance
+from accounting.models import JournalLine
+from accounting.reports import cumulative_totals
+
+CHUNK_SIZE = 2000
+FORMATS = ("csv", "xlsx")
+
+
+# -----------------------------
+# 응답
+# -----------------------------
+class _Echo:
+    """csv.writer 가 쓴 한 줄을 그대로 돌려주는 가짜 파일."""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(filename, header, rows):
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield "\ufeff"  # Excel 이 UTF-8 로 열도록 BOM
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+class _ZipStream:
+    """ZipFile 이 쓰는 바이트를 모아 두었다가 제너레이터가 꺼내 가는 비탐색(non-seekable) 버퍼."""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+
+
+def _xlsx_cell(value):
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, Decimal):
+        return f"<c><v>{value:f}</v></c>"
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, date):
+        value = value.isoformat()
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+def xlsx_response(filename, sheet_name, header, rows, flush_bytes=64 * 1024):
+    def stream():
+        buffer = _ZipStream()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, content in _XLSX_PARTS.items():
+                archive.writestr(name, content)
+            archive.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name[:31])))
+            with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    b"<sheetData>"
+                )
+                sheet.write(_xlsx_row(header).encode())
+                for row in rows:
+                    sheet.write(_xlsx_row(row).encode())
+                    if buffer.size >= flush_bytes:
+                        yield buffer.pop()
+                sheet.write(b"</sheetData></worksheet>")
+        yield buffer.pop()
+
+    response = StreamingHttpResponse(
+        stream(),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}.xlsx"'
+    return response
+
+
+def export_response(fmt, filename, header, rows):
+    """fmt 은 'csv' 또는 'xlsx'."""
+    if fmt == "xlsx":
+        return xlsx_response(filename, filename, header, rows)
+    return csv_response(filename, header, rows)
+
+
+# -----------------------------
+# 행 생성기
+# -----------------------------
+GENERAL_LEDGER_HEADER = [
+    "Date", "Entry #", "Status", "Memo", "Customer", "Supplier",
+    "Account code", "Account name", "Description", "Debit", "Credit",
+]
+
+
+def general_ledger_rows(entries):
+    """필터된 전표 queryset 의 분개행을 화면과 같은 순서(최신순)로 한 행씩."""
+    lines = (
+        JournalLine.objects.filter(entry__in=entries.values("pk"))
+        .order_by("-entry__date", "-entry_id", "id")
+        .values_list(
+            "entry__date", "entry_id", "entry__posted", "entry__memo",
+            "entry__customer__company_name", "entry__customer__first_name",
+            "entry__customer__last_name", "entry__supplier__name",
+            "account__code", "account__name", "description", "debit", "credit",
+        )
+    )
+    for (
+        day, entry_id, posted, memo, company_name, first_name, last_name, supplier, *rest
+    ) in lines.iterator(chunk_size=CHUNK_SIZE):
+        customer = None
+        if first_name is not None:  # Customer.__str__ 와 같은 표기
+            customer = f"{first_name} {last_name}"
+            if company_name:
+                customer = f"{company_name} - {customer}"
+        yield [day, entry_id, "Posted" if posted else "Draft", memo, customer, supplier, *rest]
+
+
+TRIAL_BALANCE_HEADER = ["Account code", "Account name", "Type", "Debit", "Credit"]
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal("0.01"))
+
+
+def trial_balance_rows(report):
+    for row in report["trial_balance_data"]:
+        account = row["account"]
+        yield [
+            account.code, account.name, account.get_type_display(),
+            _money(row["debit"]), _money(row["credit"]),
+        ]
+    yield ["", "Total", "", _money(report["total_debit"]), _money(report["total_credit"])]
+
+
+AGING_SUMMARY_HEADER = ["Party", "0-30", "31-60", "61-90", "90+", "Total"]
+AR_DETAIL_HEADER = [
+    "Invoice #", "Customer", "Invoice date", "Due date", "Days past due", "Bucket", "Balance due",
+]
+AP_DETAIL_HEADER = [
+    "PO #", "Supplier", "Order date", "Expected delivery", "Days since order", "Bucket", "Open balance",
+]
+
+
+def aging_summary_rows(report):
+    keys = ["days_0_30", "days_31_60", "days_61_90", "days_over_90", "total"]
+    for row in report["rows"]:
+        yield [row["party"], *(_money(row[key]) for key in keys)]
+    yield ["Total", *(_money(report["totals"][key]) for key in keys)]
+
+
+ACCOUNT_LEDGER_HEADER = ["Date", "Entry #", "Memo", "Description", "Debit", "Credit", "Balance"]
+
+
+def account_ledger_rows(company, account, date_from=None, date_to=None):
+    """
+    계정 하나의 posted 분개행과 누적 잔액. date_from 이 있으면 그 전날까지의
+    누적 잔액을 기초 잔액 행으로 먼저 냅니다.
+    """
+    balance = ZERO
+    lines = JournalLine.objects.filter(company=company, account=account, posted=True)
+    if date_from:
+        start = date.fromisoformat(date_from) if isinstance(date_from, str) else date_from
+        debit, credit = cumulative_totals(company, start - timedelta(days=1)).get(
+            account.pk, (ZERO, ZERO)
+        )
+        balance = normal_balance(account.type, debit, credit)
+        yield [start, "", "Opening balance", "", "", "", balance]
+        lines = lines.filter(date__gte=start)
+    if date_to:
+        lines = lines.filter(date__lte=date_to)
+
+    lines = lines.order_by("date", "entry_id", "id").values_list(
+        "date", "entry_id", "entry__memo", "description", "debit", "credit"
+    )
+    for day, entry_id, memo, description, debit, credit in lines.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        balance += normal_balance(account.type, debit, credit)
+        yield [day, entry_id, memo, description, debit, credit, balance]
@@ -4,6 +4,7 @@ from decimal import Decimal
 from .models import Expense, LedgerAccount
 from customer.models import FinancialAccount
 from purchases.models import Supplier
+from sales.models import Payment
 
 
 class ExpenseForm(forms.ModelForm):
@@ -102,4 +103,90 @@ class ExpenseForm(forms.ModelForm):
         else:
             cleaned_data['tax_amount'] = Decimal('0.00')
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+class ExpenseImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV file, or a ZIP file containing the CSV and the receipts it references",
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'file-input file-input-bordered w-full',
+            'accept': '.csv,.zip'
+        })
+    )
+    financial_account = forms.ModelChoiceField(
+        queryset=FinancialAccount.objects.none(),
+        required=False,
+        empty_label='Not paid yet (credit Accounts Payable)',
+        help_text="Card or bank account the expenses were paid with",
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'})
+    )
+    default_category = forms.ChoiceField(
+        choices=Expense.EXPENSE_CATEGORY_CHOICES,
+        initial='other',
+        help_text="Used for rows without a category column value",
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'})
+    )
+    post = forms.BooleanField(
+        required=False,
+        initial=True,
+        label='Post to general ledger',
+        widget=forms.CheckboxInput(attrs={'class': 'checkbox checkbox-primary'})
+    )
+
+    def __init__(self, *args, **kwargs):
+        company = kwargs.pop('company', None)
+        super().__init__(*args, **kwargs)
+        if company:
+            self.fields['financial_account'].queryset = FinancialAccount.objects.filter(
+                organization=company
+            ).order_by('account_name')
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.zip')):
+            raise forms.ValidationError("Upload a .csv or .zip file.")
+        return upload
+
+
+class PaymentImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="Bank remittance (lockbox) CSV file",
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'file-input file-input-bordered w-full',
+            'accept': '.csv'
+        })
+    )
+    financial_account = forms.ModelChoiceField(
+        queryset=FinancialAccount.objects.none(),
+        required=False,
+        empty_label='Default cash account (posting rule)',
+        help_text="Bank account the payments were deposited to",
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'})
+    )
+    default_method = forms.ChoiceField(
+        choices=Payment.PAYMENT_METHOD_CHOICES,
+        initial='check',
+        label='Default payment method',
+        help_text="Used for rows without a method column value",
+        widget=forms.Select(attrs={'class': 'select select-bordered w-full'})
+    )
+    post = forms.BooleanField(
+        required=False,
+        initial=True,
+        label='Post to general ledger',
+        widget=forms.CheckboxInput(attrs={'class': 'checkbox checkbox-primary'})
+    )
+
+    def __init__(self, *args, **kwargs):
+        company = kwargs.pop('company', None)
+        super().__init__(*args, **kwargs)
+        if company:
+            self.fields['financial_account'].queryset = FinancialAccount.objects.filter(
+                organization=company
+            ).order_by('account_name')
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith('.csv'):
+            raise forms.ValidationError("Upload a .csv file.")
+        return upload
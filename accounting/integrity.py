@@ -0,0 +1,230 @@
+# accounting/integrity.py
+"""
+원장 무결성 검사(verify_ledger).
+
+전표를 id 구간으로 나눠 프로세스 풀에서 검사합니다. 작업마다 자기 DB 연결로
+구간에 대한 집계 쿼리 몇 개만 실행하므로 원장이 커져도 구간 수만큼 나눠 돌릴 수 있습니다.
+
+- unbalanced: 차변 합계와 대변 합계가 다른 전표
+- orphaned_lines: 전표가 없는 분개행
+- stale_lines: 전표에서 복사한 company/date/posted 가 전표와 다르거나 다른 회사 계정을 쓰는 분개행
+- flag_mismatches: 원문서의 전기 플래그와 전표 유무가 어긋난 경우(원문서가 지워진 전표 포함)
+
+원문서당 전표가 둘 이상인 경우는 je_unique_source 제약이 막으므로 따로 보지 않습니다.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import django
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.db.models import Exists, F, Max, OuterRef, Q, Sum
+from django.utils import timezone
+
+from accounting.models import JournalEntry, JournalLine, LedgerCheck
+from accounting.services import unposted
+
+CHUNK_SIZE = 50000  # 작업 하나가 맡는 전표 id 구간
+ISSUE_LIMIT = 500  # LedgerCheck.issues 에 남기는 최대 건수
+TOLERANCE = Decimal("0.005")  # SQLite 는 합계를 실수로 계산하므로 반올림 오차는 무시
+
+CHECKS = ("unbalanced", "orphaned_lines", "stale_lines", "flag_mismatches")
+
+# 원문서 모델 → (전기됨 조건, 증분 검사에서 최근 변경을 가려낼 시각 필드)
+# sales.Payment 는 전기 플래그가 없어(status 만 바뀜) 원문서 존재만 확인합니다.
+POSTED_FLAGS = {
+    "sales.invoice": (Q(is_posted=True), "posted_at"),
+    "purchases.purchaseorder": (Q(is_posted=True), "posted_at"),
+    "purchases.supplierpayment": (Q(posted=True), "posted_at"),
+    "accounting.expense": (Q(status="posted"), "updated_at"),
+}
+
+
+def _findings():
+    return {"counts": dict.fromkeys(CHECKS, 0), "issues": []}
+
+
+def _add(findings, check, **detail):
+    findings["counts"][check] += 1
+    if len(findings["issues"]) < ISSUE_LIMIT:
+        findings["issues"].append({"check": check, **detail})
+
+
+# -----------------------------
+# 작업 단위 검사
+# -----------------------------
+def check_entries(first_id, last_id):
+    """id 가 first_id..last_id 인 전표와 그 분개행을 검사합니다."""
+    findings = _findings()
+    lines = JournalLine.objects.filter(entry_id__gte=first_id, entry_id__lte=last_id).order_by()
+
+    unbalanced = (
+        lines.values("entry_id")
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .annotate(diff=F("debit_sum") - F("credit_sum"))
+        .filter(Q(diff__gt=TOLERANCE) | Q(diff__lt=-TOLERANCE))
+        .order_by("entry_id")
+    )
+    for row in unbalanced:
+        _add(
+            findings,
+            "unbalanced",
+            entry=row["entry_id"],
+            detail=f"debit {row['debit_sum']:.2f} != credit {row['credit_sum']:.2f}",
+        )
+
+    orphaned = lines.filter(
+        ~Exists(JournalEntry.objects.filter(pk=OuterRef("entry_id")))
+    ).values_list("pk", "entry_id")
+    for line_id, entry_id in orphaned.order_by("pk").iterator():
+        _add(findings, "orphaned_lines", line=line_id, entry=entry_id, detail="entry does not exist")
+
+    stale = lines.filter(
+        ~Q(
+            company_id=F("entry__company_id"),
+            date=F("entry__date"),
+            posted=F("entry__posted"),
+        )
+        | ~Q(account__company_id=F("entry__company_id"))
+    ).values_list("pk", "entry_id")
+    for line_id, entry_id in stale.order_by("pk").iterator():
+        _add(
+            findings,
+            "stale_lines",
+            line=line_id,
+            entry=entry_id,
+            detail="company/date/posted differ from entry or account belongs to another company",
+        )
+
+    sourced = JournalEntry.objects.filter(
+        pk__gte=first_id, pk__lte=last_id, source_content_type__isnull=False
+    )
+    for ct_id in sourced.values_list("source_content_type_id", flat=True).distinct().order_by():
+        ct = ContentType.objects.get_for_id(ct_id)
+        model = ct.model_class()
+        label = f"{ct.app_label}.{ct.model}"
+        entries = sourced.filter(source_content_type_id=ct_id)
+        if model is None:
+            for entry_id, object_id in entries.values_list("pk", "source_object_id"):
+                _add(
+                    findings,
+                    "flag_mismatches",
+                    entry=entry_id,
+                    document=f"{label}#{object_id}",
+                    detail="document model no longer exists",
+                )
+            continue
+
+        documents = model._base_manager.filter(pk=OuterRef("source_object_id"))
+        flag = POSTED_FLAGS.get(label, (Q(), None))[0]
+        problems = (
+            entries.annotate(
+                document_exists=Exists(documents),
+                document_flagged=Exists(documents.filter(flag)),
+            )
+            .filter(Q(document_exists=False) | Q(document_flagged=False))
+            .values_list("pk", "source_object_id", "document_exists")
+        )
+        for entry_id, object_id, exists in problems.order_by("pk").iterator():
+            _add(
+                findings,
+                "flag_mismatches",
+                entry=entry_id,
+                document=f"{label}#{object_id}",
+                detail="entry exists but document is not flagged as posted"
+                if exists
+                else "document no longer exists",
+            )
+    return findings
+
+
+def check_documents(label, since=None):
+    """전기 플래그가 켜져 있지만 전표가 없는 원문서. since 가 있으면 그 이후 변경분만."""
+    findings = _findings()
+    model = apps.get_model(label)
+    flag, changed_field = POSTED_FLAGS[label]
+    documents = model._base_manager.filter(flag)
+    if since is not None:
+        documents = documents.filter(**{f"{changed_field}__gte": since})
+    for pk in unposted(documents).order_by("pk").values_list("pk", flat=True).iterator():
+        _add(
+            findings,
+            "flag_mismatches",
+            document=f"{label}#{pk}",
+            detail="flagged as posted but has no journal entry",
+        )
+    return findings
+
+
+def _check(task):
+    kind, *args = task
+    if kind == "entries":
+        return check_entries(*args)
+    return check_documents(*args)
+
+
+def _init_worker():
+    django.setup()  # spawn 방식으로 시작된 프로세스용(fork 에서는 이미 준비됨)
+
+
+def _check_in_worker(task):
+    try:
+        return _check(task)
+    finally:
+        connections.close_all()
+
+
+# -----------------------------
+# 실행
+# -----------------------------
+def verify(incremental=False, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    원장을 검사하고 결과를 LedgerCheck 로 남깁니다.
+    incremental=True 면 마지막으로 끝난 검사 이후 생긴 전표와 그 이후 전기 플래그가
+    바뀐 원문서만 봅니다(이전 검사가 없으면 전체 검사).
+    workers > 1 이면 구간별 작업을 프로세스 풀에서 병렬로 실행합니다.
+    """
+    start_id, since = 1, None
+    if incremental:
+        previous = LedgerCheck.objects.filter(finished_at__isnull=False)
+        last = previous.first()
+        if last is not None:
+            start_id = (previous.aggregate(Max("last_entry_id"))["last_entry_id__max"] or 0) + 1
+            since = last.started_at
+        else:
+            incremental = False
+
+    # 검사 중에 생기는 전표는 다음 실행에서 봅니다.
+    end_id = JournalEntry.objects.aggregate(Max("pk"))["pk__max"] or 0
+    check = LedgerCheck.objects.create(
+        incremental=incremental,
+        first_entry_id=start_id if end_id >= start_id else None,
+        last_entry_id=max(end_id, start_id - 1) or None,
+        entries_checked=JournalEntry.objects.filter(pk__gte=start_id, pk__lte=end_id).count(),
+    )
+
+    tasks = [
+        ("entries", first, min(first + chunk_size - 1, end_id))
+        for first in range(start_id, end_id + 1, chunk_size)
+    ]
+    tasks += [("documents", label, since) for label in POSTED_FLAGS]
+
+    if workers > 1:
+        connections.close_all()  # 자식 프로세스가 부모의 DB 연결을 물려받지 않도록
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)), initializer=_init_worker
+        ) as pool:
+            results = list(pool.map(_check_in_worker, tasks))
+    else:
+        results = [_check(task) for task in tasks]
+
+    issues = []
+    for findings in results:
+        for name, count in findings["counts"].items():
+            setattr(check, name, getattr(check, name) + count)
+        issues.extend(findings["issues"][: ISSUE_LIMIT - len(issues)])
+    check.issues = issues
+    check.finished_at = timezone.now()
+    check.save()
+    return check
@@ -0,0 +1,104 @@
+# accounting/ledger.py
+"""
+총계정원장(General ledger) 목록 조회.
+
+OFFSET 대신 (date, id) 키셋 페이지네이션을 사용하므로 몇 번째 페이지든
+(company, date, id) 인덱스에서 page_size 만큼만 읽습니다. 전표별 차변/대변 합계는
+SQL 서브쿼리로, 분개행과 계정은 Prefetch 한 번으로 가져옵니다.
+"""
+from datetime import date
+
+from django.db.models import DecimalField, Exists, OuterRef, Prefetch, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from accounting.models import JournalEntry, JournalLine
+
+PAGE_SIZE = 25
+
+
+def encode_cursor(entry):
+    return f"{entry.date.isoformat()}_{entry.pk}"
+
+
+def decode_cursor(cursor):
+    """'YYYY-MM-DD_id' -> (date, id). 형식이 틀리면 None."""
+    try:
+        day, pk = cursor.split("_", 1)
+        return date.fromisoformat(day), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _line_sum(field):
+    return Coalesce(
+        Subquery(
+            JournalLine.objects.filter(entry=OuterRef("pk"))
+            .values("entry")
+            .annotate(total=Sum(field))
+            .values("total")
+        ),
+        Value(0),
+        output_field=DecimalField(max_digits=16, decimal_places=2),
+    )
+
+
+def ledger_entries(company, account_id=None, date_from=None, date_to=None, status="all"):
+    """필터가 적용된 전표 queryset(정렬/페이지 전)."""
+    entries = JournalEntry.objects.filter(company=company)
+    if status == "posted":
+        entries = entries.filter(posted=True)
+    elif status == "draft":
+        entries = entries.filter(posted=False)
+    if date_from:
+        entries = entries.filter(date__gte=date_from)
+    if date_to:
+        entries = entries.filter(date__lte=date_to)
+    if account_id:
+        # JOIN + DISTINCT 대신 EXISTS: 정렬/LIMIT 이 인덱스를 그대로 탈 수 있음
+        entries = entries.filter(
+            Exists(JournalLine.objects.filter(entry=OuterRef("pk"), account_id=account_id))
+        )
+    return entries
+
+
+def ledger_page(entries, after=None, before=None, page_size=PAGE_SIZE):
+    """
+    최신순(-date, -id) 한 페이지.
+    after: 이 커서보다 오래된 전표(다음 페이지), before: 이 커서보다 최근 전표(이전 페이지).
+    반환: {'entries', 'next_cursor', 'prev_cursor'} (더 없으면 커서는 None)
+    """
+    after, before = decode_cursor(after), decode_cursor(before)
+    if before:
+        day, pk = before
+        qs = entries.filter(Q(date__gt=day) | Q(date=day, pk__gt=pk)).order_by("date", "id")
+    else:
+        if after:
+            day, pk = after
+            entries = entries.filter(Q(date__lt=day) | Q(date=day, pk__lt=pk))
+        qs = entries.order_by("-date", "-id")
+
+    qs = (
+        qs.select_related("customer", "supplier")
+        .annotate(total_debit=_line_sum("debit"), total_credit=_line_sum("credit"))
+        .prefetch_related(
+            Prefetch(
+                "lines",
+                queryset=JournalLine.objects.select_related("account").order_by("id"),
+            )
+        )
+    )
+    rows = list(qs[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if before:
+        rows.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = after is not None, has_more
+
+    return {
+        "entries": rows,
+        "next_cursor": encode_cursor(rows[-1]) if rows and has_older else None,
+        "prev_cursor": encode_cursor(rows[0]) if rows and has_newer else None,
+    }
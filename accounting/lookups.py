@@ -0,0 +1,154 @@
+# accounting/lookups.py
+"""
+PostingRule / LedgerAccount 조회 캐시.
+
+두 모델은 거의 바뀌지 않으므로 프로세스 메모리에 (회사, doc_type) / (회사, code)
+단위로 보관합니다. 회사마다 버전(토큰)을 두고 post_save/post_delete 시그널
+(accounting.signals)에서 버전을 올려 무효화합니다.
+
+settings.ACCOUNTING_LOOKUP_CACHE 에 캐시 alias(예: "default")를 지정하면 버전을
+공유 캐시(Redis 등)에 두어 모든 워커가 같은 무효화를 보게 됩니다. 값 자체는 항상
+프로세스 메모리에만 있습니다.
+
+트랜잭션 안에서 무효화한 회사는 그 트랜잭션이 끝날 때까지 캐시를 채우지 않습니다.
+커밋되지 않은 행이 캐시에 남으면, 롤백 후에도 없는 pk 를 돌려주게 되기 때문입니다.
+호출자가 값을 바꿔도 캐시가 오염되지 않도록 항상 복사본을 돌려줍니다.
+"""
+import copy
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from accounting.models import LedgerAccount, PostingRule
+from core.transactions import on_commit_once, queued
+
+_MISSING = object()
+
+_entries = {}  # (kind, company_id, key) -> (version, value or None)
+_versions = {}  # company_id -> version (공유 캐시를 쓰지 않을 때)
+
+
+def _shared_cache():
+    alias = getattr(settings, "ACCOUNTING_LOOKUP_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def _version_key(company_id):
+    return f"accounting:lookups:v:{company_id}"
+
+
+def _version(company_id):
+    shared = _shared_cache()
+    if shared is None:
+        return _versions.get(company_id, 0)
+    key = _version_key(company_id)
+    version = shared.get(key)
+    if version is None:
+        # 키가 없거나 축출된 경우: 새 토큰을 심어 이전 항목이 재사용되지 않게 함
+        shared.add(key, uuid.uuid4().hex, timeout=None)
+        version = shared.get(key)
+    return version
+
+
+def _bump(company_id):
+    shared = _shared_cache()
+    if shared is None:
+        _versions[company_id] = _versions.get(company_id, 0) + 1
+    else:
+        shared.set(_version_key(company_id), uuid.uuid4().hex, timeout=None)
+
+
+class _Bumps:
+    """커밋 시 회사들의 버전을 올리는 on_commit 콜백. 큐에 남아 있으면 무효화가 진행 중이라는 뜻."""
+
+    def __init__(self):
+        self.company_ids = set()
+
+    def __call__(self):
+        for company_id in self.company_ids:
+            _bump(company_id)
+
+
+def _invalidated_in_transaction(company_id):
+    """
+    현재 트랜잭션에서 무효화했는지. 롤백(세이브포인트 포함)되면 콜백이 큐에서 빠지므로
+    별도의 롤백 훅 없이 끝난 트랜잭션은 자연히 제외됩니다.
+    """
+    bumps = queued(__name__)
+    return bumps is not None and company_id in bumps.company_ids
+
+
+def invalidate(company_id):
+    """
+    회사의 캐시를 무효화합니다. 커밋 전 같은 트랜잭션 안의 조회와, 커밋 후 다른 워커의
+    조회 모두 새 값을 보도록 즉시 한 번, 커밋 시 한 번 더 버전을 올립니다.
+    """
+    _bump(company_id)
+    if connection.in_atomic_block:
+        on_commit_once(__name__, _Bumps).company_ids.add(company_id)
+
+
+def clear():
+    """프로세스 캐시를 비웁니다(테스트/관리 명령용)."""
+    _entries.clear()
+    _versions.clear()
+
+
+def _cached(kind, company_id, key, load):
+    if _invalidated_in_transaction(company_id):
+        return load()  # 커밋되지 않은 값은 캐시하지 않음
+    version = _version(company_id)
+    hit = _entries.get((kind, company_id, key), _MISSING)
+    if hit is not _MISSING and hit[0] == version:
+        return copy.deepcopy(hit[1])
+    value = load()
+    _entries[(kind, company_id, key)] = (version, value)
+    return copy.deepcopy(value)
+
+
+def get_rule(company, doc_type):
+    """PostingRule(계정 select_related 포함). 없으면 PostingRule.DoesNotExist."""
+    company_id = getattr(company, "pk", company)
+    rule = _cached(
+        "rule",
+        company_id,
+        doc_type,
+        lambda: PostingRule.objects.select_related(
+            "debit_account", "credit_account", "tax_account"
+        )
+        .filter(company_id=company_id, doc_type=doc_type)
+        .first(),
+    )
+    if rule is None:
+        raise PostingRule.DoesNotExist(
+            f"PostingRule company={company_id} doc_type={doc_type} does not exist."
+        )
+    return rule
+
+
+def get_account(company, code, active_only=False):
+    """코드로 LedgerAccount 조회. 없거나(active_only 일 때) 비활성이면 LedgerAccount.DoesNotExist."""
+    company_id = getattr(company, "pk", company)
+    account = _cached(
+        "account",
+        company_id,
+        code,
+        lambda: LedgerAccount.objects.filter(company_id=company_id, code=code).first(),
+    )
+    if account is None or (active_only and not account.is_active):
+        raise LedgerAccount.DoesNotExist(
+            f"LedgerAccount code {code} not found for company={company_id}"
+        )
+    return account
+
+
+def get_or_create_account(company, code, defaults):
+    """get_account() 후 없으면 생성합니다(생성 시그널이 캐시를 무효화)."""
+    try:
+        return get_account(company, code)
+    except LedgerAccount.DoesNotExist:
+        return LedgerAccount.objects.get_or_create(
+            company=company, code=code, defaults=defaults
+        )[0]
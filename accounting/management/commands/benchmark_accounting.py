@@ -0,0 +1,80 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Generate a synthetic ledger in an empty database, time the accounting pages and '
+            'compare the results against a saved baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoices', type=int, default=10000, help='Invoices to generate')
+        parser.add_argument('--payments', type=int, default=5000, help='Incoming payments to generate')
+        parser.add_argument('--expenses', type=int, default=5000, help='Expenses to generate')
+        parser.add_argument('--unposted', type=int, default=200,
+                            help='Documents of each type left unposted for post_documents')
+        parser.add_argument('--days', type=int, default=365, help='Spread documents over this many days')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed')
+        parser.add_argument('--skip-generate', action='store_true',
+                            help='Time the data already in the database')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per page (median is reported)')
+        parser.add_argument('--baseline', help='JSON file from an earlier --save to compare against')
+        parser.add_argument('--save', help='Write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {e}")
+
+        results = {}
+        if not options['skip_generate']:
+            try:
+                results.update(benchmark.generate(
+                    invoices=options['invoices'],
+                    payments=options['payments'],
+                    expenses=options['expenses'],
+                    unposted=options['unposted'],
+                    days=options['days'],
+                    seed=options['seed'],
+                    log=self.stdout.write,
+                ))
+            except ValueError as e:
+                raise CommandError(str(e))
+        try:
+            results.update(benchmark.run(repeat=options['repeat'], log=self.stdout.write))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        environment = benchmark.environment()
+        self.stdout.write('')
+        self.stdout.write(f"{environment['journal_lines']} journal lines on {environment['database']}")
+        if baseline:
+            self.stdout.write(f"Baseline: {baseline['environment']['journal_lines']} journal lines "
+                              f"from {baseline['environment']['date']}")
+        self.stdout.write(f"{'benchmark':<30} {'ms':>10} {'queries':>8} {'base ms':>10} {'base q':>7} {'change':>8}")
+        for name, seconds, queries, base_seconds, base_queries, change in benchmark.compare(
+            results, baseline and baseline['results']
+        ):
+            line = f'{name:<30} {seconds * 1000:>10.1f} {queries:>8}'
+            if base_seconds is None:
+                self.stdout.write(line)
+                continue
+            change = change or 0
+            line += f' {base_seconds * 1000:>10.1f} {base_queries:>7} {change:>+8.0%}'
+            if change > 0.10 or queries > base_queries:
+                self.stdout.write(self.style.WARNING(line))
+            elif change < -0.10:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump({'environment': environment, 'results': results}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved results to {options['save']}"))
@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting.periods import close_period, reopen_period
+from customer.models import Organization as Company
+
+
+class Command(BaseCommand):
+    help = 'Close (or reopen) a monthly accounting period and snapshot account balances'
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help='Month to close, as YYYY-MM')
+        parser.add_argument('--company', type=int, help='Company id (defaults to the first company)')
+        parser.add_argument('--reopen', action='store_true', help='Reopen this month and every later close')
+
+    def handle(self, *args, **options):
+        try:
+            year, month = (int(part) for part in options['month'].split('-'))
+            period = date(year, month, 1)
+        except ValueError:
+            raise CommandError('Month must be given as YYYY-MM')
+
+        if options['company']:
+            company = Company.objects.get(pk=options['company'])
+        else:
+            company = Company.objects.first()
+        if not company:
+            raise CommandError('No company found.')
+
+        if options['reopen']:
+            count = reopen_period(company, period)
+            self.stdout.write(self.style.SUCCESS(f'Reopened {count} closed period(s).'))
+            return
+
+        try:
+            closed = close_period(company, period)
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+        self.stdout.write(self.style.SUCCESS(
+            f'Closed books through {closed.period_end} ({closed.balances.count()} account balances).'
+        ))
@@ -0,0 +1,39 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting.reconciliation import WINDOW_DAYS, import_statement, match_account
+from customer.models import FinancialAccount
+
+
+class Command(BaseCommand):
+    help = 'Import a bank/card statement (CSV or OFX) and reconcile it against the general ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', help='Statement file (.csv, .ofx, .qfx)')
+        parser.add_argument('--account', type=int, required=True, help='FinancialAccount id')
+        parser.add_argument('--window', type=int, default=WINDOW_DAYS, help='Date window in days for matching')
+        parser.add_argument('--match-only', action='store_true', help='Only re-run matching for unmatched lines')
+
+    def handle(self, *args, **options):
+        try:
+            account = FinancialAccount.objects.select_related('ledger_account').get(pk=options['account'])
+        except FinancialAccount.DoesNotExist:
+            raise CommandError(f"Financial account {options['account']} does not exist")
+
+        try:
+            if options['match_only']:
+                result = match_account(account, window_days=options['window'])
+            else:
+                if not options['file']:
+                    raise CommandError('A statement file is required unless --match-only is given')
+                with open(options['file'], 'rb') as stream:
+                    statement, result = import_statement(
+                        account, stream, file_name=options['file'], window_days=options['window']
+                    )
+                self.stdout.write(f'Imported {statement.line_count} new line(s) from {options["file"]}.')
+        except (OSError, ValidationError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {result['matched']} line(s); {result['unmatched']} still unmatched."
+        ))
@@ -0,0 +1,50 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting.expense_import import import_expenses
+from customer.models import FinancialAccount, Organization as Company
+
+
+class Command(BaseCommand):
+    help = 'Import expenses from a CSV (or a ZIP with receipts) and post them to the general ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Expense file (.csv or .zip)')
+        parser.add_argument('--company', type=int, help='Company id (defaults to the first company)')
+        parser.add_argument('--account', type=int, help='FinancialAccount id the expenses were paid with')
+        parser.add_argument('--category', default='other', help='Category for rows without one')
+        parser.add_argument('--no-post', action='store_true', help='Create the expenses without posting them')
+
+    def handle(self, *args, **options):
+        if options['company']:
+            company = Company.objects.get(pk=options['company'])
+        else:
+            company = Company.objects.first()
+        if not company:
+            raise CommandError('No company found.')
+
+        account = None
+        if options['account']:
+            try:
+                account = FinancialAccount.objects.get(pk=options['account'], organization=company)
+            except FinancialAccount.DoesNotExist:
+                raise CommandError(f"Financial account {options['account']} does not exist")
+
+        try:
+            with open(options['file'], 'rb') as stream:
+                result = import_expenses(
+                    company,
+                    stream,
+                    file_name=options['file'],
+                    financial_account=account,
+                    default_category=options['category'],
+                    post=not options['no_post'],
+                )
+        except (OSError, ValidationError) as e:
+            raise CommandError('\n'.join(getattr(e, 'messages', [str(e)])))
+
+        for expense, reason in result['failed']:
+            self.stderr.write(f'{expense.expense_number}: {reason}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} expense(s), posted {result['posted']}."
+        ))
@@ -0,0 +1,63 @@
+import csv
+from dataclasses import astuple, fields
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting.payment_import import UnmatchedRow, import_payments
+from customer.models import FinancialAccount, Organization as Company
+
+
+class Command(BaseCommand):
+    help = ('Import customer payments from a bank remittance (lockbox) CSV, match them to open '
+            'invoices and post them to the general ledger')
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Remittance file (.csv)')
+        parser.add_argument('--company', type=int, help='Company id (defaults to the first company)')
+        parser.add_argument('--account', type=int, help='FinancialAccount id the payments were deposited to')
+        parser.add_argument('--method', default='check', help='Payment method for rows without one')
+        parser.add_argument('--no-post', action='store_true', help='Create the payments without posting them')
+        parser.add_argument('--unmatched', help='Write the rows that were not imported to this CSV file')
+
+    def handle(self, *args, **options):
+        if options['company']:
+            company = Company.objects.get(pk=options['company'])
+        else:
+            company = Company.objects.first()
+        if not company:
+            raise CommandError('No company found.')
+
+        account = None
+        if options['account']:
+            try:
+                account = FinancialAccount.objects.get(pk=options['account'], organization=company)
+            except FinancialAccount.DoesNotExist:
+                raise CommandError(f"Financial account {options['account']} does not exist")
+
+        try:
+            with open(options['file'], 'rb') as stream:
+                result = import_payments(
+                    company,
+                    stream,
+                    financial_account=account,
+                    default_method=options['method'],
+                    post=not options['no_post'],
+                )
+        except (OSError, ValidationError) as e:
+            raise CommandError('\n'.join(getattr(e, 'messages', [str(e)])))
+
+        for payment, reason in result['failed']:
+            self.stderr.write(f'{payment.payment_number}: {reason}')
+        if options['unmatched']:
+            with open(options['unmatched'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow([field.name for field in fields(UnmatchedRow)])
+                writer.writerows(astuple(row) for row in result['unmatched'])
+        else:
+            for row in result['unmatched']:
+                self.stderr.write(f'Line {row.line}: {row.reason}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} payment(s) totalling {result['amount']:,.2f}, "
+            f"posted {result['posted']}, {len(result['unmatched'])} row(s) to review."
+        ))
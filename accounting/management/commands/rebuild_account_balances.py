@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounting.balances import rebuild_account_balances
+from customer.models import Organization as Company
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-account balance table from posted journal lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Only rebuild balances for this company id')
+
+    def handle(self, *args, **options):
+        company = None
+        if options['company']:
+            company = Company.objects.get(pk=options['company'])
+
+        count = rebuild_account_balances(company)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} account balance row(s).'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounting.rollups import rebuild_daily_balances
+from customer.models import Organization as Company
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily per-account activity rollup from posted journal lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Only rebuild the rollup for this company id')
+
+    def handle(self, *args, **options):
+        company = None
+        if options['company']:
+            company = Company.objects.get(pk=options['company'])
+
+        count = rebuild_daily_balances(company)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} daily balance row(s).'))
@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting.periods import month_end
+from accounting.services import ROLLBACK_DOC_TYPES, bulk_rollback_journal_entries, rollback_queryset
+from customer.models import Organization as Company
+
+
+class Command(BaseCommand):
+    help = ('Roll back posted journal entries in bulk and mark their source documents as unposted '
+            'so they can be posted again')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First entry date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last entry date (YYYY-MM-DD)')
+        parser.add_argument('--month', help='Shortcut for --from/--to covering one month (YYYY-MM)')
+        parser.add_argument('--doc-type', action='append', choices=sorted(ROLLBACK_DOC_TYPES),
+                            help='Only entries posted from this document type (repeatable)')
+        parser.add_argument('--source-id', action='append', type=int,
+                            help='Only entries of this source document id (repeatable, needs --doc-type)')
+        parser.add_argument('--include-manual', action='store_true',
+                            help='Also delete entries without a source document')
+        parser.add_argument('--company', type=int, help='Company id (defaults to the first company)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Entries deleted per statement')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the matching entries')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = options['date_from'] and date.fromisoformat(options['date_from'])
+            date_to = options['date_to'] and date.fromisoformat(options['date_to'])
+            if options['month']:
+                year, month = (int(part) for part in options['month'].split('-'))
+                date_from = date(year, month, 1)
+                date_to = month_end(date_from)
+        except ValueError:
+            raise CommandError('Dates must be given as YYYY-MM-DD and months as YYYY-MM')
+        if options['source_id'] and not options['doc_type']:
+            raise CommandError('--source-id needs --doc-type')
+        if not (date_from or date_to or options['source_id']):
+            raise CommandError('Give a date range (--from/--to or --month) or --source-id')
+
+        if options['company']:
+            company = Company.objects.filter(pk=options['company']).first()
+        else:
+            company = Company.objects.first()
+        if not company:
+            raise CommandError('No company found.')
+
+        entries = rollback_queryset(
+            company,
+            date_from=date_from,
+            date_to=date_to,
+            doc_types=options['doc_type'],
+            source_ids=options['source_id'],
+            include_manual=options['include_manual'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{entries.count()} journal entries would be rolled back.')
+            return
+
+        try:
+            result = bulk_rollback_journal_entries(entries, options['chunk_size'])
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+        for label, count in sorted(result['documents'].items()):
+            self.stdout.write(f'  {label}: {count} marked as unposted')
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled back {result['entries']} journal entries ({result['lines']} lines)."
+        ))
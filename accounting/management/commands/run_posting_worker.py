@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounting.posting_queue import process_batch, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Post queued documents (PostingJob) to the general ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Jobs claimed per batch')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        self.stdout.write(f'Posting worker {worker} started.')
+        try:
+            while True:
+                counts = process_batch(options['batch_size'], worker)
+                if counts['claimed']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Posted {counts['done']}, retrying {counts['retried']}, failed {counts['failed']}."
+                    ))
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Posting worker stopped.')
@@ -0,0 +1,46 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting.integrity import CHUNK_SIZE, verify
+
+
+class Command(BaseCommand):
+    help = 'Check that journal entries balance and that posted documents match their entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only check entries created (and documents posted) since the last run')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (1 runs in this process)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Journal entry ids per task')
+        parser.add_argument('--show', type=int, default=20, help='Problems to print')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be positive.')
+
+        check = verify(
+            incremental=options['incremental'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+        )
+        kind = 'Incremental' if check.incremental else 'Full'
+        self.stdout.write(
+            f'{kind} check #{check.pk}: {check.entries_checked} entries '
+            f'(ids {check.first_entry_id or "-"}..{check.last_entry_id or "-"}).'
+        )
+        for issue in check.issues[:options['show']]:
+            target = ', '.join(
+                f'{key} {issue[key]}' for key in ('entry', 'line', 'document') if key in issue
+            )
+            self.stdout.write(f"  {issue['check']}: {target}: {issue['detail']}")
+
+        if not check.problem_count:
+            self.stdout.write(self.style.SUCCESS('Ledger is consistent.'))
+            return
+        raise CommandError(
+            f'{check.unbalanced} unbalanced entries, {check.orphaned_lines} orphaned lines, '
+            f'{check.stale_lines} stale lines, {check.flag_mismatches} flag mismatches.'
+        )
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:40
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_balances(apps, schema_editor):
+    AccountBalance = apps.get_model('accounting', 'AccountBalance')
+    JournalLine = apps.get_model('accounting', 'JournalLine')
+    rows = (
+        JournalLine.objects.filter(entry__posted=True)
+        .values('entry__company_id', 'account_id')
+        .annotate(debit_sum=Sum('debit'), credit_sum=Sum('credit'))
+        .order_by()
+    )
+    AccountBalance.objects.bulk_create(
+        [
+            AccountBalance(
+                company_id=row['entry__company_id'],
+                account_id=row['account_id'],
+                debit=row['debit_sum'] or Decimal('0.00'),
+                credit=row['credit_sum'] or Decimal('0.00'),
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0002_expense'),
+        ('customer', '0011_add_profile_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='accounting.ledgeraccount')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_balances', to='customer.organization')),
+            ],
+            options={
+                'verbose_name': 'Account balance (GL)',
+                'verbose_name_plural': 'Account balances (GL)',
+                'db_table': 'gl_account_balance',
+                'unique_together': {('company', 'account')},
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
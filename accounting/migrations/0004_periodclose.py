@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:44
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0003_accountbalance'),
+        ('customer', '0011_add_profile_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField()),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_closes', to='customer.organization')),
+            ],
+            options={
+                'verbose_name': 'Period close (GL)',
+                'verbose_name_plural': 'Period closes (GL)',
+                'db_table': 'gl_period_close',
+                'ordering': ['-period_end'],
+                'unique_together': {('company', 'period_end')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='accounting.ledgeraccount')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='accounting.periodclose')),
+            ],
+            options={
+                'db_table': 'gl_period_balance',
+                'unique_together': {('period', 'account')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0004_periodclose'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('customer', '0011_add_profile_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_object_id', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('available_at', models.DateTimeField()),
+                ('locked_by', models.CharField(blank=True, max_length=64)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posting_jobs', to='customer.organization')),
+                ('source_content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Posting job (GL)',
+                'verbose_name_plural': 'Posting jobs (GL)',
+                'db_table': 'gl_posting_job',
+                'ordering': ['available_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='gl_posting__status_bebb77_idx')],
+                'unique_together': {('source_content_type', 'source_object_id')},
+            },
+        ),
+    ]
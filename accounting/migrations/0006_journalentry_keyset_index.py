@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0005_postingjob'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('customer', '0011_add_profile_image'),
+        ('purchases', '0005_supplierpayment'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='journalentry',
+            name='accounting__company_7e9397_idx',
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['company', 'date', 'id'], name='accounting__company_0d58eb_idx'),
+        ),
+    ]
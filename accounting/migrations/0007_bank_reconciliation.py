@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0006_journalentry_keyset_index'),
+        ('customer', '0011_add_profile_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bank_statements', to='customer.organization')),
+                ('financial_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bank_statements', to='customer.financialaccount')),
+                ('imported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Bank statement (GL)',
+                'verbose_name_plural': 'Bank statements (GL)',
+                'db_table': 'gl_bank_statement',
+                'ordering': ['-imported_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankStatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('reference', models.CharField(blank=True, max_length=64)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('matched_at', models.DateTimeField(blank=True, null=True)),
+                ('financial_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bank_statement_lines', to='customer.financialaccount')),
+                ('matched_line', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_match', to='accounting.journalline')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='accounting.bankstatement')),
+            ],
+            options={
+                'db_table': 'gl_bank_statement_line',
+                'ordering': ['date', 'id'],
+                'indexes': [models.Index(fields=['financial_account', 'date'], name='gl_bank_sta_financi_cb38eb_idx')],
+                'unique_together': {('financial_account', 'fingerprint')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_sources(apps, schema_editor):
+    JournalEntry = apps.get_model('accounting', 'JournalEntry')
+    duplicates = list(
+        JournalEntry.objects.filter(source_content_type__isnull=False, source_object_id__isnull=False)
+        .values('source_content_type_id', 'source_object_id')
+        .annotate(entries=Count('id'))
+        .filter(entries__gt=1)
+        .order_by()[:20]
+    )
+    if duplicates:
+        listed = ', '.join(
+            f"content_type={row['source_content_type_id']} object={row['source_object_id']}"
+            for row in duplicates
+        )
+        raise RuntimeError(
+            'Documents posted more than once must be rolled back to a single journal entry '
+            f'before adding je_unique_source: {listed}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0007_bank_reconciliation'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('customer', '0011_add_profile_image'),
+        ('purchases', '0006_aging_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_sources, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='journalentry',
+            name='accounting__source__1c8e9a_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='journalentry',
+            constraint=models.UniqueConstraint(fields=('source_content_type', 'source_object_id'), name='je_unique_source'),
+        ),
+    ]
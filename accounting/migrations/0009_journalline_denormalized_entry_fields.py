@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_entry_fields(apps, schema_editor):
+    JournalEntry = apps.get_model('accounting', 'JournalEntry')
+    JournalLine = apps.get_model('accounting', 'JournalLine')
+    entry = JournalEntry.objects.filter(pk=OuterRef('entry_id'))
+    JournalLine.objects.update(
+        company_id=Subquery(entry.values('company_id')[:1]),
+        date=Subquery(entry.values('date')[:1]),
+        posted=Subquery(entry.values('posted')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0008_journalentry_unique_source'),
+        ('customer', '0011_add_profile_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='journalline',
+            name='company',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='customer.organization'),
+        ),
+        migrations.AddField(
+            model_name='journalline',
+            name='date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='journalline',
+            name='posted',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.RunPython(backfill_entry_fields, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='journalline',
+            name='company',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='customer.organization'),
+        ),
+        migrations.AlterField(
+            model_name='journalline',
+            name='date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='journalline',
+            index=models.Index(fields=['company', 'account', 'date', 'posted', 'debit', 'credit'], name='accounting__company_f4625a_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:19
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_daily_balances(apps, schema_editor):
+    DailyBalance = apps.get_model('accounting', 'DailyBalance')
+    JournalLine = apps.get_model('accounting', 'JournalLine')
+    rows = (
+        JournalLine.objects.filter(posted=True)
+        .values('company_id', 'account_id', 'date')
+        .annotate(debit_sum=Sum('debit'), credit_sum=Sum('credit'))
+        .order_by()
+    )
+    DailyBalance.objects.bulk_create(
+        (
+            DailyBalance(
+                company_id=row['company_id'],
+                account_id=row['account_id'],
+                day=row['date'],
+                debit=row['debit_sum'] or Decimal('0.00'),
+                credit=row['credit_sum'] or Decimal('0.00'),
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0009_journalline_denormalized_entry_fields'),
+        ('customer', '0011_add_profile_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_balances', to='accounting.ledgeraccount')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_balances', to='customer.organization')),
+            ],
+            options={
+                'verbose_name': 'Daily balance (GL)',
+                'verbose_name_plural': 'Daily balances (GL)',
+                'db_table': 'gl_daily_balance',
+                'indexes': [models.Index(fields=['company', 'day'], name='gl_daily_ba_company_384f3a_idx')],
+                'unique_together': {('company', 'account', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0010_dailybalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('incremental', models.BooleanField(default=False)),
+                ('first_entry_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('last_entry_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('entries_checked', models.PositiveIntegerField(default=0)),
+                ('unbalanced', models.PositiveIntegerField(default=0)),
+                ('orphaned_lines', models.PositiveIntegerField(default=0)),
+                ('stale_lines', models.PositiveIntegerField(default=0)),
+                ('flag_mismatches', models.PositiveIntegerField(default=0)),
+                ('issues', models.JSONField(blank=True, default=list)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Ledger check (GL)',
+                'verbose_name_plural': 'Ledger checks (GL)',
+                'db_table': 'gl_ledger_check',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -6,6 +6,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.conf import settings
 from decimal import Decimal
+from dogfoot.sequences import last_number, next_value
 from sales.models import Invoice, InvoiceItem, Payment
 from customer.models import Customer, Organization as Company
 from purchases.models import Supplier
@@ -83,21 +84,32 @@ class JournalEntry(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=["company", "date"]),
+            models.Index(fields=["company", "date", "id"]),  # 원장 키셋 페이지네이션
             models.Index(fields=["customer"]),
             models.Index(fields=["supplier"]),
-            models.Index(fields=["source_content_type", "source_object_id"]),
         ]
         constraints = [
             models.CheckConstraint(
                 name="je_only_one_party",
                 check=~(Q(customer__isnull=False) & Q(supplier__isnull=False)),
             ),
+            # 원천 문서당 전표 1개(수동 전표는 source 가 NULL 이라 제약 밖)
+            models.UniqueConstraint(
+                fields=["source_content_type", "source_object_id"],
+                name="je_unique_source",
+            ),
         ]
 
     def __str__(self):
         return f"JE#{self.pk} {self.date} {self.memo or ''}".strip()
 
+    def delete(self, *args, **kwargs):
+        # 마감 검사는 전표에서 한 번만: 함께 지워지는 분개행의 post_delete 는 건너뜀
+        from accounting.periods import checked_period
+
+        with checked_period(self.company_id, self.date):
+            return super().delete(*args, **kwargs)
+
     def clean(self):
         debit = sum((line.debit or Decimal("0")) for line in self.lines.all())
         credit = sum((line.credit or Decimal("0")) for line in self.lines.all())
@@ -107,6 +119,15 @@ class JournalEntry(models.Model):
             )
 
 
+class JournalLineQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() 를 거치지 않으므로 전표 값 복사를 여기서 합니다.
+        objs = list(objs)
+        for line in objs:
+            line.copy_entry_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class JournalLine(models.Model):
     """전표의 분개행(차변 또는 대변 한쪽 금액만)."""
 
@@ -132,8 +153,37 @@ class JournalLine(models.Model):
     )
     description = models.CharField(max_length=255, blank=True)
 
+    # 전표(entry)에서 복사한 값: 기간 집계가 전표와 조인하지 않고
+    # (company, account, date) 인덱스만으로 범위를 찾도록 합니다.
+    # save()/bulk_create() 와 전표 저장 시그널(accounting.signals)이 맞춰 둡니다.
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, related_name="+", editable=False, db_index=False
+    )
+    date = models.DateField(editable=False)
+    posted = models.BooleanField(default=True, editable=False)
+
+    objects = JournalLineQuerySet.as_manager()
+
     class Meta:
-        indexes = [models.Index(fields=["account"]), models.Index(fields=["entry"])]
+        indexes = [
+            models.Index(fields=["account"]),
+            models.Index(fields=["entry"]),
+            # 기간 집계: (company, account, date) 범위 뒤에 합계에 쓰는 열까지 키로 두어
+            # 테이블을 읽지 않고 인덱스만으로 계산합니다(INCLUDE 를 모르는 SQLite 포함).
+            models.Index(fields=["company", "account", "date", "posted", "debit", "credit"]),
+        ]
+
+    def copy_entry_fields(self):
+        self.company_id = self.entry.company_id
+        self.date = self.entry.date
+        self.posted = self.entry.posted
+
+    def save(self, *args, **kwargs):
+        self.copy_entry_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "company", "date", "posted"}
+        super().save(*args, **kwargs)
 
     def clean(self):
         is_debit = self.debit and self.debit > 0
@@ -144,6 +194,271 @@ class JournalLine(models.Model):
             raise ValidationError("debit 또는 credit 중 하나는 양수여야 합니다.")
 
 
+class AccountBalance(models.Model):
+    """
+    계정별 누적 잔액(posted 전표 기준).
+    JournalLine 생성/수정/삭제와 같은 트랜잭션에서 accounting.balances 가 갱신합니다.
+    """
+
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, related_name="account_balances"
+    )
+    account = models.ForeignKey(
+        LedgerAccount, on_delete=models.CASCADE, related_name="balances"
+    )
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(
+        max_digits=16, decimal_places=2, default=Decimal("0.00")
+    )
+
+    class Meta:
+        db_table = "gl_account_balance"
+        verbose_name = "Account balance (GL)"
+        verbose_name_plural = "Account balances (GL)"
+        unique_together = ("company", "account")
+
+    def __str__(self):
+        return f"{self.account} Dr {self.debit} / Cr {self.credit}"
+
+
+class DailyBalance(models.Model):
+    """
+    계정별 일자별 차변/대변 발생액(posted 전표 기준).
+    AccountBalance 와 같은 시점에 accounting.rollups 가 갱신하며, 대시보드와
+    월별 추이·현금흐름표가 분개행 대신 이 표를 읽습니다.
+    """
+
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, related_name="daily_balances"
+    )
+    account = models.ForeignKey(
+        LedgerAccount, on_delete=models.CASCADE, related_name="daily_balances"
+    )
+    day = models.DateField()
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(
+        max_digits=16, decimal_places=2, default=Decimal("0.00")
+    )
+
+    class Meta:
+        db_table = "gl_daily_balance"
+        verbose_name = "Daily balance (GL)"
+        verbose_name_plural = "Daily balances (GL)"
+        unique_together = ("company", "account", "day")
+        indexes = [models.Index(fields=["company", "day"])]
+
+    def __str__(self):
+        return f"{self.account} {self.day} Dr {self.debit} / Cr {self.credit}"
+
+
+class PeriodClose(models.Model):
+    """
+    월 마감 기록. 마감일(period_end)까지의 계정별 누적 잔액을 PeriodBalance 로 보관하며,
+    마감일 이하 날짜의 전표는 수정/삭제할 수 없습니다(accounting.periods).
+    """
+
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, related_name="period_closes"
+    )
+    period_end = models.DateField()  # 마감월 말일
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    class Meta:
+        db_table = "gl_period_close"
+        verbose_name = "Period close (GL)"
+        verbose_name_plural = "Period closes (GL)"
+        unique_together = ("company", "period_end")
+        ordering = ["-period_end"]
+
+    def __str__(self):
+        return f"{self.company} closed through {self.period_end}"
+
+
+class PeriodBalance(models.Model):
+    """마감 시점의 계정별 누적 차변/대변 합계(posted 전표 기준)."""
+
+    period = models.ForeignKey(
+        PeriodClose, on_delete=models.CASCADE, related_name="balances"
+    )
+    account = models.ForeignKey(
+        LedgerAccount, on_delete=models.CASCADE, related_name="period_balances"
+    )
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(
+        max_digits=16, decimal_places=2, default=Decimal("0.00")
+    )
+
+    class Meta:
+        db_table = "gl_period_balance"
+        unique_together = ("period", "account")
+
+
+# -----------------------------
+# 전기 대기열(Posting queue)
+# -----------------------------
+class PostingJob(models.Model):
+    """
+    승인된 원문서의 전기 요청. 승인 트랜잭션 안에서 만들어지고
+    run_posting_worker 명령이 배치로 처리합니다(accounting.posting_queue).
+    원문서당 한 행이며, 다시 요청하면 같은 행이 대기 상태로 돌아갑니다.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, related_name="posting_jobs"
+    )
+    source_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    source_object_id = models.PositiveIntegerField()
+    source = GenericForeignKey("source_content_type", "source_object_id")
+
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField()  # 이 시각 이후에 처리(재시도 지연)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "gl_posting_job"
+        verbose_name = "Posting job (GL)"
+        verbose_name_plural = "Posting jobs (GL)"
+        unique_together = ("source_content_type", "source_object_id")
+        indexes = [models.Index(fields=["status", "available_at"])]
+        ordering = ["available_at", "id"]
+
+    def __str__(self):
+        return f"{self.source_content_type.model}#{self.source_object_id} [{self.status}]"
+
+
+# -----------------------------
+# 은행 거래내역 대사(Bank reconciliation)
+# -----------------------------
+class BankStatement(models.Model):
+    """가져온 은행/카드 거래내역 파일 한 건(accounting.reconciliation)."""
+
+    company = models.ForeignKey(
+        Company, on_delete=models.CASCADE, related_name="bank_statements"
+    )
+    financial_account = models.ForeignKey(
+        "customer.FinancialAccount",
+        on_delete=models.CASCADE,
+        related_name="bank_statements",
+    )
+    file_name = models.CharField(max_length=255, blank=True)
+    imported_at = models.DateTimeField(auto_now_add=True)
+    imported_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    line_count = models.PositiveIntegerField(default=0)  # 새로 추가된 행 수(중복 제외)
+
+    class Meta:
+        db_table = "gl_bank_statement"
+        verbose_name = "Bank statement (GL)"
+        verbose_name_plural = "Bank statements (GL)"
+        ordering = ["-imported_at"]
+
+    def __str__(self):
+        return f"{self.financial_account} {self.file_name or f'{self.imported_at:%Y-%m-%d}'}"
+
+
+class BankStatementLine(models.Model):
+    """
+    거래내역 한 줄. amount 는 계좌 기준 부호(입금 +, 출금 -)이며 원장 쪽의
+    debit - credit 과 비교합니다. fingerprint 로 같은 줄을 다시 가져오지 않습니다.
+    """
+
+    statement = models.ForeignKey(
+        BankStatement, on_delete=models.CASCADE, related_name="lines"
+    )
+    financial_account = models.ForeignKey(
+        "customer.FinancialAccount",
+        on_delete=models.CASCADE,
+        related_name="bank_statement_lines",
+    )
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    description = models.CharField(max_length=255, blank=True)
+    reference = models.CharField(max_length=64, blank=True)  # 수표번호, FITID 등
+    fingerprint = models.CharField(max_length=64)
+
+    matched_line = models.OneToOneField(
+        JournalLine,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="bank_match",
+    )
+    matched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "gl_bank_statement_line"
+        unique_together = ("financial_account", "fingerprint")
+        indexes = [models.Index(fields=["financial_account", "date"])]
+        ordering = ["date", "id"]
+
+    def __str__(self):
+        return f"{self.date} {self.amount} {self.description}".strip()
+
+
+# -----------------------------
+# 원장 무결성 검사(Ledger verification)
+# -----------------------------
+class LedgerCheck(models.Model):
+    """
+    verify_ledger 실행 기록(accounting.integrity).
+    증분 검사는 마지막으로 끝난 실행의 last_entry_id 다음 전표부터 봅니다.
+    issues 에는 문제 목록 앞부분(ISSUE_LIMIT 건)만 보관합니다.
+    """
+
+    incremental = models.BooleanField(default=False)
+    first_entry_id = models.PositiveIntegerField(null=True, blank=True)
+    last_entry_id = models.PositiveIntegerField(null=True, blank=True)
+    entries_checked = models.PositiveIntegerField(default=0)
+
+    unbalanced = models.PositiveIntegerField(default=0)
+    orphaned_lines = models.PositiveIntegerField(default=0)
+    stale_lines = models.PositiveIntegerField(default=0)  # 전표와 다른 복사 값/타사 계정
+    flag_mismatches = models.PositiveIntegerField(default=0)
+    issues = models.JSONField(default=list, blank=True)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "gl_ledger_check"
+        verbose_name = "Ledger check (GL)"
+        verbose_name_plural = "Ledger checks (GL)"
+        ordering = ["-started_at"]
+
+    @property
+    def problem_count(self):
+        return self.unbalanced + self.orphaned_lines + self.stale_lines + self.flag_mismatches
+
+    def __str__(self):
+        kind = "incremental" if self.incremental else "full"
+        return f"Ledger check #{self.pk} ({kind}) {self.problem_count} problem(s)"
+
+
 # -----------------------------
 # 전기 규칙(문서 유형별 계정 매핑)
 # -----------------------------
@@ -348,18 +663,11 @@ class Expense(models.Model):
             # Format: EXP-YYYYMMDD-XXXXX
             date_str = now.strftime('%Y%m%d')
             
-            # Get the last expense for today
-            last_expense = Expense.objects.filter(
-                expense_number__startswith=f'EXP-{date_str}-'
-            ).order_by('expense_number').last()
-            
-            if last_expense:
-                # Extract the sequence number and increment
-                last_num = int(last_expense.expense_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
+            new_num = next_value(
+                'EXP',
+                date_str,
+                seed=lambda: last_number(Expense.objects, 'expense_number', f'EXP-{date_str}-'),
+            )
             self.expense_number = f'EXP-{date_str}-{new_num:05d}'
         
         # Calculate total if not set
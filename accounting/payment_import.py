@@ -0,0 +1,363 @@
+# accounting/payment_import.py
+"""
+고객 입금 일괄 가져오기(은행 lockbox/송금 내역 CSV).
+
+- CSV 를 한 줄씩 읽고, 파일마다 한 번 만든 메모리 색인으로 미결 Invoice 를 찾습니다.
+  1) 송장 번호(고객 열이 있으면 같은 고객이어야 함), 2) 고객 + 남은 잔액과 같은 금액 순.
+  같은 파일 안의 여러 입금이 한 송장을 나눠 갚을 수 있도록 남은 잔액을 메모리에서 줄여 갑니다.
+- 찾지 못했거나 잘못된 줄은 건너뛰고 사유와 함께 돌려줍니다(검토용). 나머지는 가져옵니다.
+- Payment 는 청크 단위로 bulk_create 하고 번호(PAY-YYYYMMDD-NNNN)는 Payment.save() 와 같은
+  시퀀스에서 묶음 단위로 받습니다.
+- 입금은 pending 으로 만들고 post=True 면 services.bulk_post_incoming_payments 로 청크마다
+  전기합니다. 전기되면 completed 가 되고 송장 입금액은 청크마다 집계 한 번으로 재계산됩니다.
+  post=False 면 '문서 전기' 화면에서 나중에 전기할 수 있습니다.
+"""
+import csv
+import io
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from accounting.reconciliation import _normalise_reference, _parse_amount, _parse_date
+from accounting.services import _chunked, bulk_post_incoming_payments
+from customer.models import Customer
+from dogfoot.sequences import SequenceBlock, last_number
+from sales.models import Invoice, Payment
+from sales.sweep import LIVE_STATUSES
+
+CHUNK_SIZE = 1000
+
+CSV_COLUMNS = {
+    "date": ("date", "payment date", "deposit date", "check date", "value date"),
+    "amount": ("amount", "payment amount", "paid amount", "remittance amount", "check amount"),
+    "invoice": ("invoice", "invoice number", "invoice no", "invoice #", "inv", "document number"),
+    "customer": ("customer", "customer name", "payer", "payer name", "remitter", "email"),
+    "reference": ("reference", "reference number", "check number", "check no", "check #", "transaction id", "ref"),
+    "method": ("method", "payment method", "type"),
+    "bank": ("bank", "bank name", "payer bank"),
+    "notes": ("notes", "memo", "note"),
+}
+
+# 결제수단 값(bank_transfer) 또는 표시 이름(Bank Transfer), 은행 파일에 흔한 약어를 받습니다.
+METHOD_ALIASES = {
+    **{value: value for value, _ in Payment.PAYMENT_METHOD_CHOICES},
+    **{label.lower(): value for value, label in Payment.PAYMENT_METHOD_CHOICES},
+    "ach": "bank_transfer",
+    "wire": "bank_transfer",
+    "eft": "bank_transfer",
+    "chk": "check",
+}
+
+# 이미 기록된 입금과 겹치는지 볼 때 제외하는 상태
+DEAD_STATUSES = ["failed", "cancelled", "refunded"]
+
+
+@dataclass
+class PaymentRow:
+    line: int
+    date: date
+    amount: Decimal
+    invoice_number: str = ""
+    customer: str = ""
+    reference_number: str = ""
+    payment_method: str = ""
+    bank_name: str = ""
+    notes: str = ""
+
+
+@dataclass
+class UnmatchedRow:
+    """검토가 필요한 줄. 값은 파일에 적힌 그대로입니다."""
+
+    line: int
+    reason: str
+    date: str = ""
+    amount: str = ""
+    invoice_number: str = ""
+    customer: str = ""
+    reference_number: str = ""
+
+    @classmethod
+    def from_row(cls, row, reason):
+        return cls(
+            line=row.line,
+            reason=reason,
+            date=row.date.isoformat(),
+            amount=str(row.amount),
+            invoice_number=row.invoice_number,
+            customer=row.customer,
+            reference_number=row.reference_number,
+        )
+
+
+# -----------------------------
+# 파싱
+# -----------------------------
+def parse_csv(stream, default_method="check"):
+    """
+    헤더가 있는 CSV 를 PaymentRow 로 읽습니다. 잘못된 줄은 UnmatchedRow 로 돌려줍니다.
+    송장 번호나 고객 중 하나는 있어야 송장을 찾을 수 있습니다.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = [column.strip().lower() for column in next(reader, [])]
+    columns = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                columns[key] = header.index(alias)
+                break
+    if not {"date", "amount"} <= columns.keys() or not {"invoice", "customer"} & columns.keys():
+        raise ValidationError("CSV needs date, amount and invoice (or customer) columns.")
+
+    def cell(row, key):
+        index = columns.get(key)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    for number, row in enumerate(reader, start=2):
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            amount = _parse_amount(cell(row, "amount")) or Decimal("0")
+            if amount <= 0:
+                raise ValueError("amount must be greater than zero")
+            method = cell(row, "method").lower() or default_method
+            if method not in METHOD_ALIASES:
+                raise ValueError(f"unknown payment method {cell(row, 'method')!r}")
+            yield PaymentRow(
+                line=number,
+                date=_parse_date(cell(row, "date")),
+                amount=amount.quantize(Decimal("0.01")),
+                invoice_number=cell(row, "invoice"),
+                customer=cell(row, "customer"),
+                reference_number=cell(row, "reference")[:100],
+                payment_method=METHOD_ALIASES[method],
+                bank_name=cell(row, "bank")[:100],
+                notes=cell(row, "notes"),
+            )
+        except ValueError as e:
+            yield UnmatchedRow(
+                line=number,
+                reason=str(e),
+                date=cell(row, "date"),
+                amount=cell(row, "amount"),
+                invoice_number=cell(row, "invoice"),
+                customer=cell(row, "customer"),
+                reference_number=cell(row, "reference"),
+            )
+
+
+# -----------------------------
+# 송장 찾기
+# -----------------------------
+def _customer_key(value):
+    """대소문자, 공백, 문장부호를 무시한 고객 이름/이메일 비교 키."""
+    return re.sub(r"[^0-9a-z@]", "", (value or "").lower())
+
+
+class OpenInvoices:
+    """
+    미결 송장의 메모리 색인(파일마다 한 번 만듦). 남은 잔액은 balance_due 에서 아직 전기되지
+    않은(pending/processing) 입금을 뺀 금액입니다.
+    """
+
+    def __init__(self):
+        invoices = Invoice.objects.filter(status__in=LIVE_STATUSES, balance_due__gt=0)
+        unposted = dict(
+            Payment.objects.filter(
+                invoice__in=invoices, status__in=["pending", "processing"]
+            )
+            .order_by()
+            .values_list("invoice_id")
+            .annotate(total=Sum("amount"))
+        )
+        self.invoices = {}  # pk -> [송장 번호, 고객 id, 남은 잔액]
+        self.by_number = {}
+        self.by_amount = defaultdict(list)  # (고객 id, 남은 잔액) -> 만기 순 pk
+        for pk, number, customer_id, balance in (
+            invoices.order_by("due_date", "pk")
+            .values_list("pk", "invoice_number", "customer_id", "balance_due")
+            .iterator()
+        ):
+            remaining = balance - unposted.get(pk, 0)
+            if remaining <= 0:
+                continue
+            self.invoices[pk] = [number, customer_id, remaining]
+            self.by_number[_normalise_reference(number)] = pk
+            if customer_id:
+                self.by_amount[customer_id, remaining].append(pk)
+
+        self.customers = defaultdict(set)  # 비교 키 -> 고객 id
+        for pk, email, company_name, first_name, last_name in (
+            Customer.objects.filter(invoices__in=invoices)
+            .distinct()
+            .values_list("pk", "email", "company_name", "first_name", "last_name")
+            .iterator()
+        ):
+            for value in (email, company_name, f"{first_name} {last_name}"):
+                key = _customer_key(value)
+                if key:
+                    self.customers[key].add(pk)
+
+    def match(self, row):
+        """row 를 갚을 송장 pk. 찾지 못하면 사유와 함께 ValueError."""
+        customer_ids = self.customers.get(_customer_key(row.customer), set())
+        if row.invoice_number:
+            pk = self.by_number.get(_normalise_reference(row.invoice_number))
+            if pk is None:
+                raise ValueError(f"no open invoice {row.invoice_number}")
+            number, customer_id, remaining = self.invoices[pk]
+            # 이름이 다르게 적힌 고객은 알 수 없으니, 다른 고객으로 확인될 때만 거절
+            if customer_ids and customer_id not in customer_ids:
+                raise ValueError(f"invoice {number} belongs to a different customer")
+            if row.amount > remaining:
+                raise ValueError(f"amount {row.amount} exceeds the open balance {remaining} of invoice {number}")
+            return pk
+        if not row.customer:
+            raise ValueError("no invoice number or customer")
+        if not customer_ids:
+            raise ValueError(f"unknown customer {row.customer!r}")
+        candidates = [
+            pk
+            for customer_id in customer_ids
+            for pk in self.by_amount.get((customer_id, row.amount), [])[:1]
+        ]
+        if not candidates:
+            raise ValueError(f"no open invoice of {row.amount} for {row.customer}")
+        if len(candidates) > 1:
+            raise ValueError(f"several customers named {row.customer!r} have an open invoice of {row.amount}")
+        return candidates[0]
+
+    def apply(self, pk, amount):
+        """입금액만큼 남은 잔액을 줄이고 (고객, 잔액) 색인을 옮깁니다."""
+        entry = self.invoices[pk]
+        number, customer_id, remaining = entry
+        if customer_id:
+            self.by_amount[customer_id, remaining].remove(pk)
+        entry[2] = remaining = remaining - amount
+        if remaining <= 0:
+            del self.invoices[pk]
+            del self.by_number[_normalise_reference(number)]
+        elif customer_id:
+            # 만기 순서는 잃지만 같은 고객, 같은 잔액의 송장이 여럿인 경우는 드묾
+            self.by_amount[customer_id, remaining].append(pk)
+        return customer_id
+
+
+# -----------------------------
+# 가져오기
+# -----------------------------
+def _payment_numbers(block_size=CHUNK_SIZE):
+    """Payment.save() 와 같은 PAY 시퀀스에서 번호를 block_size 개씩 미리 받습니다."""
+    today = timezone.now().strftime("%Y%m%d")
+    prefix = f"PAY-{today}-"
+    numbers = SequenceBlock(
+        "PAY",
+        today,
+        block_size,
+        seed=lambda: last_number(Payment.objects, "payment_number", prefix),
+    )
+    for number in numbers:
+        yield f"{prefix}{number:04d}"
+
+
+def _recorded(rows):
+    """
+    rows 의 참조 번호로 이미 기록된 입금 {(참조 번호, 금액): {송장 pk}}.
+    같은 송금 파일을 두 번 올려도 입금이 두 번 생기지 않게 합니다.
+    """
+    references = {row.reference_number for row in rows if row.reference_number}
+    recorded = defaultdict(set)
+    if references:
+        for invoice_id, reference, amount in (
+            Payment.objects.filter(reference_number__in=references)
+            .exclude(status__in=DEAD_STATUSES)
+            .values_list("invoice_id", "reference_number", "amount")
+        ):
+            recorded[reference, amount].add(invoice_id)
+    return recorded
+
+
+def import_payments(
+    company,
+    stream,
+    user=None,
+    financial_account=None,
+    default_method="check",
+    post=True,
+    chunk_size=CHUNK_SIZE,
+):
+    """
+    송금 내역 CSV 를 가져옵니다. financial_account 는 입금된 계좌(전기 시 차변)입니다.
+    반환: {'created', 'amount', 'posted', 'failed': [(Payment, 사유), ...],
+           'unmatched': [UnmatchedRow, ...]}
+    """
+    unmatched = []
+    created_ids = []
+    total = Decimal("0.00")
+
+    with transaction.atomic():
+        invoices = OpenInvoices()
+        numbers = _payment_numbers(chunk_size)
+        rows = parse_csv(stream, default_method)
+        for chunk in _chunked(rows, chunk_size):
+            recorded = _recorded([row for row in chunk if isinstance(row, PaymentRow)])
+            payments = []
+            for row in chunk:
+                if isinstance(row, UnmatchedRow):
+                    unmatched.append(row)
+                    continue
+                try:
+                    invoice_id = invoices.match(row)
+                except ValueError as e:
+                    unmatched.append(UnmatchedRow.from_row(row, str(e)))
+                    continue
+                if row.reference_number:
+                    seen = recorded[row.reference_number, row.amount]
+                    if invoice_id in seen:
+                        unmatched.append(UnmatchedRow.from_row(row, "payment already recorded"))
+                        continue
+                    seen.add(invoice_id)
+                customer_id = invoices.apply(invoice_id, row.amount)
+                payments.append(Payment(
+                    payment_number=next(numbers),
+                    customer_id=customer_id,
+                    invoice_id=invoice_id,
+                    amount=row.amount,
+                    payment_date=row.date,
+                    payment_method=row.payment_method,
+                    status="pending",
+                    reference_number=row.reference_number,
+                    bank_name=row.bank_name,
+                    financial_account=financial_account,
+                    notes=row.notes,
+                    processed_by=user,
+                ))
+                total += row.amount
+            # pending 입금은 송장 입금액에 들어가지 않으므로 여기서는 재계산할 것이 없음
+            created_ids += [payment.pk for payment in Payment.objects.bulk_create(payments)]
+
+        if not created_ids and not unmatched:
+            raise ValidationError("The file does not contain any payments.")
+
+    result = {
+        "created": len(created_ids),
+        "amount": total,
+        "posted": 0,
+        "failed": [],
+        "unmatched": unmatched,
+    }
+    if post:
+        # 가져오기는 이미 커밋됨. 전기 실패(마감 기간 등)는 pending 으로 남아 나중에 전기 가능
+        for ids in _chunked(created_ids, chunk_size):
+            posted = bulk_post_incoming_payments(Payment.objects.filter(pk__in=ids), company, chunk_size)
+            result["posted"] += posted["posted"]
+            result["failed"] += posted["failed"]
+    return result
@@ -0,0 +1,131 @@
+# accounting/periods.py
+"""
+월 마감(Period close).
+
+close_period() 는 직전 마감 스냅샷 + 그 이후 분개행만 집계해 새 스냅샷을 만들므로
+마감 비용은 해당 월의 거래량에만 비례합니다. 마감일(또는 Organization.lock_until)
+이하 날짜의 전표는 check_period_open() 으로 수정/삭제가 막히며, 고쳐야 할 때는
+reopen_period() 로 마감을 풀고 다시 마감합니다.
+
+전표 한 건에 분개행이 여럿이어도 마감 조회는 전표당 한 번입니다. 저장은 전표 인스턴스에
+검사 결과를 기억하고(accounting.signals), 삭제는 JournalEntry.delete() 가 checked_period()
+블록 안에서 분개행을 지웁니다.
+"""
+import calendar
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+
+from accounting.balances import ZERO
+from accounting.models import PeriodBalance, PeriodClose
+from accounting.reports import line_totals
+from customer.models import Organization as Company
+
+
+def month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def locked_through(company_id):
+    """수정이 금지된 마지막 날짜(마감일과 lock_until 중 늦은 날), 없으면 None."""
+    row = (
+        Company.objects.filter(pk=company_id)
+        .annotate(last_close=Max("period_closes__period_end"))
+        .values_list("lock_until", "last_close")
+        .first()
+    )
+    if not row:
+        return None
+    dates = [d for d in row if d]
+    return max(dates) if dates else None
+
+
+# checked_period() 블록 안에서 이미 검사한 (company_id, 날짜)
+_checked = ContextVar("accounting_checked_periods", default=frozenset())
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def check_period_open(company_id, entry_date):
+    """entry_date 가 마감된 기간에 속하면 ValidationError."""
+    if (company_id, _as_date(entry_date)) in _checked.get():
+        return
+    ensure_period_open(locked_through(company_id), entry_date)
+
+
+@contextmanager
+def checked_period(company_id, entry_date):
+    """한 번 검사하고, 블록 안의 같은 (회사, 날짜) 검사는 건너뜁니다(전표 삭제의 분개행 등)."""
+    check_period_open(company_id, entry_date)
+    token = _checked.set(_checked.get() | {(company_id, _as_date(entry_date))})
+    try:
+        yield
+    finally:
+        _checked.reset(token)
+
+
+def ensure_period_open(lock, entry_date):
+    """미리 구한 locked_through() 값으로 검사(대량 처리에서 회사당 한 번만 조회)."""
+    if lock is None or entry_date is None:
+        return
+    entry_date = _as_date(entry_date)
+    if entry_date <= lock:
+        raise ValidationError(
+            f"Books are closed through {lock}: entries dated {entry_date} cannot be changed."
+        )
+
+
+@transaction.atomic
+def close_period(company, period_end, user=None):
+    """period_end 가 속한 월까지 마감하고 계정별 누적 잔액 스냅샷을 저장합니다."""
+    period_end = month_end(period_end)
+    previous = (
+        PeriodClose.objects.select_for_update()
+        .filter(company=company)
+        .order_by("-period_end")
+        .first()
+    )
+    if previous and previous.period_end >= period_end:
+        raise ValidationError(f"Books are already closed through {previous.period_end}.")
+
+    totals = {}
+    open_from = None
+    if previous:
+        totals = {
+            account_id: (debit, credit)
+            for account_id, debit, credit in previous.balances.values_list(
+                "account_id", "debit", "credit"
+            )
+        }
+        open_from = previous.period_end + timedelta(days=1)
+
+    for account_id, (debit, credit) in line_totals(company, open_from, period_end).items():
+        d, c = totals.get(account_id, (ZERO, ZERO))
+        totals[account_id] = (d + debit, c + credit)
+
+    period = PeriodClose.objects.create(
+        company=company, period_end=period_end, closed_by=user
+    )
+    PeriodBalance.objects.bulk_create(
+        [
+            PeriodBalance(period=period, account_id=account_id, debit=debit, credit=credit)
+            for account_id, (debit, credit) in totals.items()
+        ],
+        batch_size=500,
+    )
+    return period
+
+
+@transaction.atomic
+def reopen_period(company, period_end):
+    """period_end 가 속한 월과 그 이후의 마감을 모두 해제합니다. 해제된 마감 수를 돌려줍니다."""
+    deleted = PeriodClose.objects.filter(
+        company=company, period_end__gte=month_end(period_end)
+    ).delete()[1].get(PeriodClose._meta.label, 0)
+    return deleted
@@ -0,0 +1,201 @@
+# accounting/posting_queue.py
+"""
+전기 대기열(Posting queue).
+
+승인 요청 안에서는 enqueue() 로 PostingJob 행만 만들고(승인과 같은 트랜잭션),
+실제 전기는 run_posting_worker 명령이 process_batch() 로 배치 처리합니다.
+
+- 선점(claim): 조건부 UPDATE 로 PENDING(또는 임대 시간이 지난 RUNNING) 행만 가져가므로
+  여러 워커가 같은 작업을 중복 처리하지 않습니다.
+- 배치: 같은 회사·문서 유형의 작업은 bulk_post_* 한 번으로 전기합니다.
+- 멱등성: 전기 함수가 source_content_type/source_object_id 로 기존 전표를 확인하므로
+  재시도나 중복 요청이 있어도 전표는 하나만 생깁니다.
+- 실패: 지수 백오프로 재시도하고 MAX_ATTEMPTS 회 이후에는 FAILED 로 남깁니다.
+"""
+import os
+import socket
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from accounting.models import PostingJob
+
+MAX_ATTEMPTS = 5
+LEASE_SECONDS = 300  # RUNNING 상태로 이 시간을 넘기면 워커가 죽은 것으로 보고 다시 가져감
+RETRY_BASE_SECONDS = 10
+
+
+def enqueue(document, company):
+    """document 의 전기를 요청합니다. 이미 있는 작업은 대기 상태로 되돌립니다."""
+    ct = ContentType.objects.get_for_model(type(document))
+    job, _ = PostingJob.objects.update_or_create(
+        source_content_type=ct,
+        source_object_id=document.pk,
+        defaults={
+            "company": company,
+            "status": PostingJob.Status.PENDING,
+            "attempts": 0,
+            "last_error": "",
+            "available_at": timezone.now(),
+            "locked_by": "",
+            "locked_at": None,
+        },
+    )
+    return job
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claimable(now):
+    return Q(status=PostingJob.Status.PENDING, available_at__lte=now) | Q(
+        status=PostingJob.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=LEASE_SECONDS),
+    )
+
+
+def claim(batch_size, worker):
+    """처리할 작업을 최대 batch_size 개 선점합니다."""
+    now = timezone.now()
+    ids = list(
+        PostingJob.objects.filter(_claimable(now))
+        .order_by("available_at", "id")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    PostingJob.objects.filter(_claimable(now), pk__in=ids).update(
+        status=PostingJob.Status.RUNNING,
+        locked_by=worker,
+        locked_at=now,
+        attempts=F("attempts") + 1,
+    )
+    return list(
+        PostingJob.objects.filter(
+            pk__in=ids, status=PostingJob.Status.RUNNING, locked_by=worker, locked_at=now
+        ).select_related("company", "source_content_type")
+    )
+
+
+# -----------------------------
+# 문서 유형별 전기 함수
+# -----------------------------
+# 각 함수는 (company, pks) 를 받아 {pk: 오류 메시지} 를 돌려줍니다(성공한 문서는 빠짐).
+
+
+def _post_invoices(company, pks):
+    from accounting.services import bulk_post_sales
+    from sales.models import Invoice
+
+    result = bulk_post_sales(Invoice.objects.filter(pk__in=pks), company)
+    return {doc.pk: msg for doc, msg in result["failed"]}
+
+
+def _post_incoming_payments(company, pks):
+    from accounting.services import bulk_post_incoming_payments
+    from sales.models import Payment
+
+    result = bulk_post_incoming_payments(Payment.objects.filter(pk__in=pks), company)
+    return {doc.pk: msg for doc, msg in result["failed"]}
+
+
+def _post_outgoing_payments(company, pks):
+    from accounting.services import post_outgoing_payment
+    from purchases.models import SupplierPayment
+
+    errors = {}
+    for payment in SupplierPayment.objects.filter(pk__in=pks).select_related(
+        "purchase_order", "supplier"
+    ):
+        try:
+            post_outgoing_payment(payment)
+        except ValidationError as e:
+            errors[payment.pk] = " ".join(e.messages)
+    return errors
+
+
+HANDLERS = {
+    "sales.invoice": _post_invoices,
+    "sales.payment": _post_incoming_payments,
+    "purchases.supplierpayment": _post_outgoing_payments,
+}
+
+
+def _finish(jobs, errors, now):
+    """성공한 작업은 DONE, 실패한 작업은 재시도 예약 또는 FAILED."""
+    done_ids = [job.pk for job in jobs if job.pk not in errors]
+    if done_ids:
+        PostingJob.objects.filter(pk__in=done_ids).update(
+            status=PostingJob.Status.DONE,
+            last_error="",
+            locked_by="",
+            locked_at=None,
+            processed_at=now,
+        )
+    counts = {"done": len(done_ids), "retried": 0, "failed": 0}
+    for job in jobs:
+        if job.pk not in errors:
+            continue
+        job.last_error = errors[job.pk]
+        job.locked_by = ""
+        job.locked_at = None
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = PostingJob.Status.FAILED
+            job.processed_at = now
+            counts["failed"] += 1
+        else:
+            job.status = PostingJob.Status.PENDING
+            job.available_at = now + timedelta(
+                seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            )
+            counts["retried"] += 1
+        job.save(
+            update_fields=[
+                "status", "last_error", "locked_by", "locked_at", "available_at", "processed_at"
+            ]
+        )
+    return counts
+
+
+def process_batch(batch_size=100, worker=None):
+    """
+    작업을 한 배치 선점해 전기합니다.
+    반환: {'claimed', 'done', 'retried', 'failed'}
+    """
+    jobs = claim(batch_size, worker or worker_name())
+    counts = {"claimed": len(jobs), "done": 0, "retried": 0, "failed": 0}
+
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[(job.company, job.source_content_type)].append(job)
+
+    for (company, ct), group in groups.items():
+        model = ct.model_class()
+        handler = HANDLERS.get(f"{ct.app_label}.{ct.model}")
+        job_by_doc = {job.source_object_id: job for job in group}
+        errors = {}
+        if handler is None or model is None:
+            errors = {pk: f"No posting handler for {ct.app_label}.{ct.model}" for pk in job_by_doc}
+        else:
+            existing = set(
+                model.objects.filter(pk__in=list(job_by_doc)).values_list("pk", flat=True)
+            )
+            errors = {pk: "Document no longer exists" for pk in job_by_doc if pk not in existing}
+            try:
+                errors.update(handler(company, sorted(existing)))
+            except Exception as e:  # DB 잠금 등 일시 오류: 그룹 전체를 재시도
+                errors.update({pk: f"{type(e).__name__}: {e}" for pk in existing})
+
+        with transaction.atomic():
+            result = _finish(
+                group, {job_by_doc[pk].pk: msg for pk, msg in errors.items()}, timezone.now()
+            )
+        for key in ("done", "retried", "failed"):
+            counts[key] += result[key]
+    return counts
@@ -0,0 +1,347 @@
+# accounting/reconciliation.py
+"""
+은행/카드 거래내역 가져오기와 원장 대사.
+
+- 가져오기: CSV/OFX 파일을 한 줄씩 읽어 청크 단위로 BankStatementLine 에 저장합니다.
+  줄마다 fingerprint(날짜·금액·참조·적요·같은 파일 안의 순번)를 두어 같은 파일이나
+  기간이 겹치는 파일을 다시 가져와도 새 줄만 추가됩니다.
+- 대사: 아직 대사되지 않은 거래내역 줄과, FinancialAccount.ledger_account 의 대사되지
+  않은 posted 분개행(debit - credit)을 맞춥니다. 분개행을 (금액, 날짜) 와
+  (금액, 참조번호) 해시 인덱스로 한 번만 만들어 두고 거래내역 줄마다 날짜 창
+  (±window_days) 안을 조회하므로, 비교 횟수는 줄 수 × 창 크기에 비례합니다.
+  결과는 matched_line 에 저장되어 다음 실행은 남은 줄만 다룹니다.
+"""
+import csv
+import hashlib
+import io
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from accounting.models import BankStatement, BankStatementLine, JournalLine
+from accounting.services import _chunked
+
+CHUNK_SIZE = 1000
+WINDOW_DAYS = 3
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%Y%m%d")
+CSV_COLUMNS = {
+    "date": ("date", "posted date", "posting date", "transaction date", "trans date"),
+    "amount": ("amount", "transaction amount"),
+    "deposit": ("deposit", "deposits", "credit", "credits", "money in"),
+    "withdrawal": ("withdrawal", "withdrawals", "debit", "debits", "money out"),
+    "description": ("description", "memo", "payee", "name", "details"),
+    "reference": ("reference", "ref", "check number", "check #", "check no", "fitid", "transaction id"),
+}
+_REFERENCE_TOKEN = re.compile(r"[A-Z0-9-]*\d[A-Z0-9-]*")
+
+
+@dataclass
+class StatementRow:
+    date: date
+    amount: Decimal
+    description: str = ""
+    reference: str = ""
+
+
+# -----------------------------
+# 파싱
+# -----------------------------
+def _parse_date(value):
+    value = (value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {value!r}")
+
+
+def _parse_amount(value):
+    value = (value or "").strip().replace("$", "").replace(",", "")
+    if not value:
+        return None
+    negative = value.startswith("(") and value.endswith(")")
+    try:
+        amount = Decimal(value.strip("()"))
+    except InvalidOperation:
+        raise ValueError(f"unrecognised amount {value!r}")
+    return -amount if negative else amount
+
+
+def _normalise_reference(value):
+    return (value or "").strip().upper().lstrip("#")[:64]
+
+
+def parse_csv(stream):
+    """헤더가 있는 CSV. amount 한 열 또는 deposit/withdrawal 두 열을 지원합니다."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = [column.strip().lower() for column in next(reader, [])]
+    columns = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                columns[key] = header.index(alias)
+                break
+    if "date" not in columns or not ({"amount"} <= columns.keys() or "deposit" in columns):
+        raise ValidationError("CSV needs a date column and an amount (or deposit/withdrawal) column.")
+
+    def cell(row, key):
+        index = columns.get(key)
+        return row[index] if index is not None and index < len(row) else ""
+
+    for number, row in enumerate(reader, start=2):
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            if "amount" in columns:
+                amount = _parse_amount(cell(row, "amount")) or Decimal("0")
+            else:
+                amount = (_parse_amount(cell(row, "deposit")) or Decimal("0")) - abs(
+                    _parse_amount(cell(row, "withdrawal")) or Decimal("0")
+                )
+            yield StatementRow(
+                date=_parse_date(cell(row, "date")),
+                amount=amount,
+                description=cell(row, "description").strip()[:255],
+                reference=_normalise_reference(cell(row, "reference")),
+            )
+        except ValueError as e:
+            raise ValidationError(f"Line {number}: {e}")
+
+
+def parse_ofx(stream, read_size=64 * 1024):
+    """OFX/QFX(SGML 또는 XML)의 <STMTTRN> 블록을 읽는 대로 하나씩 돌려줍니다."""
+    tag = re.compile(r"<(\w+)>([^<\r\n]*)")
+    buffer = ""
+    while True:
+        chunk = stream.read(read_size)
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode("utf-8", errors="replace")
+        buffer += chunk
+        while True:
+            start = buffer.upper().find("<STMTTRN>")
+            end = buffer.upper().find("</STMTTRN>", start)
+            if start < 0 or end < 0:
+                break
+            fields = {
+                name.upper(): value.strip() for name, value in tag.findall(buffer[start:end])
+            }
+            buffer = buffer[end + len("</STMTTRN>"):]
+            try:
+                yield StatementRow(
+                    date=_parse_date(fields.get("DTPOSTED", "")[:8]),
+                    amount=_parse_amount(fields.get("TRNAMT")) or Decimal("0"),
+                    description=(fields.get("NAME") or fields.get("MEMO") or "")[:255],
+                    reference=_normalise_reference(
+                        fields.get("CHECKNUM") or fields.get("REFNUM") or fields.get("FITID")
+                    ),
+                )
+            except ValueError as e:
+                raise ValidationError(f"Transaction {fields.get('FITID', '?')}: {e}")
+        if not chunk:
+            break
+        # 블록 시작 전의 헤더 부분은 버림
+        start = buffer.upper().find("<STMTTRN>")
+        buffer = buffer[start:] if start >= 0 else buffer[-len("<STMTTRN>"):]
+
+
+def parse_statement(stream, file_name=""):
+    if file_name.lower().endswith((".ofx", ".qfx")):
+        return parse_ofx(stream)
+    return parse_csv(stream)
+
+
+# -----------------------------
+# 가져오기
+# -----------------------------
+def _fingerprints(rows):
+    """같은 파일 안에서 완전히 같은 거래가 여러 번 나오면 순번으로 구분합니다."""
+    seen = defaultdict(int)
+    for row in rows:
+        key = f"{row.date.isoformat()}|{row.amount:.2f}|{row.reference}|{row.description}"
+        seen[key] += 1
+        yield row, hashlib.sha256(f"{key}|{seen[key]}".encode()).hexdigest()
+
+
+def import_statement(
+    financial_account, stream, file_name="", user=None, window_days=WINDOW_DAYS, chunk_size=CHUNK_SIZE
+):
+    """
+    거래내역 파일을 가져오고 바로 대사합니다.
+    반환: (BankStatement, match_account() 결과)
+    """
+    with transaction.atomic():
+        statement = BankStatement.objects.create(
+            company=financial_account.organization,
+            financial_account=financial_account,
+            file_name=file_name[:255],
+            imported_by=user,
+        )
+        rows = _fingerprints(parse_statement(stream, file_name))
+        for chunk in _chunked(rows, chunk_size):
+            BankStatementLine.objects.bulk_create(
+                [
+                    BankStatementLine(
+                        statement=statement,
+                        financial_account=financial_account,
+                        date=row.date,
+                        amount=row.amount,
+                        description=row.description,
+                        reference=row.reference,
+                        fingerprint=fingerprint,
+                    )
+                    for row, fingerprint in chunk
+                ],
+                ignore_conflicts=True,  # 이미 가져온 줄
+            )
+        statement.line_count = statement.lines.count()
+        statement.save(update_fields=["line_count"])
+
+    return statement, match_account(financial_account, window_days)
+
+
+# -----------------------------
+# 대사
+# -----------------------------
+def _cents(amount):
+    return int((amount * 100).to_integral_value())
+
+
+def _reference_tokens(*texts):
+    return set(_REFERENCE_TOKEN.findall(" ".join(texts).upper()))
+
+
+def match_account(financial_account, window_days=WINDOW_DAYS):
+    """
+    대사되지 않은 거래내역 줄을 원장 분개행과 맞춥니다.
+    1) 같은 금액 + 참조번호가 분개 적요/메모에 있는 행(날짜 창 안에서 가장 가까운 날짜)
+    2) 같은 금액 + 날짜 창 안에서 가장 가까운 날짜
+    반환: {'matched', 'unmatched'}
+    """
+    ledger_account = financial_account.ledger_account
+    if ledger_account is None:
+        raise ValidationError(f"{financial_account} has no ledger account to reconcile against.")
+
+    pending = BankStatementLine.objects.filter(
+        financial_account=financial_account, matched_line__isnull=True
+    )
+    bounds = pending.aggregate(first=Min("date"), last=Max("date"))
+    if bounds["first"] is None:
+        return {"matched": 0, "unmatched": 0}
+
+    window = timedelta(days=window_days)
+    by_date = defaultdict(list)  # (cents, date) -> [journal line id]
+    by_reference = defaultdict(list)  # (cents, token) -> [(date, journal line id)]
+    candidates = (
+        JournalLine.objects.filter(
+            account=ledger_account,
+            company=financial_account.organization_id,
+            posted=True,
+            date__gte=bounds["first"] - window,
+            date__lte=bounds["last"] + window,
+            bank_match__isnull=True,
+        )
+        .order_by("date", "id")
+        .values_list("id", "date", "debit", "credit", "description", "entry__memo")
+    )
+    for line_id, day, debit, credit, description, memo in candidates.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        cents = _cents(debit - credit)
+        by_date[(cents, day)].append(line_id)
+        for token in _reference_tokens(description, memo):
+            by_reference[(cents, token)].append((day, line_id))
+
+    bank_lines = list(
+        pending.order_by("date", "id").values_list("id", "date", "amount", "reference")
+    )
+    offsets = [0]
+    for days in range(1, window_days + 1):
+        offsets += [-days, days]
+
+    used = set()
+    matched = {}  # 거래내역 줄 id -> 분개행 id
+    # 1) 참조번호 — 모든 줄을 먼저 돌아야 참조 없는 줄이 같은 금액의 분개행을 가로채지 않음
+    for bank_id, day, amount, reference in bank_lines:
+        if not reference:
+            continue
+        options = [
+            (abs((line_day - day).days), line_id)
+            for line_day, line_id in by_reference.get((_cents(amount), reference), ())
+            if line_id not in used and abs(line_day - day) <= window
+        ]
+        if options:
+            line_id = min(options)[1]
+            used.add(line_id)
+            matched[bank_id] = line_id
+    # 2) 금액 + 가장 가까운 날짜
+    for bank_id, day, amount, reference in bank_lines:
+        if bank_id in matched:
+            continue
+        cents = _cents(amount)
+        for offset in offsets:
+            line_id = next(
+                (
+                    line_id
+                    for line_id in by_date.get((cents, day + timedelta(days=offset)), ())
+                    if line_id not in used
+                ),
+                None,
+            )
+            if line_id is not None:
+                used.add(line_id)
+                matched[bank_id] = line_id
+                break
+
+    saved = _save_matches(list(matched.items()))
+    return {"matched": saved, "unmatched": pending.count()}
+
+
+def _save_matches(matches):
+    """
+    (거래내역 줄 id, 분개행 id) 쌍을 저장하고 저장된 수를 돌려줍니다. bulk_update 의
+    CASE WHEN 은 수만 건에서 식 해석 비용이 커서 같은 UPDATE 문 하나를 executemany 로
+    실행합니다. 후보는 잠그지 않고 고르므로 그사이 다른 실행이 먼저 맞춘 거래내역 줄
+    (matched_line_id IS NULL)과 분개행(NOT EXISTS)은 건너뜁니다. 두 실행이 동시에 같은
+    분개행을 쓰면 OneToOne 제약이 막으므로, 그 청크만 한 줄씩 다시 저장하며 충돌한 쌍을 버립니다.
+    """
+    meta = BankStatementLine._meta
+    qn = connection.ops.quote_name
+    table, column = qn(meta.db_table), qn("matched_line_id")
+    sql = (
+        f"UPDATE {table} SET {column} = %s, {qn('matched_at')} = %s "
+        f"WHERE {qn('id')} = %s AND {column} IS NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM {table} taken WHERE taken.{column} = %s)"
+    )
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    saved = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for chunk in _chunked(matches, CHUNK_SIZE):
+            rows = [(line_id, now, bank_id, line_id) for bank_id, line_id in chunk]
+            try:
+                with transaction.atomic():
+                    cursor.executemany(sql, rows)
+                    saved += cursor.rowcount  # executemany: 모든 행의 합
+            except IntegrityError:
+                for row in rows:
+                    try:
+                        with transaction.atomic():
+                            cursor.execute(sql, row)
+                            saved += cursor.rowcount
+                    except IntegrityError:
+                        continue  # 다른 실행이 이 분개행을 방금 가져감
+    return saved
+
+
+def unmatch(lines):
+    """대사를 취소합니다(다음 match_account() 에서 다시 맞춤)."""
+    return lines.update(matched_line=None, matched_at=None)
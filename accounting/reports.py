@@ -0,0 +1,203 @@
+# accounting/reports.py
+"""
+재무제표 계산 엔진.
+
+계정별 차변/대변 합계를 JournalLine 에 대한 GROUP BY 한 번으로 구하고
+(날짜 조건이 없으면 AccountBalance 테이블, 누적 조회는 마감 스냅샷을 기준으로 함),
+시산표/손익계산서/재무상태표는 그 결과를 메모리에서 나눠 담기만 합니다.
+화면과 내보내기가 같은 함수를 공유합니다.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Max, Sum
+
+from accounting.balances import (
+    DEBIT_NORMAL_TYPES,
+    ZERO,
+    account_balances,
+    normal_balance,
+)
+from accounting.models import JournalEntry, JournalLine, LedgerAccount, PeriodClose
+
+
+def _as_iso(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value or None
+
+
+def line_totals(company, date_from=None, date_to=None):
+    """
+    posted 분개행을 계정별로 GROUP BY 한 {account_id: (debit, credit)}.
+    분개행에 복사된 company/date/posted 로 거르므로 전표와 조인하지 않고
+    (company, account, date) 인덱스로 기간 안의 행만 읽습니다.
+    """
+    lines = JournalLine.objects.filter(company=company, posted=True)
+    if date_from:
+        lines = lines.filter(date__gte=date_from)
+    if date_to:
+        lines = lines.filter(date__lte=date_to)
+    rows = (
+        lines.values("account_id")
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+        .values_list("account_id", "debit_sum", "credit_sum")
+    )
+    return {account_id: (debit or ZERO, credit or ZERO) for account_id, debit, credit in rows}
+
+
+def cumulative_totals(company, as_of=None):
+    """
+    장부 시작부터 as_of 까지의 누적 합계.
+    - as_of 이후 posted 전표가 없으면 AccountBalance 테이블만 읽습니다.
+    - 아니면 as_of 이전 마지막 마감 스냅샷 + 그 이후(미마감 구간) 분개행만 집계합니다.
+    """
+    as_of = _as_iso(as_of)
+    if not _needs_line_scan(company, as_of):
+        return account_balances(company)
+
+    snapshot = (
+        PeriodClose.objects.filter(company=company, period_end__lte=as_of)
+        .order_by("-period_end")
+        .first()
+    )
+    if snapshot is None:
+        return line_totals(company, date_to=as_of)
+
+    totals = {
+        account_id: (debit, credit)
+        for account_id, debit, credit in snapshot.balances.values_list(
+            "account_id", "debit", "credit"
+        )
+    }
+    open_from = snapshot.period_end + timedelta(days=1)
+    for account_id, (debit, credit) in line_totals(company, open_from, as_of).items():
+        d, c = totals.get(account_id, (ZERO, ZERO))
+        totals[account_id] = (d + debit, c + credit)
+    return totals
+
+
+def account_totals(company, date_from=None, date_to=None):
+    """
+    회사의 모든 계정에 대해 posted 분개행 차변/대변 합계를 돌려줍니다.
+    date_from 이 있으면 해당 기간의 분개행만, 없으면 누적(cumulative_totals) 값을 씁니다.
+    반환: 코드순 [{'account', 'debit', 'credit', 'balance'}, ...] (거래 없는 계정 포함)
+    """
+    date_from, date_to = _as_iso(date_from), _as_iso(date_to)
+    if date_from:
+        totals = line_totals(company, date_from, date_to)
+    else:
+        totals = cumulative_totals(company, date_to)
+
+    rows = []
+    for account in LedgerAccount.objects.filter(company=company).order_by("code"):
+        debit, credit = totals.get(account.id, (ZERO, ZERO))
+        rows.append(
+            {
+                "account": account,
+                "debit": debit,
+                "credit": credit,
+                "balance": normal_balance(account.type, debit, credit),
+            }
+        )
+    return rows
+
+
+def _needs_line_scan(company, as_of):
+    """as_of 이후에 posted 전표가 있으면 잔액 테이블을 쓸 수 없습니다."""
+    if not as_of:
+        return False
+    last_posted = JournalEntry.objects.filter(company=company, posted=True).aggregate(
+        last=Max("date")
+    )["last"]
+    return last_posted is not None and last_posted.isoformat() > as_of
+
+
+def trial_balance(company, date_from=None, date_to=None):
+    """활성 계정 중 거래가 있는 계정만, 잔액 방향에 따라 차변/대변 열로 나눕니다."""
+    data = []
+    total_debit = Decimal("0")
+    total_credit = Decimal("0")
+
+    for row in account_totals(company, date_from, date_to):
+        account = row["account"]
+        if not account.is_active or (row["debit"] == 0 and row["credit"] == 0):
+            continue
+
+        balance = row["balance"]
+        if account.type in DEBIT_NORMAL_TYPES:
+            debit_balance = max(balance, Decimal("0"))
+            credit_balance = Decimal("0") if balance >= 0 else abs(balance)
+        else:
+            credit_balance = max(balance, Decimal("0"))
+            debit_balance = Decimal("0") if balance >= 0 else abs(balance)
+
+        data.append({"account": account, "debit": debit_balance, "credit": credit_balance})
+        total_debit += debit_balance
+        total_credit += credit_balance
+
+    return {
+        "trial_balance_data": data,
+        "total_debit": total_debit,
+        "total_credit": total_credit,
+        "is_balanced": total_debit == total_credit,
+    }
+
+
+def income_statement(company, date_from, date_to):
+    """기간 손익: 수익/비용 계정별 금액과 합계."""
+    revenue_data, expense_data = [], []
+    total_revenue = Decimal("0")
+    total_expenses = Decimal("0")
+
+    for row in account_totals(company, date_from, date_to):
+        account = row["account"]
+        if not account.is_active or row["balance"] == 0:
+            continue
+        if account.type == LedgerAccount.Type.REVENUE:
+            revenue_data.append({"account": account, "amount": row["balance"]})
+            total_revenue += row["balance"]
+        elif account.type == LedgerAccount.Type.EXPENSE:
+            expense_data.append({"account": account, "amount": row["balance"]})
+            total_expenses += row["balance"]
+
+    return {
+        "revenue_data": revenue_data,
+        "expense_data": expense_data,
+        "total_revenue": total_revenue,
+        "total_expenses": total_expenses,
+        "net_income": total_revenue - total_expenses,
+    }
+
+
+def balance_sheet(company, as_of_date):
+    """as_of_date 기준 재무상태표. 이익잉여금은 비활성 계정까지 포함한 누적 손익입니다."""
+    sections = {"ASSET": [], "LIABILITY": [], "EQUITY": []}
+    totals = {key: Decimal("0") for key in sections}
+    retained_earnings = Decimal("0")
+
+    for row in account_totals(company, date_to=as_of_date):
+        account = row["account"]
+        if account.type in (LedgerAccount.Type.REVENUE, LedgerAccount.Type.EXPENSE):
+            retained_earnings += row["credit"] - row["debit"]
+            continue
+        if not account.is_active or row["balance"] == 0:
+            continue
+        sections[account.type].append({"account": account, "balance": row["balance"]})
+        totals[account.type] += row["balance"]
+
+    total_equity = totals["EQUITY"] + retained_earnings
+    total_liabilities_equity = totals["LIABILITY"] + total_equity
+
+    return {
+        "assets_data": sections["ASSET"],
+        "liabilities_data": sections["LIABILITY"],
+        "equity_data": sections["EQUITY"],
+        "total_assets": totals["ASSET"],
+        "total_liabilities": totals["LIABILITY"],
+        "total_equity": total_equity,
+        "retained_earnings": retained_earnings,
+        "total_liabilities_equity": total_liabilities_equity,
+        "is_balanced": abs(totals["ASSET"] - total_liabilities_equity) < Decimal("0.01"),
+    }
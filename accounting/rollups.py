@@ -0,0 +1,294 @@
+# accounting/rollups.py
+"""
+계정별 일자별 발생액(DailyBalance) 유지와 조회.
+
+AccountBalance 와 같은 자리(accounting.signals, 대량 전기)에서 같은 트랜잭션으로
+증감분을 더합니다. 행 수가 (계정 수 × 거래일 수)로 묶이므로 대시보드 카드,
+월별 추이, 현금흐름표는 분개행 수와 관계없이 일정한 비용으로 계산됩니다.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from accounting.balances import ZERO, normal_balance
+from accounting.models import DailyBalance, JournalLine, LedgerAccount
+
+# 현금성 계정(FinancialAccount 에 연결된 원장 계정도 포함)
+CASH_ACCOUNT_CODES = ("1000", "1010", "1020")
+
+# 간접법 현금흐름표 구분(계정과목표 코드 기준). 나머지 비현금 계정은 영업활동.
+INVESTING_CODE_PREFIXES = ("15", "16", "17", "18", "19")
+FINANCING_CODE_PREFIXES = ("25", "26", "27", "28", "29", "3")
+NON_CASH_ADJUSTMENT_CODES = ("1590",)  # 감가상각누계액: 영업활동 가산
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+# -----------------------------
+# 유지
+# -----------------------------
+def collect_daily_deltas(rows, sign=1):
+    """
+    rows: (company_id, account_id, day, debit, credit) 튜플의 iterable.
+    {(company_id, account_id, day): (debit, credit)} 로 합산합니다.
+    """
+    deltas = defaultdict(lambda: (ZERO, ZERO))
+    for company_id, account_id, day, debit, credit in rows:
+        key = (company_id, account_id, _as_date(day))
+        d, c = deltas[key]
+        deltas[key] = (d + sign * (debit or ZERO), c + sign * (credit or ZERO))
+    return dict(deltas)
+
+
+def apply_daily_deltas(deltas):
+    """balances.apply_deltas 와 같은 방식(update 후 없으면 insert)으로 일자 행에 더합니다."""
+    with transaction.atomic():
+        for (company_id, account_id, day), (debit, credit) in deltas.items():
+            if not debit and not credit:
+                continue
+            rows = DailyBalance.objects.filter(
+                company_id=company_id, account_id=account_id, day=day
+            )
+            if rows.update(debit=F("debit") + debit, credit=F("credit") + credit):
+                continue
+            try:
+                with transaction.atomic():
+                    DailyBalance.objects.create(
+                        company_id=company_id,
+                        account_id=account_id,
+                        day=day,
+                        debit=debit,
+                        credit=credit,
+                    )
+            except IntegrityError:
+                rows.update(debit=F("debit") + debit, credit=F("credit") + credit)
+
+
+def apply_entry(entry, sign=1, company_id=None, day=None):
+    """
+    전표 전체 분개행을 한 날짜에 반영(sign=-1 이면 차감)합니다.
+    company_id/day 를 주면 전표의 현재 값 대신 그 값(변경 전 값)을 씁니다.
+    """
+    company_id = company_id or entry.company_id
+    day = day or entry.date
+    rows = (
+        entry.lines.values("account_id")
+        .annotate(debit=Sum("debit"), credit=Sum("credit"))
+        .values_list("account_id", "debit", "credit")
+    )
+    apply_daily_deltas(
+        collect_daily_deltas(
+            ((company_id, account_id, day, d, c) for account_id, d, c in rows), sign
+        )
+    )
+
+
+@transaction.atomic
+def rebuild_daily_balances(company=None):
+    """posted 분개행 전체로부터 일자별 표를 다시 만듭니다(백필/불일치 복구용)."""
+    rollups = DailyBalance.objects.all()
+    lines = JournalLine.objects.filter(posted=True)
+    if company is not None:
+        rollups = rollups.filter(company=company)
+        lines = lines.filter(company=company)
+    rollups.delete()
+
+    rows = (
+        lines.values("company_id", "account_id", "date")
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+    )
+    count = 0
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(
+            DailyBalance(
+                company_id=row["company_id"],
+                account_id=row["account_id"],
+                day=row["date"],
+                debit=row["debit_sum"] or ZERO,
+                credit=row["credit_sum"] or ZERO,
+            )
+        )
+        if len(batch) >= 2000:
+            DailyBalance.objects.bulk_create(batch, batch_size=500)
+            count += len(batch)
+            batch = []
+    DailyBalance.objects.bulk_create(batch, batch_size=500)
+    return count + len(batch)
+
+
+# -----------------------------
+# 조회
+# -----------------------------
+def activity(company, date_from=None, date_to=None, accounts=None):
+    """기간 발생액 {account_id: (debit, credit)}. accounts 로 계정을 좁힐 수 있습니다."""
+    rows = DailyBalance.objects.filter(company=company)
+    if date_from:
+        rows = rows.filter(day__gte=date_from)
+    if date_to:
+        rows = rows.filter(day__lte=date_to)
+    if accounts is not None:
+        rows = rows.filter(account__in=accounts)
+    totals = (
+        rows.values("account_id")
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+        .values_list("account_id", "debit_sum", "credit_sum")
+    )
+    return {account_id: (debit or ZERO, credit or ZERO) for account_id, debit, credit in totals}
+
+
+def revenue_and_expenses(company, date_from, date_to):
+    """(수익, 비용) 기간 합계."""
+    revenue = expenses = ZERO
+    types = dict(LedgerAccount.objects.filter(company=company).values_list("id", "type"))
+    for account_id, (debit, credit) in activity(company, date_from, date_to).items():
+        account_type = types.get(account_id)
+        if account_type == LedgerAccount.Type.REVENUE:
+            revenue += credit - debit
+        elif account_type == LedgerAccount.Type.EXPENSE:
+            expenses += debit - credit
+    return revenue, expenses
+
+
+def monthly_trend(company, months=12, today=None):
+    """
+    최근 months 개월(이번 달 포함)의 월별 수익/비용/순이익.
+    반환: [{'month': date(첫날), 'revenue', 'expenses', 'net'}, ...] (오래된 달부터)
+    """
+    today = today or date.today()
+    first = today.replace(day=1)
+    for _ in range(months - 1):
+        first = (first - timedelta(days=1)).replace(day=1)
+
+    rows = (
+        DailyBalance.objects.filter(
+            company=company,
+            day__gte=first,
+            day__lte=today,
+            account__type__in=[LedgerAccount.Type.REVENUE, LedgerAccount.Type.EXPENSE],
+        )
+        .annotate(month=TruncMonth("day"))
+        .values("month", "account__type")
+        .annotate(debit_sum=Sum("debit"), credit_sum=Sum("credit"))
+        .order_by()
+    )
+    by_month = defaultdict(lambda: {"revenue": ZERO, "expenses": ZERO})
+    for row in rows:
+        month = row["month"]
+        debit, credit = row["debit_sum"] or ZERO, row["credit_sum"] or ZERO
+        if row["account__type"] == LedgerAccount.Type.REVENUE:
+            by_month[month]["revenue"] += credit - debit
+        else:
+            by_month[month]["expenses"] += debit - credit
+
+    trend = []
+    month = first
+    while month <= today:
+        values = by_month[month]
+        trend.append(
+            {
+                "month": month,
+                "revenue": values["revenue"],
+                "expenses": values["expenses"],
+                "net": values["revenue"] - values["expenses"],
+            }
+        )
+        month = (month + timedelta(days=32)).replace(day=1)
+    return trend
+
+
+def cash_accounts(company):
+    return LedgerAccount.objects.filter(
+        Q(code__in=CASH_ACCOUNT_CODES) | Q(financial_accounts__isnull=False),
+        company=company,
+        type=LedgerAccount.Type.ASSET,
+    ).distinct()
+
+
+def _cash_flow_section(account):
+    if account.code in NON_CASH_ADJUSTMENT_CODES:
+        return "operating"
+    if account.code.startswith(INVESTING_CODE_PREFIXES) and account.type == LedgerAccount.Type.ASSET:
+        return "investing"
+    if account.code.startswith(FINANCING_CODE_PREFIXES) and account.type in (
+        LedgerAccount.Type.LIABILITY,
+        LedgerAccount.Type.EQUITY,
+    ):
+        return "financing"
+    return "operating"
+
+
+def cash_flow_statement(company, date_from, date_to):
+    """
+    간접법 현금흐름표.
+    순이익에서 시작해 비현금 계정의 기간 증감을 영업/투자/재무활동으로 나누고,
+    현금성 계정의 기초·기말 잔액과 맞춰 봅니다(차이가 0 이면 is_balanced).
+    """
+    date_from, date_to = _as_date(date_from), _as_date(date_to)
+    accounts = {account.id: account for account in LedgerAccount.objects.filter(company=company)}
+    cash_ids = set(cash_accounts(company).values_list("id", flat=True))
+
+    revenue, expenses = revenue_and_expenses(company, date_from, date_to)
+    net_income = revenue - expenses
+    sections = {"operating": [], "investing": [], "financing": []}
+    totals = {"operating": net_income, "investing": ZERO, "financing": ZERO}
+
+    for account_id, (debit, credit) in sorted(
+        activity(company, date_from, date_to).items(), key=lambda item: accounts[item[0]].code
+    ):
+        account = accounts[account_id]
+        if account_id in cash_ids or account.type in (
+            LedgerAccount.Type.REVENUE,
+            LedgerAccount.Type.EXPENSE,
+        ):
+            continue
+        # 자산 증가는 현금 유출, 부채·자본 증가는 현금 유입
+        amount = credit - debit
+        if not amount:
+            continue
+        section = _cash_flow_section(account)
+        sections[section].append({"account": account, "amount": amount})
+        totals[section] += amount
+
+    opening = closing = ZERO
+    cash_rows = []
+    before = activity(company, date_to=date_from - timedelta(days=1), accounts=cash_ids)
+    during = activity(company, date_from, date_to, accounts=cash_ids)
+    for account_id in sorted(cash_ids, key=lambda pk: accounts[pk].code):
+        d0, c0 = before.get(account_id, (ZERO, ZERO))
+        d1, c1 = during.get(account_id, (ZERO, ZERO))
+        start = normal_balance(LedgerAccount.Type.ASSET, d0, c0)
+        cash_rows.append(
+            {
+                "account": accounts[account_id],
+                "opening": start,
+                "inflow": d1,
+                "outflow": c1,
+                "closing": start + d1 - c1,
+            }
+        )
+        opening += start
+        closing += start + d1 - c1
+
+    net_change = totals["operating"] + totals["investing"] + totals["financing"]
+    return {
+        "net_income": net_income,
+        "operating_data": sections["operating"],
+        "investing_data": sections["investing"],
+        "financing_data": sections["financing"],
+        "total_operating": totals["operating"],
+        "total_investing": totals["investing"],
+        "total_financing": totals["financing"],
+        "net_change": net_change,
+        "cash_accounts": cash_rows,
+        "opening_cash": opening,
+        "closing_cash": closing,
+        "is_balanced": net_change == closing - opening,
+    }
@@ -1,10 +1,12 @@
 # accounting/services.py
 from decimal import Decimal
-from django.db import transaction, IntegrityError
+from django.db import connection, transaction, IntegrityError
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, Min, OuterRef, Q, Subquery, Sum, Value, When
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from accounting.models import PostingRule, JournalEntry, JournalLine, LedgerAccount
+from accounting import lookups
 
 # 프로젝트 구조에 맞춘 import (회사/고객 모델이 customer 앱에 있다고 하셨죠)
 from customer.models import (
@@ -15,9 +17,7 @@ from customer.models import (
 
 def _rule(company, doc_type):
     try:
-        return PostingRule.objects.select_related(
-            "debit_account", "credit_account", "tax_account"
-        ).get(company=company, doc_type=doc_type)
+        return lookups.get_rule(company, doc_type)
     except PostingRule.DoesNotExist as e:
         raise ValidationError(
             f"PostingRule 누락: company={getattr(company, 'id', company)} doc_type={doc_type}"
@@ -26,18 +26,80 @@ def _rule(company, doc_type):
 
 def _bank_account(company, code="1010"):
     try:
-        return LedgerAccount.objects.get(company=company, code=code)
+        return lookups.get_account(company, code)
     except LedgerAccount.DoesNotExist as e:
         raise ValidationError(
             f"LedgerAccount code {code} not found for company={getattr(company,'id',company)}"
         ) from e
 
 
+# -----------------------------
+# 원천 문서 ↔ 전표
+# -----------------------------
+# (source_content_type, source_object_id) 는 je_unique_source 로 유일합니다.
+
+def find_existing_entries(documents):
+    """
+    문서 목록(모델이 섞여도 됨)을 {문서: JournalEntry} 로 한 번의 쿼리로 바꿉니다.
+    전기되지 않은 문서는 결과에 없습니다. ContentType 은 프로세스 캐시를 씁니다.
+    """
+    documents = [doc for doc in documents if doc.pk is not None]
+    if not documents:
+        return {}
+    by_type = {}
+    for doc in documents:
+        ct = ContentType.objects.get_for_model(type(doc))
+        by_type.setdefault(ct.pk, {})[doc.pk] = doc
+    condition = Q()
+    for ct_id, docs in by_type.items():
+        condition |= Q(source_content_type_id=ct_id, source_object_id__in=list(docs))
+    return {
+        by_type[entry.source_content_type_id][entry.source_object_id]: entry
+        for entry in JournalEntry.objects.filter(condition)
+    }
+
+
 def _find_existing_entry(source_obj):
+    return find_existing_entries([source_obj]).get(source_obj)
+
+
+def journal_entry_subquery(model):
+    """queryset.annotate(journal_entry_id=...) 용: 각 문서의 전표 id(없으면 NULL)."""
+    return Subquery(
+        JournalEntry.objects.filter(
+            source_content_type=ContentType.objects.get_for_model(model),
+            source_object_id=OuterRef("pk"),
+        ).values("pk")[:1]
+    )
+
+
+def unposted(queryset):
+    """전표가 없는 문서만(플래그가 아니라 원장 기준)."""
+    return queryset.annotate(
+        journal_entry_id=journal_entry_subquery(queryset.model)
+    ).filter(journal_entry_id__isnull=True)
+
+
+def _create_source_entry(source_obj, **fields):
+    """
+    원천 문서의 전표 헤더를 insert-or-get 으로 만듭니다.
+    반환: (JournalEntry, created). 동시에 다른 트랜잭션이 같은 문서를 전기했다면
+    유일 제약 위반을 잡아 그 전표를 돌려주므로 호출 측은 분개를 만들지 않아야 합니다.
+    """
     ct = ContentType.objects.get_for_model(type(source_obj))
-    return JournalEntry.objects.filter(
-        source_content_type=ct, source_object_id=source_obj.pk
-    ).first()
+    try:
+        with transaction.atomic():
+            entry = JournalEntry.objects.create(
+                source_content_type=ct, source_object_id=source_obj.pk, **fields
+            )
+        return entry, True
+    except IntegrityError:
+        existing = JournalEntry.objects.filter(
+            source_content_type=ct, source_object_id=source_obj.pk
+        ).first()
+        if existing is None:  # 다른 제약 위반
+            raise
+        return existing, False
 
 
 @transaction.atomic
@@ -75,7 +137,8 @@ def post_sale(sale):
     #     raise ValidationError(f"총액 불일치: subtotal({amt}) + tax({tax}) != total({total})")
 
     # 1) 전표 생성
-    je = JournalEntry.objects.create(
+    je, created = _create_source_entry(
+        sale,
         company=sale.company,
         date=sale.date,
         memo=f"Sale #{sale.pk}",
@@ -83,9 +146,9 @@ def post_sale(sale):
             sale, "customer", None
         ),  # ✅ 고객 연결(je_only_one_party 제약과 충돌 없음)
         posted=True,
-        source_content_type=ContentType.objects.get_for_model(type(sale)),
-        source_object_id=sale.pk,
     )
+    if not created:  # 동시에 다른 요청이 먼저 전기함
+        return je
 
     # 2) 분개
     JournalLine.objects.create(
@@ -146,15 +209,16 @@ def post_purchase(purchase):
     total = Decimal(purchase.total or (amt + tax))
 
     # 전표 헤더
-    je = JournalEntry.objects.create(
+    je, created = _create_source_entry(
+        purchase,
         company=purchase.company,
         date=purchase.date,
         memo=f"Purchase #{purchase.pk}",
         supplier=getattr(purchase, "supplier", None),  # ✅ 공급처 연결
         posted=True,
-        source_content_type=ContentType.objects.get_for_model(type(purchase)),
-        source_object_id=purchase.pk,
     )
+    if not created:  # 동시에 다른 요청이 먼저 전기함
+        return je
 
     # 분개
     JournalLine.objects.create(
@@ -241,11 +305,7 @@ def post_incoming_payment(payment):
             
             # Try to find existing account or use default
             try:
-                debit_acc = LedgerAccount.objects.get(
-                    company=company,
-                    code=base_code,
-                    is_active=True
-                )
+                debit_acc = lookups.get_account(company, base_code, active_only=True)
             except LedgerAccount.DoesNotExist:
                 # Fall back to rule's debit account
                 pass
@@ -265,15 +325,16 @@ def post_incoming_payment(payment):
     if financial_account:
         memo += f" - {financial_account.account_name}"
     
-    je = JournalEntry.objects.create(
+    je, created = _create_source_entry(
+        payment,
         company=company,
         date=date,
         memo=memo,
         customer=customer,  # ✅ 고객 연결 (제약: customer/supplier 동시 금지)
         posted=True,
-        source_content_type=ContentType.objects.get_for_model(type(payment)),
-        source_object_id=payment.pk,
     )
+    if not created:  # 동시에 다른 요청이 먼저 전기함
+        return je
 
     # 분개: Dr Cash/Bank / Cr A/R
     JournalLine.objects.create(
@@ -399,7 +460,7 @@ def post_outgoing_payment(vendor_payment):
     if is_advance:
         # Use a vendor advances account (1310) for prepayments
         try:
-            debit_acc = LedgerAccount.objects.get(company=company, code="1310")
+            debit_acc = lookups.get_account(company, "1310")
         except LedgerAccount.DoesNotExist:
             # Fallback to regular AP account if vendor advances account doesn't exist
             debit_acc = rule.debit_account
@@ -410,15 +471,16 @@ def post_outgoing_payment(vendor_payment):
         memo_bits.append(f"PO #{po.pk}")
     memo = " / ".join(memo_bits)
 
-    je = JournalEntry.objects.create(
+    je, created = _create_source_entry(
+        vendor_payment,
         company=company,
         date=date,
         memo=memo,
         supplier=supplier,  # ✅ 공급처 연결
         posted=True,
-        source_content_type=ContentType.objects.get_for_model(type(vendor_payment)),
-        source_object_id=vendor_payment.pk,
     )
+    if not created:  # 동시에 다른 요청이 먼저 전기함
+        return je
 
     # 분개: Dr (AP 또는 선지급) / Cr Bank
     JournalLine.objects.create(
@@ -444,124 +506,562 @@ def post_outgoing_payment(vendor_payment):
     return je
 
 
-def post_expense(expense):
+# 비용 분류 → 기본 비용 계정 코드(Expense.expense_account 가 없을 때)
+EXPENSE_CATEGORY_ACCOUNTS = {
+    'rent': '5100',  # Rent Expense
+    'utilities': '5200',  # Utilities Expense
+    'salaries': '5300',  # Salaries Expense
+    'insurance': '5400',  # Insurance Expense
+    'supplies': '5500',  # Office Supplies Expense
+    'marketing': '5600',  # Marketing Expense
+    'travel': '5700',  # Travel Expense
+    'professional': '5800',  # Professional Services
+    'maintenance': '5900',  # Maintenance Expense
+    'depreciation': '5950',  # Depreciation Expense
+    'taxes': '6000',  # Tax Expense
+    'interest': '6100',  # Interest Expense
+    'other': '6900',  # Other Expenses
+}
+
+
+def _expense_accounts(expense, company):
     """
-    Post an expense to the general ledger.
-    Creates journal entry: DR Expense Account / CR Cash/Bank or Accounts Payable
+    비용 전표의 (차변 비용 계정, 세금 계정 또는 None, 대변 계정).
+    계정 조회는 lookups 캐시를 거치므로 같은 분류가 반복되면 DB 를 다시 읽지 않습니다.
     """
-    from .models import JournalEntry, JournalLine, LedgerAccount, Expense
-    from django.contrib.contenttypes.models import ContentType
-    from decimal import Decimal
-    
-    # Check if already posted
-    existing = JournalEntry.objects.filter(
-        source_content_type=ContentType.objects.get_for_model(Expense),
-        source_object_id=expense.pk
-    ).first()
-    if existing:
-        return existing
-    
-    # Determine expense account (debit side)
-    if expense.expense_account:
+    from .models import Expense
+
+    if expense.expense_account_id:
         debit_account = expense.expense_account
     else:
-        # Map category to default expense accounts
-        category_account_map = {
-            'rent': '5100',  # Rent Expense
-            'utilities': '5200',  # Utilities Expense
-            'salaries': '5300',  # Salaries Expense
-            'insurance': '5400',  # Insurance Expense
-            'supplies': '5500',  # Office Supplies Expense
-            'marketing': '5600',  # Marketing Expense
-            'travel': '5700',  # Travel Expense
-            'professional': '5800',  # Professional Services
-            'maintenance': '5900',  # Maintenance Expense
-            'depreciation': '5950',  # Depreciation Expense
-            'taxes': '6000',  # Tax Expense
-            'interest': '6100',  # Interest Expense
-            'other': '6900',  # Other Expenses
-        }
-        
-        account_code = category_account_map.get(expense.category, '6900')
-        
-        # Try to find or create the expense account
+        account_code = EXPENSE_CATEGORY_ACCOUNTS.get(expense.category, '6900')
         try:
-            debit_account = LedgerAccount.objects.get(
-                company=expense.company,
-                code=account_code,
-                is_active=True
-            )
+            debit_account = lookups.get_account(company, account_code, active_only=True)
         except LedgerAccount.DoesNotExist:
             # Create the expense account if it doesn't exist
-            category_name = dict(expense.EXPENSE_CATEGORY_CHOICES).get(expense.category, 'Other Expenses')
-            debit_account = LedgerAccount.objects.create(
-                company=expense.company,
-                code=account_code,
-                name=category_name,
-                type=LedgerAccount.Type.EXPENSE,
-                is_active=True
+            category_name = dict(Expense.EXPENSE_CATEGORY_CHOICES).get(expense.category, 'Other Expenses')
+            debit_account = lookups.get_or_create_account(
+                company,
+                account_code,
+                defaults={'name': category_name, 'type': LedgerAccount.Type.EXPENSE, 'is_active': True}
             )
-    
+
+    tax_account = None
+    if expense.tax_amount > 0:
+        tax_account = lookups.get_or_create_account(
+            company,
+            '5050',
+            defaults={'name': 'Sales Tax Expense', 'type': LedgerAccount.Type.EXPENSE}
+        )
+
     # Determine credit account based on payment status
-    if expense.is_paid and expense.financial_account:
+    if expense.is_paid and expense.financial_account_id:
         # If paid, credit the financial account (bank/credit card)
-        if expense.financial_account.ledger_account:
+        if expense.financial_account.ledger_account_id:
             credit_account = expense.financial_account.ledger_account
         else:
             # Default to Cash account
-            credit_account = LedgerAccount.objects.get_or_create(
-                company=expense.company,
-                code='1010',
+            credit_account = lookups.get_or_create_account(
+                company,
+                '1010',
                 defaults={'name': 'Bank - Checking', 'type': LedgerAccount.Type.ASSET}
-            )[0]
+            )
     else:
         # If not paid, credit Accounts Payable
-        credit_account = LedgerAccount.objects.get_or_create(
-            company=expense.company,
-            code='2000',
+        credit_account = lookups.get_or_create_account(
+            company,
+            '2000',
             defaults={'name': 'Accounts Payable', 'type': LedgerAccount.Type.LIABILITY}
-        )[0]
-    
-    # Create journal entry
-    je = JournalEntry.objects.create(
+        )
+    return debit_account, tax_account, credit_account
+
+
+def _expense_entry(expense):
+    """post_expense / bulk_post_expenses 가 같은 전표를 만들도록 (헤더 값, 분개행 값 목록)을 돌려줍니다."""
+    debit_account, tax_account, credit_account = _expense_accounts(expense, expense.company)
+    category = dict(expense.EXPENSE_CATEGORY_CHOICES).get(expense.category)
+    fields = dict(
         company=expense.company,
         date=expense.expense_date,
         memo=f"Expense #{expense.expense_number} - {expense.vendor_name} - {expense.description[:50]}",
         supplier=expense.vendor,
         posted=True,
-        source_content_type=ContentType.objects.get_for_model(Expense),
-        source_object_id=expense.pk,
     )
-    
-    # Create journal lines
-    # Debit expense account for the amount before tax
-    JournalLine.objects.create(
-        entry=je,
-        account=debit_account,
-        debit=expense.amount,
-        description=f"{dict(expense.EXPENSE_CATEGORY_CHOICES).get(expense.category)} - {expense.vendor_name}"
-    )
-    
-    # If there's tax, debit a tax expense account
-    if expense.tax_amount > 0:
-        tax_account = LedgerAccount.objects.get_or_create(
-            company=expense.company,
-            code='5050',
-            defaults={'name': 'Sales Tax Expense', 'type': LedgerAccount.Type.EXPENSE}
-        )[0]
-        JournalLine.objects.create(
-            entry=je,
-            account=tax_account,
-            debit=expense.tax_amount,
-            description="Sales tax on expense"
+    # Debit expense account for the amount before tax, tax separately,
+    # credit cash/bank or accounts payable for total amount
+    lines = [dict(account=debit_account, debit=expense.amount, description=f"{category} - {expense.vendor_name}")]
+    if tax_account is not None:
+        lines.append(dict(account=tax_account, debit=expense.tax_amount, description="Sales tax on expense"))
+    lines.append(
+        dict(
+            account=credit_account,
+            credit=expense.total_amount,
+            description=f"Payment to {expense.vendor_name}" if expense.is_paid else f"Payable to {expense.vendor_name}",
         )
-    
-    # Credit cash/bank or accounts payable for total amount
-    JournalLine.objects.create(
-        entry=je,
-        account=credit_account,
-        credit=expense.total_amount,
-        description=f"Payment to {expense.vendor_name}" if expense.is_paid else f"Payable to {expense.vendor_name}"
     )
-    
+    return fields, lines
+
+
+@transaction.atomic
+def post_expense(expense):
+    """
+    Post an expense to the general ledger.
+    Creates journal entry: DR Expense Account / CR Cash/Bank or Accounts Payable
+    """
+    # Check if already posted
+    existing = _find_existing_entry(expense)
+    if existing:
+        return existing
+
+    fields, lines = _expense_entry(expense)
+    je, created = _create_source_entry(expense, **fields)
+    if not created:  # 동시에 다른 요청이 먼저 전기함
+        return je
+
+    for line in lines:
+        JournalLine.objects.create(entry=je, **line)
+
     return je
+
+
+# -----------------------------
+# 대량 전기(Bulk posting)
+# -----------------------------
+# post_sale / post_purchase / post_incoming_payment / post_expense 와 같은 분개를 만들되,
+# 규칙·계정·ContentType·기존 전표를 청크당 한 번만 조회하고 bulk_create 로 저장합니다.
+# bulk_create 는 시그널을 거치지 않으므로 잔액(AccountBalance, DailyBalance)은 직접 반영합니다.
+
+BULK_CHUNK_SIZE = 500
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _bulk_post(queryset, company, build, mark_posted, chunk_size=BULK_CHUNK_SIZE):
+    """
+    queryset 의 문서를 청크 단위로 전기합니다.
+    build(doc) -> (JournalEntry, [JournalLine, ...]) (저장 전 객체) 또는 ValidationError
+    mark_posted(ids) -> 원문서 플래그를 한 번의 update() 로 변경
+    문서별 실패는 기록만 하고 나머지는 계속 진행합니다.
+    """
+    from accounting.balances import apply_deltas, collect_deltas
+    from accounting.periods import ensure_period_open, locked_through
+    from accounting.rollups import apply_daily_deltas, collect_daily_deltas
+
+    ct = ContentType.objects.get_for_model(queryset.model)
+    lock = locked_through(company.pk)
+    result = {"posted": 0, "already_posted": 0, "failed": []}
+
+    # 처리 중 플래그가 바뀌어 queryset 조건에서 빠지므로 PK 목록을 먼저 고정
+    pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+    for pk_chunk in _chunked(pks, chunk_size):
+        chunk = list(queryset.filter(pk__in=pk_chunk).order_by("pk"))
+        existing = set(
+            JournalEntry.objects.filter(
+                source_content_type=ct, source_object_id__in=[doc.pk for doc in chunk]
+            ).values_list("source_object_id", flat=True)
+        )
+
+        drafts = []
+        already = []
+        for doc in chunk:
+            if doc.pk in existing:
+                already.append(doc.pk)
+                continue
+            try:
+                entry, lines = build(doc)
+                ensure_period_open(lock, entry.date)
+            except ValidationError as e:
+                result["failed"].append((doc, " ".join(e.messages)))
+                continue
+            entry.company = company
+            entry.posted = True
+            entry.source_content_type = ct
+            entry.source_object_id = doc.pk
+            drafts.append((doc, entry, lines))
+
+        try:
+            with transaction.atomic():
+                entries = JournalEntry.objects.bulk_create(
+                    [entry for _, entry, _ in drafts], batch_size=chunk_size
+                )
+                all_lines = []
+                for (_, _, lines), entry in zip(drafts, entries):
+                    for line in lines:
+                        line.entry = entry
+                        all_lines.append(line)
+                JournalLine.objects.bulk_create(all_lines, batch_size=chunk_size)
+                apply_deltas(
+                    collect_deltas(
+                        (company.pk, line.account_id, line.debit, line.credit)
+                        for line in all_lines
+                    )
+                )
+                apply_daily_deltas(
+                    collect_daily_deltas(
+                        (company.pk, line.account_id, line.date, line.debit, line.credit)
+                        for line in all_lines
+                    )
+                )
+                mark_posted(already + [doc.pk for doc, _, _ in drafts])
+            result["posted"] += len(drafts)
+            result["already_posted"] += len(already)
+        except (IntegrityError, ValidationError):
+            # 청크 단위 실패 시 문서별로 다시 시도해 실패 원인을 문서에 귀속시킴
+            for doc, entry, lines in drafts:
+                entry.pk = None
+                entry._state.adding = True
+                try:
+                    with transaction.atomic():
+                        entry.save()
+                        for line in lines:
+                            line.pk = None
+                            line._state.adding = True
+                            line.entry = entry
+                            line.save()
+                        mark_posted([doc.pk])
+                    result["posted"] += 1
+                except IntegrityError as e:
+                    # 다른 작업자가 먼저 전기했으면 je_unique_source 위반 → 이미 전기됨
+                    if JournalEntry.objects.filter(
+                        source_content_type=ct, source_object_id=doc.pk
+                    ).exists():
+                        already.append(doc.pk)
+                    else:
+                        result["failed"].append((doc, str(e)))
+                except ValidationError as e:
+                    result["failed"].append((doc, str(e)))
+            if already:
+                mark_posted(already)
+                result["already_posted"] += len(already)
+
+    return result
+
+
+def bulk_post_sales(invoices, company, chunk_size=BULK_CHUNK_SIZE):
+    """미전기 Invoice queryset 을 일괄 전기합니다(post_sale 과 같은 분개)."""
+    try:
+        rule = _rule(company, PostingRule.DocType.SALE)
+    except ValidationError as e:
+        rule, rule_error = None, e
+
+    def build(invoice):
+        if rule is None:
+            raise rule_error
+        amt = Decimal(invoice.subtotal or 0)
+        tax = Decimal(invoice.tax_amount or 0)
+        total = Decimal(invoice.total_amount or (amt + tax))
+        entry = JournalEntry(
+            date=invoice.invoice_date,
+            memo=f"Sale #{invoice.pk}",
+            customer_id=invoice.customer_id,
+        )
+        lines = [
+            JournalLine(account=rule.debit_account, debit=total, description="Sale receipt"),
+            JournalLine(account=rule.credit_account, credit=amt, description="Sales revenue"),
+        ]
+        if tax and rule.tax_account:
+            lines.append(
+                JournalLine(account=rule.tax_account, credit=tax, description="Sales tax")
+            )
+        return entry, lines
+
+    def mark_posted(ids):
+        invoices.model.objects.filter(pk__in=ids).update(
+            is_posted=True, posted_at=timezone.now()
+        )
+
+    return _bulk_post(invoices, company, build, mark_posted, chunk_size)
+
+
+def bulk_post_purchases(purchases, company, chunk_size=BULK_CHUNK_SIZE):
+    """미전기 PurchaseOrder queryset 을 일괄 전기합니다(post_purchase 와 같은 분개)."""
+    try:
+        rule = _rule(company, PostingRule.DocType.PURCHASE)
+    except ValidationError as e:
+        rule, rule_error = None, e
+
+    def build(purchase):
+        if purchase.status == "draft":
+            raise ValidationError("Cannot post a draft purchase order to general ledger")
+        if purchase.accounting_status == "DRAFT":
+            raise ValidationError("Cannot post a purchase order with DRAFT accounting status")
+        if rule is None:
+            raise rule_error
+        amt = Decimal(purchase.subtotal or 0)
+        tax = Decimal(purchase.tax_amount or 0)
+        total = Decimal(purchase.total_amount or (amt + tax))
+        entry = JournalEntry(
+            date=purchase.order_date,
+            memo=f"Purchase #{purchase.pk}",
+            supplier_id=purchase.supplier_id,
+        )
+        lines = [
+            JournalLine(
+                account=rule.debit_account, debit=amt, description="Purchase expense/COGS"
+            )
+        ]
+        if tax and rule.tax_account:
+            lines.append(
+                JournalLine(account=rule.debit_account, debit=tax, description="Purchase tax")
+            )
+        lines.append(
+            JournalLine(account=rule.credit_account, credit=total, description="Payment/AP")
+        )
+        return entry, lines
+
+    def mark_posted(ids):
+        purchases.model.objects.filter(pk__in=ids).update(
+            is_posted=True, posted_at=timezone.now()
+        )
+
+    return _bulk_post(purchases, company, build, mark_posted, chunk_size)
+
+
+def bulk_post_incoming_payments(payments, company, chunk_size=BULK_CHUNK_SIZE):
+    """
+    pending/processing Payment queryset 을 일괄 전기하고 completed 로 바꿉니다
+    (post_incoming_payment 와 같은 분개). 연결된 Invoice 의 입금액도 다시 계산합니다.
+    """
+    try:
+        rule = _rule(company, PostingRule.DocType.PAYMENT_IN)
+    except ValidationError as e:
+        rule, rule_error = None, e
+
+    account_code_map = {
+        "checking": "1010",
+        "savings": "1020",
+        "credit_card": "2100",
+        "line_of_credit": "2200",
+    }
+    active_accounts = {
+        account.code: account
+        for account in LedgerAccount.objects.filter(company=company, is_active=True)
+    }
+    payments = payments.select_related("invoice", "financial_account__ledger_account")
+
+    def build(payment):
+        if rule is None:
+            raise rule_error
+        debit_acc = rule.debit_account
+        financial_account = payment.financial_account
+        if financial_account:
+            if financial_account.ledger_account:
+                debit_acc = financial_account.ledger_account
+            else:
+                base_code = account_code_map.get(financial_account.account_type, "1010")
+                debit_acc = active_accounts.get(base_code, rule.debit_account)
+
+        amount = Decimal(payment.amount or 0)
+        if amount <= 0:
+            raise ValidationError("Payment.amount 는 0보다 커야 합니다.")
+
+        memo = f"Incoming payment #{payment.pk}"
+        if financial_account:
+            memo += f" - {financial_account.account_name}"
+        customer_id = payment.customer_id or (
+            payment.invoice.customer_id if payment.invoice else None
+        )
+        entry = JournalEntry(
+            date=payment.payment_date or timezone.now().date(),
+            memo=memo,
+            customer_id=customer_id,
+        )
+        lines = [
+            JournalLine(account=debit_acc, debit=amount, description="Customer payment"),
+            JournalLine(account=rule.credit_account, credit=amount, description="Apply to A/R"),
+        ]
+        return entry, lines
+
+    def mark_posted(ids):
+        from sales.paid_amounts import recalculate_paid_amounts
+
+        model = payments.model
+        model.objects.filter(pk__in=ids, status__in=["pending", "processing"]).update(
+            status="completed"
+        )
+        # update() 는 Payment 시그널을 거치지 않으므로 입금액을 직접 재계산(집계 한 번)
+        recalculate_paid_amounts(
+            model.objects.filter(pk__in=ids, invoice__isnull=False)
+            .values_list("invoice_id", flat=True)
+            .distinct()
+        )
+
+    return _bulk_post(payments, company, build, mark_posted, chunk_size)
+
+
+def bulk_post_expenses(expenses, company, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Expense queryset 을 일괄 전기하고 posted 로 바꿉니다(post_expense 와 같은 분개).
+    분류별 계정은 lookups 캐시로 한 번씩만 조회합니다. draft/cancelled 는 실패로 남깁니다.
+    """
+    expenses = expenses.select_related(
+        "company", "vendor", "expense_account", "financial_account__ledger_account"
+    )
+
+    def build(expense):
+        if expense.status in ("draft", "cancelled"):
+            raise ValidationError(f"Cannot post a {expense.status} expense to general ledger")
+        fields, lines = _expense_entry(expense)
+        return JournalEntry(**fields), [JournalLine(**line) for line in lines]
+
+    def mark_posted(ids):
+        # update() 는 auto_now 를 채우지 않으므로 updated_at 도 직접 갱신
+        expenses.model.objects.filter(pk__in=ids).update(
+            status="posted", updated_at=timezone.now()
+        )
+
+    return _bulk_post(expenses, company, build, mark_posted, chunk_size)
+
+
+# -----------------------------
+# 대량 되돌리기(Bulk rollback)
+# -----------------------------
+# rollback_journal_entry 를 전표마다 반복하지 않고, 원문서 플래그는 모델당 update() 한 번,
+# 분개행/전표는 청크 단위 DELETE 로 지웁니다. 삭제 시그널을 거치지 않으므로 잔액과
+# 일자 집계는 지운 분개행 합계만큼 직접 차감합니다. 전체가 하나의 트랜잭션입니다.
+
+# rollback 대상 문서 종류 -> (app_label, model)
+ROLLBACK_DOC_TYPES = {
+    "sale": ("sales", "invoice"),
+    "purchase": ("purchases", "purchaseorder"),
+    "payment_in": ("sales", "payment"),
+    "payment_out": ("purchases", "supplierpayment"),
+    "expense": ("accounting", "expense"),
+}
+
+
+def rollback_queryset(
+    company, date_from=None, date_to=None, doc_types=None, source_ids=None, include_manual=False
+):
+    """
+    되돌릴 전표 queryset. doc_types 는 ROLLBACK_DOC_TYPES 의 키 목록,
+    source_ids 는 그 문서들의 pk 로 더 좁힙니다. 원문서 없는 수기 전표는
+    다시 전기할 수 없으므로 include_manual=True 일 때만 포함합니다.
+    """
+    entries = JournalEntry.objects.filter(company=company)
+    if date_from:
+        entries = entries.filter(date__gte=date_from)
+    if date_to:
+        entries = entries.filter(date__lte=date_to)
+    if doc_types:
+        entries = entries.filter(
+            source_content_type__in=[
+                ContentType.objects.get_by_natural_key(*ROLLBACK_DOC_TYPES[doc_type])
+                for doc_type in doc_types
+            ]
+        )
+    elif not include_manual:
+        entries = entries.filter(source_content_type__isnull=False)
+    if source_ids:
+        entries = entries.filter(source_object_id__in=source_ids)
+    return entries
+
+
+def _unpost_documents(model, ids):
+    """rollback_journal_entry 와 같은 플래그 되돌리기를 update() 한 번으로. 반환: 바뀐 문서 수"""
+    documents = model.objects.filter(pk__in=ids)
+    fields = {field.name for field in model._meta.concrete_fields}
+    if "is_posted" in fields:
+        return documents.update(is_posted=False, posted_at=None)
+    if "posted" in fields:
+        return documents.update(posted=False, **({"posted_at": None} if "posted_at" in fields else {}))
+    if model._meta.label_lower == "accounting.expense":
+        # 지급일이 있으면 paid, 아니면 approved 로 (bulk_post_expenses 가 받는 상태)
+        return documents.filter(status="posted").update(
+            status=Case(When(paid_date__isnull=False, then=Value("paid")), default=Value("approved")),
+            updated_at=timezone.now(),
+        )
+    if "status" in fields:
+        updated = documents.filter(status="completed").update(status="pending")
+        if model._meta.label_lower == "sales.payment":
+            from sales.paid_amounts import recalculate_paid_amounts
+
+            # update() 는 Payment 시그널을 거치지 않으므로 입금액을 직접 재계산(집계 한 번)
+            recalculate_paid_amounts(
+                documents.filter(invoice__isnull=False).values_list("invoice_id", flat=True)
+            )
+        return updated
+    return 0
+
+
+@transaction.atomic
+def bulk_rollback_journal_entries(entries, chunk_size=BULK_CHUNK_SIZE):
+    """
+    JournalEntry queryset 을 모두 되돌립니다(전표 삭제 + 원문서 미전기 처리).
+    마감된 기간의 전표가 하나라도 있으면 아무것도 지우지 않고 ValidationError.
+    반환: {'entries', 'lines', 'documents': {모델 라벨: 바뀐 문서 수}}
+    """
+    from collections import defaultdict
+
+    from accounting.balances import apply_deltas, collect_deltas
+    from accounting.models import BankStatementLine
+    from accounting.periods import ensure_period_open, locked_through
+    from accounting.rollups import apply_daily_deltas, collect_daily_deltas
+
+    for company_id, earliest in (
+        entries.order_by().values_list("company_id").annotate(earliest=Min("date"))
+    ):
+        ensure_period_open(locked_through(company_id), earliest)
+
+    result = {"entries": 0, "lines": 0, "documents": {}}
+    pks = list(entries.order_by("pk").values_list("pk", flat=True))
+    for pk_chunk in _chunked(pks, chunk_size):
+        lines = JournalLine.objects.filter(entry_id__in=pk_chunk)
+        totals = list(
+            lines.filter(posted=True)
+            .order_by()
+            .values_list("company_id", "account_id", "date")
+            .annotate(debit=Sum("debit"), credit=Sum("credit"))
+        )
+        apply_deltas(
+            collect_deltas(
+                ((company_id, account_id, debit, credit)
+                 for company_id, account_id, _, debit, credit in totals),
+                -1,
+            )
+        )
+        apply_daily_deltas(collect_daily_deltas(totals, -1))
+
+        sources = defaultdict(list)
+        for ct_id, object_id in JournalEntry.objects.filter(
+            pk__in=pk_chunk, source_content_type__isnull=False
+        ).values_list("source_content_type_id", "source_object_id"):
+            sources[ct_id].append(object_id)
+        for ct_id, object_ids in sources.items():
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            if model is None:
+                continue  # 원문서 앱이 없어짐
+            label = model._meta.label_lower
+            result["documents"][label] = (
+                result["documents"].get(label, 0) + _unpost_documents(model, object_ids)
+            )
+
+        # matched_line 의 SET_NULL 을 직접 처리
+        BankStatementLine.objects.filter(matched_line__entry_id__in=pk_chunk).update(
+            matched_line=None, matched_at=None
+        )
+        # queryset.delete() 는 행마다 pre/post_delete 시그널을 보내 잔액을 한 번 더 빼고
+        # 전표마다 기간 잠금을 다시 조회하므로, 잔액·원문서·대사를 위에서 직접 처리한 뒤
+        # 시그널 없이 DELETE 문 두 개로 지웁니다.
+        placeholders = ", ".join(["%s"] * len(pk_chunk))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {JournalLine._meta.db_table} WHERE entry_id IN ({placeholders})",
+                pk_chunk,
+            )
+            result["lines"] += cursor.rowcount
+            cursor.execute(
+                f"DELETE FROM {JournalEntry._meta.db_table} WHERE {JournalEntry._meta.pk.column} IN ({placeholders})",
+                pk_chunk,
+            )
+            result["entries"] += cursor.rowcount
+    return result
@@ -0,0 +1,152 @@
+from datetime import date
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from . import lookups, rollups
+from .balances import apply_deltas, apply_entry, collect_deltas
+from .models import JournalEntry, JournalLine, LedgerAccount, PostingRule
+from .periods import check_period_open
+
+
+@receiver(pre_save, sender=JournalLine)
+def journal_line_pre_save(sender, instance, raw=False, **kwargs):
+    """
+    Reject changes in closed periods and remember the stored amounts so
+    post_save can apply only the difference.
+    """
+    instance._balance_old = None
+    if raw:
+        return
+    entry = instance.entry
+    # journal_entry_pre_save 가 이 전표 인스턴스로 이미 검사했다면 분개행마다 다시 조회하지 않음
+    if getattr(entry, "_period_checked", None) != (entry.company_id, entry.date):
+        check_period_open(entry.company_id, entry.date)
+        entry._period_checked = (entry.company_id, entry.date)
+    if instance._state.adding or not instance.pk:
+        return
+    instance._balance_old = (
+        JournalLine.objects.filter(pk=instance.pk)
+        .values_list("company_id", "account_id", "debit", "credit", "posted", "date")
+        .first()
+    )
+    old = instance._balance_old
+    if old and (old[0], old[5]) != (instance.entry.company_id, instance.entry.date):
+        # Line moved from another entry: the old one must be open as well
+        check_period_open(old[0], old[5])
+
+
+@receiver(post_save, sender=JournalLine)
+def journal_line_saved(sender, instance, raw=False, **kwargs):
+    """Keep AccountBalance in step with the line inside the caller's transaction."""
+    if raw:
+        return
+    rows = []
+    daily = []
+    old = getattr(instance, "_balance_old", None)
+    if old and old[4]:
+        rows.append((old[0], old[1], -old[2], -old[3]))
+        daily.append((old[0], old[1], old[5], -old[2], -old[3]))
+    if instance.entry.posted:
+        rows.append(
+            (instance.entry.company_id, instance.account_id, instance.debit, instance.credit)
+        )
+        daily.append(
+            (
+                instance.entry.company_id,
+                instance.account_id,
+                instance.entry.date,
+                instance.debit,
+                instance.credit,
+            )
+        )
+    instance._balance_old = None
+    if rows:
+        apply_deltas(collect_deltas(rows))
+        rollups.apply_daily_deltas(rollups.collect_daily_deltas(daily))
+
+
+@receiver(post_delete, sender=JournalLine)
+def journal_line_deleted(sender, instance, **kwargs):
+    """
+    Subtract a deleted line. Cascades from JournalEntry.delete() (rollback_journal_entry)
+    run before the entry row itself is removed, so the posted flag can still be read.
+    """
+    entry = (
+        JournalEntry.objects.filter(pk=instance.entry_id)
+        .values_list("company_id", "posted", "date")
+        .first()
+    )
+    if entry:
+        check_period_open(entry[0], entry[2])
+    if entry and entry[1]:
+        apply_deltas(
+            collect_deltas([(entry[0], instance.account_id, instance.debit, instance.credit)], -1)
+        )
+        rollups.apply_daily_deltas(
+            rollups.collect_daily_deltas(
+                [(entry[0], instance.account_id, entry[2], instance.debit, instance.credit)], -1
+            )
+        )
+
+
+@receiver(pre_save, sender=JournalEntry)
+def journal_entry_pre_save(sender, instance, raw=False, **kwargs):
+    instance._was_posted = None
+    instance._old_line_fields = None
+    instance._period_checked = None
+    if raw:
+        return
+    check_period_open(instance.company_id, instance.date)
+    instance._period_checked = (instance.company_id, instance.date)
+    if instance._state.adding or not instance.pk:
+        return
+    old = (
+        JournalEntry.objects.filter(pk=instance.pk)
+        .values_list("company_id", "date", "posted")
+        .first()
+    )
+    if old:
+        check_period_open(old[0], old[1])
+        instance._was_posted = old[2]
+        instance._old_line_fields = old
+
+
+@receiver(pre_delete, sender=JournalEntry)
+def journal_entry_pre_delete(sender, instance, **kwargs):
+    """Closed periods can only be changed after reopen_period()."""
+    check_period_open(instance.company_id, instance.date)
+
+
+@receiver(post_save, sender=JournalEntry)
+def journal_entry_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Copy company/date/posted onto the entry's lines (JournalLine keeps them for
+    range reports) and move them in the daily rollup; approve/unapprove moves
+    the lines in or out of the balances.
+    """
+    old = getattr(instance, "_old_line_fields", None)
+    instance._old_line_fields = None
+    day = date.fromisoformat(instance.date) if isinstance(instance.date, str) else instance.date
+    if not raw and old and old != (instance.company_id, day, instance.posted):
+        instance.lines.update(
+            company_id=instance.company_id, date=instance.date, posted=instance.posted
+        )
+        if old[2]:
+            rollups.apply_entry(instance, -1, company_id=old[0], day=old[1])
+        if instance.posted:
+            rollups.apply_entry(instance, 1)
+    was_posted = getattr(instance, "_was_posted", None)
+    instance._was_posted = None
+    if raw or created or was_posted is None or was_posted == instance.posted:
+        return
+    apply_entry(instance, 1 if instance.posted else -1)
+
+
+@receiver(post_save, sender=PostingRule)
+@receiver(post_delete, sender=PostingRule)
+@receiver(post_save, sender=LedgerAccount)
+@receiver(post_delete, sender=LedgerAccount)
+def lookup_changed(sender, instance, **kwargs):
+    """Drop cached rules/accounts of the company (see accounting.lookups)."""
+    lookups.invalidate(instance.company_id)
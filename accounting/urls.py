@@ -10,18 +10,27 @@ urlpatterns = [
     # Reports
     path('chart-of-accounts/', views.chart_of_accounts, name='chart_of_accounts'),
     path('general-ledger/', views.general_ledger, name='general_ledger'),
+    path('general-ledger/rows/', views.general_ledger_rows, name='general_ledger_rows'),
+    path('general-ledger/export/', views.general_ledger_export, name='general_ledger_export'),
     path('journal-entry/<int:pk>/', views.journal_entry_detail, name='journal_entry_detail'),
     path('trial-balance/', views.trial_balance, name='trial_balance'),
+    path('trial-balance/export/', views.trial_balance_export, name='trial_balance_export'),
+    path('accounts/<int:pk>/export/', views.account_ledger_export, name='account_ledger_export'),
     path('income-statement/', views.income_statement, name='income_statement'),
     path('balance-sheet/', views.balance_sheet, name='balance_sheet'),
+    path('cash-flow/', views.cash_flow_statement, name='cash_flow_statement'),
+    path('aging/', views.aging_report, name='aging_report'),
+    path('aging/export/', views.aging_export, name='aging_export'),
     
     # Actions
     path('post-documents/', views.post_documents, name='post_documents'),
     path('journal-entry/<int:pk>/delete/', views.delete_journal_entry, name='delete_journal_entry'),
+    path('payments/import/', views.payment_import, name='payment_import'),
     
     # Expense URLs
     path('expenses/', views.expense_list, name='expense_list'),
     path('expenses/add/', views.expense_create, name='expense_create'),
+    path('expenses/import/', views.expense_import, name='expense_import'),
     path('expenses/<int:pk>/edit/', views.expense_update, name='expense_update'),
     path('expenses/<int:pk>/delete/', views.expense_delete, name='expense_delete'),
     path('expenses/<int:pk>/post/', views.expense_post, name='expense_post'),
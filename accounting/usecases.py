@@ -1,17 +1,13 @@
 # accounting/usecases.py
 from django.db import transaction
-from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 
-from accounting.models import JournalEntry
-from accounting.services import post_sale, post_incoming_payment, post_outgoing_payment  # 이미 만드신 전기 함수 사용
-
-
-def _find_existing_entry(obj):
-    ct = ContentType.objects.get_for_model(type(obj))
-    return JournalEntry.objects.filter(
-        source_content_type=ct, source_object_id=obj.pk
-    ).first()
+from accounting.services import (  # 이미 만드신 전기 함수 사용
+    _find_existing_entry,
+    post_incoming_payment,
+    post_outgoing_payment,
+    post_sale,
+)
 
 
 @transaction.atomic
@@ -147,3 +143,54 @@ def approve_and_post_outgoing_payment(vendor_payment):
         vendor_payment.save(update_fields=updates)
 
     return je
+
+
+# -----------------------------
+# 비동기 승인(전기 대기열)
+# -----------------------------
+# 승인 상태만 바꾸고 전기는 PostingJob 으로 넘깁니다(accounting.posting_queue).
+# run_posting_worker 가 몇 초 안에 전표를 만듭니다.
+
+
+def _default_company():
+    from customer.models import Organization as Company
+
+    return Company.objects.first()
+
+
+@transaction.atomic
+def approve_sale(sale, company=None):
+    """Invoice 를 승인 상태로 바꾸고 전기 대기열에 넣습니다. PostingJob 반환."""
+    from accounting.posting_queue import enqueue
+
+    Status = type(sale).ACCOUNTING_STATUS_CHOICES
+    if sale.accounting_status != Status.APPROVED:
+        sale.accounting_status = Status.APPROVED
+        sale.save(update_fields=["accounting_status"])
+    return enqueue(sale, company or getattr(sale, "company", None) or _default_company())
+
+
+@transaction.atomic
+def approve_outgoing_payment(vendor_payment):
+    """SupplierPayment 를 승인 상태로 바꾸고 전기 대기열에 넣습니다. PostingJob 반환."""
+    from accounting.posting_queue import enqueue
+
+    Status = type(vendor_payment).Status
+    if vendor_payment.status != Status.APPROVED:
+        vendor_payment.status = Status.APPROVED
+        vendor_payment.save(update_fields=["status"])
+    return enqueue(vendor_payment, vendor_payment.company)
+
+
+def queue_incoming_payment(payment, company=None):
+    """완료된 고객 수금 Payment 를 전기 대기열에 넣습니다. PostingJob 반환."""
+    from accounting.posting_queue import enqueue
+
+    return enqueue(payment, company or _default_company())
+
+
+def queue_outgoing_payment(vendor_payment):
+    """SupplierPayment 를 상태 변경 없이 전기 대기열에 넣습니다. PostingJob 반환."""
+    from accounting.posting_queue import enqueue
+
+    return enqueue(vendor_payment, vendor_payment.company)
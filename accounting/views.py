@@ -2,17 +2,22 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.db.models import Sum, Q, F, DecimalField, Value, Case, When
-from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.urls import reverse
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.utils.http import urlencode
+from django.core.exceptions import ValidationError
 from decimal import Decimal
 from datetime import datetime, timedelta
 import calendar
 
-from .models import LedgerAccount, JournalEntry, JournalLine, PostingRule, Expense
-from .services import post_sale, post_purchase, post_incoming_payment, post_outgoing_payment, rollback_journal_entry, post_expense
+from .models import LedgerAccount, JournalEntry, PostingRule, Expense
+from .services import post_outgoing_payment, rollback_journal_entry, post_expense
+from .services import bulk_post_sales, bulk_post_purchases, bulk_post_incoming_payments, unposted
+from .balances import account_balances, normal_balance
+from . import aging, exports, ledger, reports, rollups
 from sales.models import Invoice, Payment
 from purchases.models import PurchaseOrder
 from customer.models import Organization as Company
@@ -32,18 +37,14 @@ def accounting_dashboard(request):
     start_of_month = today.replace(day=1)
     end_of_month = today.replace(day=calendar.monthrange(today.year, today.month)[1])
     
-    # Get key account balances
+    # Get key account balances (from the maintained balance table)
+    balances = account_balances(company)
+    
     def get_account_balance(account_code):
         try:
             account = LedgerAccount.objects.get(company=company, code=account_code)
-            lines = JournalLine.objects.filter(account=account, entry__posted=True)
-            total_debit = lines.aggregate(Sum('debit'))['debit__sum'] or Decimal('0')
-            total_credit = lines.aggregate(Sum('credit'))['credit__sum'] or Decimal('0')
-            
-            if account.type in ['ASSET', 'EXPENSE']:
-                return total_debit - total_credit
-            else:
-                return total_credit - total_debit
+            total_debit, total_credit = balances.get(account.id, (Decimal('0'), Decimal('0')))
+            return normal_balance(account.type, total_debit, total_credit)
         except LedgerAccount.DoesNotExist:
             return Decimal('0')
     
@@ -52,46 +53,34 @@ def accounting_dashboard(request):
     accounts_receivable = get_account_balance('1100')  # A/R (corrected from 1200)
     accounts_payable = get_account_balance('2000')  # A/P
     
-    # Revenue and expenses for current month
-    revenue_accounts = LedgerAccount.objects.filter(company=company, type='REVENUE')
-    expense_accounts = LedgerAccount.objects.filter(company=company, type='EXPENSE')
-    
-    month_revenue = JournalLine.objects.filter(
-        account__in=revenue_accounts,
-        entry__posted=True,
-        entry__date__gte=start_of_month,
-        entry__date__lte=end_of_month
-    ).aggregate(
-        total=Coalesce(Sum('credit'), Decimal('0')) - Coalesce(Sum('debit'), Decimal('0'))
-    )['total'] or Decimal('0')
-    
-    month_expenses = JournalLine.objects.filter(
-        account__in=expense_accounts,
-        entry__posted=True,
-        entry__date__gte=start_of_month,
-        entry__date__lte=end_of_month
-    ).aggregate(
-        total=Coalesce(Sum('debit'), Decimal('0')) - Coalesce(Sum('credit'), Decimal('0'))
-    )['total'] or Decimal('0')
+    # Revenue and expenses for current month (from the daily rollup)
+    month_revenue, month_expenses = rollups.revenue_and_expenses(company, start_of_month, end_of_month)
+    
+    # Monthly trend for the last 12 months; bar widths are relative to the largest month
+    trend = rollups.monthly_trend(company, 12, today)
+    peak = max([max(row['revenue'], row['expenses']) for row in trend] + [Decimal('0')])
+    for row in trend:
+        row['revenue_pct'] = int(row['revenue'] / peak * 100) if peak > 0 and row['revenue'] > 0 else 0
+        row['expenses_pct'] = int(row['expenses'] / peak * 100) if peak > 0 and row['expenses'] > 0 else 0
     
     # Recent journal entries
     recent_entries = JournalEntry.objects.filter(
         company=company
     ).select_related('customer', 'supplier').order_by('-date', '-id')[:10]
     
-    # Unposted documents count
-    unposted_invoices = Invoice.objects.filter(
+    # Unposted documents count (documents without a journal entry)
+    unposted_invoices = unposted(Invoice.objects.filter(
         Q(is_posted__isnull=True) | Q(is_posted=False)
-    ).count()
+    )).count()
     
-    unposted_purchases = PurchaseOrder.objects.filter(
+    unposted_purchases = unposted(PurchaseOrder.objects.filter(
         Q(is_posted__isnull=True) | Q(is_posted=False)
-    ).count()
+    )).count()
     
-    # Payment model doesn't have a posted field, so we'll count all pending payments
-    unposted_payments = Payment.objects.filter(
+    # Payment model doesn't have a posted field, so we'll count pending payments without an entry
+    unposted_payments = unposted(Payment.objects.filter(
         status__in=['pending', 'processing']
-    ).count()
+    )).count()
     
     context = {
         'company': company,
@@ -106,6 +95,7 @@ def accounting_dashboard(request):
         'unposted_purchases': unposted_purchases,
         'unposted_payments': unposted_payments,
         'current_month': today.strftime('%B %Y'),
+        'trend': trend,
     }
     
     return render(request, 'accounting/dashboard.html', context)
@@ -120,28 +110,9 @@ def chart_of_accounts(request):
         return redirect('accounting:dashboard')
     
     # Get all accounts with calculated balances
-    accounts = LedgerAccount.objects.filter(
-        company=company
-    ).order_by('type', 'code')
-    
-    # Calculate balance for each account
-    accounts_with_balance = []
-    for account in accounts:
-        lines = JournalLine.objects.filter(account=account, entry__posted=True)
-        total_debit = lines.aggregate(Sum('debit'))['debit__sum'] or Decimal('0')
-        total_credit = lines.aggregate(Sum('credit'))['credit__sum'] or Decimal('0')
-        
-        if account.type in ['ASSET', 'EXPENSE']:
-            balance = total_debit - total_credit
-        else:
-            balance = total_credit - total_debit
-        
-        accounts_with_balance.append({
-            'account': account,
-            'debit': total_debit,
-            'credit': total_credit,
-            'balance': balance
-        })
+    accounts_with_balance = sorted(
+        reports.account_totals(company), key=lambda item: item['account'].type
+    )
     
     # Group by type
     grouped_accounts = {}
@@ -189,6 +160,8 @@ def general_ledger(request):
                             approved_count += 1
                 except JournalEntry.DoesNotExist:
                     pass
+                except ValidationError as e:
+                    messages.error(request, f"Journal Entry #{entry_id}: {' '.join(e.messages)}")
             
             if approved_count > 0:
                 messages.success(request, f"Successfully approved {approved_count} journal entries.")
@@ -197,47 +170,12 @@ def general_ledger(request):
         
         return redirect('accounting:general_ledger')
     
-    # Get filter parameters
-    account_id = request.GET.get('account')
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    status_filter = request.GET.get('status', 'all')  # all, posted, draft
-    
-    # Base query
-    entries = JournalEntry.objects.filter(
-        company=company
-    ).select_related('customer', 'supplier').prefetch_related('lines__account')
-    
-    # Apply status filter
-    if status_filter == 'posted':
-        entries = entries.filter(posted=True)
-    elif status_filter == 'draft':
-        entries = entries.filter(posted=False)
-    
-    # Apply filters
-    if date_from:
-        entries = entries.filter(date__gte=date_from)
-    if date_to:
-        entries = entries.filter(date__lte=date_to)
-    if account_id:
-        entries = entries.filter(lines__account_id=account_id).distinct()
-    
-    entries = entries.order_by('-date', '-id')
-    
-    # Add totals to each entry
-    entries_with_totals = []
-    for entry in entries:
-        lines = entry.lines.all()
-        total_debit = sum(line.debit for line in lines if line.debit)
-        total_credit = sum(line.credit for line in lines if line.credit)
-        entry.total_debit = total_debit
-        entry.total_credit = total_credit
-        entries_with_totals.append(entry)
-    
-    # Pagination
-    paginator = Paginator(entries_with_totals, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    filters = _ledger_filters(request)
+    page = ledger.ledger_page(
+        ledger.ledger_entries(company, **filters),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
     
     # Get accounts for filter dropdown
     accounts = LedgerAccount.objects.filter(
@@ -247,17 +185,131 @@ def general_ledger(request):
     
     context = {
         'company': company,
-        'page_obj': page_obj,
+        'page_obj': page['entries'],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor'],
+        'filter_query': _ledger_filter_query(filters),
         'accounts': accounts,
-        'selected_account': account_id,
-        'date_from': date_from,
-        'date_to': date_to,
-        'status_filter': status_filter,
+        'selected_account': filters['account_id'],
+        'date_from': filters['date_from'],
+        'date_to': filters['date_to'],
+        'status_filter': filters['status'],
     }
     
     return render(request, 'accounting/general_ledger.html', context)
 
 
+def _ledger_filters(request):
+    return {
+        'account_id': request.GET.get('account'),
+        'date_from': request.GET.get('date_from'),
+        'date_to': request.GET.get('date_to'),
+        'status': request.GET.get('status', 'all'),  # all, posted, draft
+    }
+
+
+def _ledger_filter_query(filters):
+    """Filter part of the query string, reused by the pagination links"""
+    params = {
+        'account': filters['account_id'],
+        'date_from': filters['date_from'],
+        'date_to': filters['date_to'],
+        'status': filters['status'],
+    }
+    return urlencode({key: value for key, value in params.items() if value})
+
+
+@staff_member_required
+def general_ledger_rows(request):
+    """
+    One page of general ledger entries for infinite scrolling.
+    HTMX requests get table rows, other requests get JSON.
+    """
+    company = Company.objects.first()
+    if not company:
+        return JsonResponse({'error': 'No company found.'}, status=404)
+    
+    filters = _ledger_filters(request)
+    page = ledger.ledger_page(
+        ledger.ledger_entries(company, **filters),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    
+    if request.headers.get('HX-Request'):
+        return render(request, 'accounting/partials/general_ledger_rows.html', {
+            'page_obj': page['entries'],
+            'next_cursor': page['next_cursor'],
+            'filter_query': _ledger_filter_query(filters),
+            'hx_more': True,
+        })
+    
+    return JsonResponse({
+        'entries': [
+            {
+                'id': entry.id,
+                'date': entry.date.isoformat(),
+                'posted': entry.posted,
+                'memo': entry.memo,
+                'customer': str(entry.customer) if entry.customer else None,
+                'supplier': entry.supplier.name if entry.supplier else None,
+                'total_debit': str(entry.total_debit),
+                'total_credit': str(entry.total_credit),
+                'lines': [
+                    {
+                        'account': line.account.code,
+                        'account_name': line.account.name,
+                        'debit': str(line.debit),
+                        'credit': str(line.credit),
+                        'description': line.description,
+                    }
+                    for line in entry.lines.all()
+                ],
+            }
+            for entry in page['entries']
+        ],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor'],
+    })
+
+
+@staff_member_required
+def general_ledger_export(request):
+    """Stream the general ledger lines (same filters as the screen) as CSV or XLSX"""
+    company = Company.objects.first()
+    if not company:
+        messages.error(request, "No company found.")
+        return redirect('accounting:dashboard')
+    
+    entries = ledger.ledger_entries(company, **_ledger_filters(request))
+    return exports.export_response(
+        _export_format(request),
+        'general_ledger',
+        exports.GENERAL_LEDGER_HEADER,
+        exports.general_ledger_rows(entries),
+    )
+
+
+def _export_format(request):
+    fmt = request.GET.get('format', 'csv')
+    return fmt if fmt in exports.FORMATS else 'csv'
+
+
+def _export_dates(request):
+    """
+    (date_from, date_to) from the query string as dates (None when absent).
+    Raises ValueError for a malformed date, before a streamed export starts.
+    """
+    dates = []
+    for name in ('date_from', 'date_to'):
+        value = request.GET.get(name)
+        try:
+            dates.append(datetime.strptime(value, '%Y-%m-%d').date() if value else None)
+        except ValueError:
+            raise ValueError(f"Invalid {name} {value!r}: use YYYY-MM-DD.")
+    return dates
+
+
 @staff_member_required
 def journal_entry_detail(request, pk):
     """View details of a journal entry"""
@@ -276,14 +328,20 @@ def journal_entry_detail(request, pk):
             if total_debit != total_credit:
                 messages.error(request, f"Cannot approve unbalanced entry. Debit: ${total_debit}, Credit: ${total_credit}")
             else:
-                entry.posted = True
-                entry.save()
-                messages.success(request, f"Journal Entry #{entry.id} has been approved and posted.")
+                try:
+                    entry.posted = True
+                    entry.save()
+                    messages.success(request, f"Journal Entry #{entry.id} has been approved and posted.")
+                except ValidationError as e:
+                    messages.error(request, ' '.join(e.messages))
         
         elif action == 'unapprove':
-            entry.posted = False
-            entry.save()
-            messages.warning(request, f"Journal Entry #{entry.id} has been unapproved and unposted.")
+            try:
+                entry.posted = False
+                entry.save()
+                messages.warning(request, f"Journal Entry #{entry.id} has been unapproved and unposted.")
+            except ValidationError as e:
+                messages.error(request, ' '.join(e.messages))
         
         return redirect('accounting:journal_entry_detail', pk=pk)
     
@@ -347,63 +405,11 @@ def trial_balance(request):
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
-    # Get all active accounts
-    accounts = LedgerAccount.objects.filter(
-        company=company,
-        is_active=True
-    ).order_by('code')
-    
-    # Calculate balances
-    trial_balance_data = []
-    total_debit = Decimal('0')
-    total_credit = Decimal('0')
-    
-    for account in accounts:
-        # Base query for journal lines
-        lines_query = JournalLine.objects.filter(
-            account=account,
-            entry__posted=True
-        )
-        
-        # Apply date filters
-        if date_from:
-            lines_query = lines_query.filter(entry__date__gte=date_from)
-        if date_to:
-            lines_query = lines_query.filter(entry__date__lte=date_to)
-        
-        # Calculate totals
-        account_debit = lines_query.aggregate(Sum('debit'))['debit__sum'] or Decimal('0')
-        account_credit = lines_query.aggregate(Sum('credit'))['credit__sum'] or Decimal('0')
-        
-        # Skip accounts with no activity
-        if account_debit == 0 and account_credit == 0:
-            continue
-        
-        # Determine debit or credit balance based on account type
-        if account.type in ['ASSET', 'EXPENSE']:
-            debit_balance = account_debit - account_credit
-            credit_balance = Decimal('0') if debit_balance >= 0 else abs(debit_balance)
-            debit_balance = max(debit_balance, Decimal('0'))
-        else:
-            credit_balance = account_credit - account_debit
-            debit_balance = Decimal('0') if credit_balance >= 0 else abs(credit_balance)
-            credit_balance = max(credit_balance, Decimal('0'))
-        
-        trial_balance_data.append({
-            'account': account,
-            'debit': debit_balance,
-            'credit': credit_balance
-        })
-        
-        total_debit += debit_balance
-        total_credit += credit_balance
+    report = reports.trial_balance(company, date_from, date_to)
     
     context = {
         'company': company,
-        'trial_balance_data': trial_balance_data,
-        'total_debit': total_debit,
-        'total_credit': total_credit,
-        'is_balanced': total_debit == total_credit,
+        **report,
         'date_from': date_from,
         'date_to': date_to,
     }
@@ -411,6 +417,47 @@ def trial_balance(request):
     return render(request, 'accounting/trial_balance.html', context)
 
 
+@staff_member_required
+def trial_balance_export(request):
+    """Trial balance as CSV or XLSX"""
+    company = Company.objects.first()
+    if not company:
+        messages.error(request, "No company found.")
+        return redirect('accounting:dashboard')
+    
+    report = reports.trial_balance(
+        company, request.GET.get('date_from'), request.GET.get('date_to')
+    )
+    return exports.export_response(
+        _export_format(request),
+        'trial_balance',
+        exports.TRIAL_BALANCE_HEADER,
+        exports.trial_balance_rows(report),
+    )
+
+
+@staff_member_required
+def account_ledger_export(request, pk):
+    """Posted lines of one account with a running balance, as CSV or XLSX"""
+    company = Company.objects.first()
+    if not company:
+        messages.error(request, "No company found.")
+        return redirect('accounting:dashboard')
+    
+    account = get_object_or_404(LedgerAccount, pk=pk, company=company)
+    # Validate up front: once the streamed response has started, an error can only truncate it
+    try:
+        date_from, date_to = _export_dates(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return exports.export_response(
+        _export_format(request),
+        f'account_{account.code}',
+        exports.ACCOUNT_LEDGER_HEADER,
+        exports.account_ledger_rows(company, account, date_from, date_to),
+    )
+
+
 @staff_member_required
 def income_statement(request):
     """Income statement (P&L) report"""
@@ -431,65 +478,11 @@ def income_statement(request):
         today = timezone.now().date()
         date_to = today.strftime('%Y-%m-%d')
     
-    # Revenue accounts
-    revenue_accounts = LedgerAccount.objects.filter(
-        company=company,
-        type='REVENUE',
-        is_active=True
-    ).order_by('code')
-    
-    revenue_data = []
-    total_revenue = Decimal('0')
-    
-    for account in revenue_accounts:
-        lines = JournalLine.objects.filter(
-            account=account,
-            entry__posted=True,
-            entry__date__gte=date_from,
-            entry__date__lte=date_to
-        )
-        amount = lines.aggregate(
-            total=Coalesce(Sum('credit'), Decimal('0')) - Coalesce(Sum('debit'), Decimal('0'))
-        )['total']
-        
-        if amount != 0:
-            revenue_data.append({'account': account, 'amount': amount})
-            total_revenue += amount
-    
-    # Expense accounts
-    expense_accounts = LedgerAccount.objects.filter(
-        company=company,
-        type='EXPENSE',
-        is_active=True
-    ).order_by('code')
-    
-    expense_data = []
-    total_expenses = Decimal('0')
-    
-    for account in expense_accounts:
-        lines = JournalLine.objects.filter(
-            account=account,
-            entry__posted=True,
-            entry__date__gte=date_from,
-            entry__date__lte=date_to
-        )
-        amount = lines.aggregate(
-            total=Coalesce(Sum('debit'), Decimal('0')) - Coalesce(Sum('credit'), Decimal('0'))
-        )['total']
-        
-        if amount != 0:
-            expense_data.append({'account': account, 'amount': amount})
-            total_expenses += amount
-    
-    net_income = total_revenue - total_expenses
+    report = reports.income_statement(company, date_from, date_to)
     
     context = {
         'company': company,
-        'revenue_data': revenue_data,
-        'expense_data': expense_data,
-        'total_revenue': total_revenue,
-        'total_expenses': total_expenses,
-        'net_income': net_income,
+        **report,
         'date_from': date_from,
         'date_to': date_to,
     }
@@ -508,83 +501,94 @@ def balance_sheet(request):
     # Get as-of date
     as_of_date = request.GET.get('as_of_date', timezone.now().date().strftime('%Y-%m-%d'))
     
-    def get_accounts_balance(account_type):
-        accounts = LedgerAccount.objects.filter(
-            company=company,
-            type=account_type,
-            is_active=True
-        ).order_by('code')
-        
-        data = []
-        total = Decimal('0')
-        
-        for account in accounts:
-            lines = JournalLine.objects.filter(
-                account=account,
-                entry__posted=True,
-                entry__date__lte=as_of_date
-            )
-            
-            debit_total = lines.aggregate(Sum('debit'))['debit__sum'] or Decimal('0')
-            credit_total = lines.aggregate(Sum('credit'))['credit__sum'] or Decimal('0')
-            
-            if account_type in ['ASSET', 'EXPENSE']:
-                balance = debit_total - credit_total
-            else:
-                balance = credit_total - debit_total
-            
-            if balance != 0:
-                data.append({'account': account, 'balance': balance})
-                total += balance
-        
-        return data, total
-    
-    # Get balances by type
-    assets_data, total_assets = get_accounts_balance('ASSET')
-    liabilities_data, total_liabilities = get_accounts_balance('LIABILITY')
-    equity_data, total_equity_accounts = get_accounts_balance('EQUITY')
-    
-    # Calculate retained earnings (sum of all revenue - expenses up to date)
-    revenue_lines = JournalLine.objects.filter(
-        account__company=company,
-        account__type='REVENUE',
-        entry__posted=True,
-        entry__date__lte=as_of_date
-    )
-    revenue_total = revenue_lines.aggregate(
-        total=Coalesce(Sum('credit'), Decimal('0')) - Coalesce(Sum('debit'), Decimal('0'))
-    )['total']
-    
-    expense_lines = JournalLine.objects.filter(
-        account__company=company,
-        account__type='EXPENSE',
-        entry__posted=True,
-        entry__date__lte=as_of_date
-    )
-    expense_total = expense_lines.aggregate(
-        total=Coalesce(Sum('debit'), Decimal('0')) - Coalesce(Sum('credit'), Decimal('0'))
-    )['total']
-    
-    retained_earnings = revenue_total - expense_total
-    total_equity = total_equity_accounts + retained_earnings
+    report = reports.balance_sheet(company, as_of_date)
     
     context = {
         'company': company,
-        'assets_data': assets_data,
-        'liabilities_data': liabilities_data,
-        'equity_data': equity_data,
-        'total_assets': total_assets,
-        'total_liabilities': total_liabilities,
-        'total_equity': total_equity,
-        'retained_earnings': retained_earnings,
-        'total_liabilities_equity': total_liabilities + total_equity,
+        **report,
         'as_of_date': as_of_date,
-        'is_balanced': abs(total_assets - (total_liabilities + total_equity)) < Decimal('0.01'),
     }
     
     return render(request, 'accounting/balance_sheet.html', context)
 
 
+@staff_member_required
+def cash_flow_statement(request):
+    """Cash flow statement (indirect method) built from the daily rollup"""
+    company = Company.objects.first()
+    if not company:
+        messages.error(request, "No company found.")
+        return redirect('accounting:dashboard')
+    
+    today = timezone.now().date()
+    try:
+        date_from = datetime.strptime(request.GET.get('date_from', ''), '%Y-%m-%d').date()
+    except ValueError:
+        date_from = today.replace(day=1)
+    try:
+        date_to = datetime.strptime(request.GET.get('date_to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        date_to = today
+    
+    report = rollups.cash_flow_statement(company, date_from, date_to)
+    
+    context = {
+        'company': company,
+        **report,
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+    }
+    
+    return render(request, 'accounting/cash_flow.html', context)
+
+
+def _aging_params(request):
+    kind = 'ap' if request.GET.get('kind') == 'ap' else 'ar'
+    try:
+        as_of = datetime.strptime(request.GET.get('as_of', ''), '%Y-%m-%d').date()
+    except ValueError:
+        as_of = timezone.now().date()
+    return kind, as_of
+
+
+@staff_member_required
+def aging_report(request):
+    """Aged receivables (by invoice due date) or payables (by PO order date)"""
+    kind, as_of = _aging_params(request)
+    if kind == 'ap':
+        report = aging.payables_aging(as_of)
+    else:
+        report = aging.receivables_aging(as_of)
+    
+    context = {
+        **report,
+        'kind': kind,
+        'as_of': as_of.strftime('%Y-%m-%d'),
+    }
+    
+    return render(request, 'accounting/aging.html', context)
+
+
+@staff_member_required
+def aging_export(request):
+    """Aging summary per party, or one row per open document with ?detail=1"""
+    kind, as_of = _aging_params(request)
+    fmt = _export_format(request)
+    filename = f"{'payables' if kind == 'ap' else 'receivables'}_aging_{as_of:%Y%m%d}"
+    
+    if request.GET.get('detail'):
+        if kind == 'ap':
+            header, rows = exports.AP_DETAIL_HEADER, aging.payable_detail_rows(as_of)
+        else:
+            header, rows = exports.AR_DETAIL_HEADER, aging.receivable_detail_rows(as_of)
+        return exports.export_response(fmt, f'{filename}_detail', header, rows)
+    
+    report = aging.payables_aging(as_of) if kind == 'ap' else aging.receivables_aging(as_of)
+    return exports.export_response(
+        fmt, filename, exports.AGING_SUMMARY_HEADER, exports.aging_summary_rows(report)
+    )
+
+
 @staff_member_required
 def post_documents(request):
     """Post unposted documents to the general ledger"""
@@ -594,33 +598,10 @@ def post_documents(request):
             messages.error(request, "No company found.")
             return redirect('accounting:dashboard')
         
-        posted_count = {
-            'invoices': 0,
-            'purchases': 0,
-            'payments': 0
-        }
-        
         # Post unposted invoices
         unposted_invoices = Invoice.objects.filter(
             Q(is_posted__isnull=True) | Q(is_posted=False)
         )
-        for invoice in unposted_invoices:
-            try:
-                # Add company to invoice if not present
-                if not hasattr(invoice, 'company'):
-                    invoice.company = company
-                invoice.subtotal = invoice.subtotal
-                invoice.tax = invoice.tax_amount
-                invoice.total = invoice.total_amount
-                invoice.date = invoice.invoice_date
-                post_sale(invoice)
-                invoice.is_posted = True
-                invoice.posted_at = timezone.now()
-                invoice.save(update_fields=['is_posted', 'posted_at'])
-                posted_count['invoices'] += 1
-            except Exception as e:
-                messages.error(request, f"Error posting invoice {invoice.pk}: {str(e)}")
-        
         # Post unposted purchase orders (only approved ones, not drafts)
         unposted_purchases = PurchaseOrder.objects.filter(
             Q(is_posted__isnull=True) | Q(is_posted=False)
@@ -629,39 +610,25 @@ def post_documents(request):
         ).exclude(
             accounting_status='DRAFT'  # Also exclude accounting draft status
         )
-        for purchase in unposted_purchases:
-            try:
-                if not hasattr(purchase, 'company'):
-                    purchase.company = company
-                purchase.subtotal = purchase.subtotal
-                purchase.tax = purchase.tax_amount
-                purchase.total = purchase.total_amount
-                purchase.date = purchase.order_date
-                post_purchase(purchase)
-                purchase.is_posted = True
-                purchase.posted_at = timezone.now()
-                purchase.save(update_fields=['is_posted', 'posted_at'])
-                posted_count['purchases'] += 1
-            except Exception as e:
-                messages.error(request, f"Error posting purchase order {purchase.pk}: {str(e)}")
-        
         # Post unposted payments (using status field instead of posted)
         unposted_payments = Payment.objects.filter(
             status__in=['pending', 'processing']
         )
-        for payment in unposted_payments:
-            try:
-                if not hasattr(payment, 'company'):
-                    payment.company = company
-                payment.date = payment.payment_date
-                payment.sale = payment.invoice  # Map invoice to sale
-                post_incoming_payment(payment)
-                # Mark payment as completed instead of using posted field
-                payment.status = 'completed'
-                payment.save(update_fields=['status'])
-                posted_count['payments'] += 1
-            except Exception as e:
-                messages.error(request, f"Error posting payment {payment.pk}: {str(e)}")
+        
+        results = {
+            'invoices': bulk_post_sales(unposted_invoices, company),
+            'purchases': bulk_post_purchases(unposted_purchases, company),
+            'payments': bulk_post_incoming_payments(unposted_payments, company),
+        }
+        labels = {'invoices': 'invoice', 'purchases': 'purchase order', 'payments': 'payment'}
+        posted_count = {}
+        for key, result in results.items():
+            posted_count[key] = result['posted'] + result['already_posted']
+            failed = result['failed']
+            for doc, error in failed[:10]:
+                messages.error(request, f"Error posting {labels[key]} {doc.pk}: {error}")
+            if len(failed) > 10:
+                messages.error(request, f"... and {len(failed) - 10} more {labels[key]} errors.")
         
         # Success message
         total_posted = sum(posted_count.values())
@@ -678,16 +645,17 @@ def post_documents(request):
         return redirect('accounting:dashboard')
     
     # GET request - show confirmation page
-    unposted_invoices = Invoice.objects.filter(
+    # Posting state is resolved against the ledger in the same query (see services.unposted)
+    unposted_invoices = unposted(Invoice.objects.filter(
         Q(is_posted__isnull=True) | Q(is_posted=False)
-    )
-    unposted_purchases = PurchaseOrder.objects.filter(
+    )).select_related('customer')
+    unposted_purchases = unposted(PurchaseOrder.objects.filter(
         Q(is_posted__isnull=True) | Q(is_posted=False)
-    )
+    )).select_related('supplier')
     # Payment model doesn't have a posted field, use status instead
-    unposted_payments = Payment.objects.filter(
+    unposted_payments = unposted(Payment.objects.filter(
         status__in=['pending', 'processing']
-    )
+    )).select_related('invoice__customer')
     
     context = {
         'unposted_invoices': unposted_invoices,
@@ -828,6 +796,103 @@ def expense_create(request):
     return render(request, 'accounting/expense_form.html', context)
 
 
+@staff_member_required
+def expense_import(request):
+    """Import a month of card/bank expenses (CSV, or ZIP with receipts) and post them in bulk"""
+    from .expense_import import import_expenses
+    from .forms import ExpenseImportForm
+
+    company = Company.objects.first()
+    if not company:
+        messages.error(request, "No company found.")
+        return redirect('accounting:dashboard')
+
+    errors = []
+    if request.method == 'POST':
+        form = ExpenseImportForm(request.POST, request.FILES, company=company)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_expenses(
+                    company,
+                    upload,
+                    file_name=upload.name,
+                    user=request.user,
+                    financial_account=form.cleaned_data['financial_account'],
+                    default_category=form.cleaned_data['default_category'],
+                    post=form.cleaned_data['post'],
+                )
+            except ValidationError as e:
+                errors = e.messages
+            else:
+                message = f"Imported {result['created']} expense(s)"
+                if form.cleaned_data['post']:
+                    message += f", posted {result['posted']}"
+                messages.success(request, message + '.')
+                for expense, reason in result['failed'][:10]:
+                    messages.warning(request, f'{expense.expense_number}: {reason}')
+                return redirect('accounting:expense_list')
+    else:
+        form = ExpenseImportForm(company=company)
+
+    context = {
+        'form': form,
+        'errors': errors,
+        'company': company,
+    }
+    return render(request, 'accounting/expense_import.html', context)
+
+
+@staff_member_required
+def payment_import(request):
+    """Import a bank remittance file, match the payments to open invoices and post them in bulk"""
+    from .forms import PaymentImportForm
+    from .payment_import import import_payments
+
+    company = Company.objects.first()
+    if not company:
+        messages.error(request, "No company found.")
+        return redirect('accounting:dashboard')
+
+    errors = []
+    result = None
+    if request.method == 'POST':
+        form = PaymentImportForm(request.POST, request.FILES, company=company)
+        if form.is_valid():
+            try:
+                result = import_payments(
+                    company,
+                    form.cleaned_data['file'],
+                    user=request.user,
+                    financial_account=form.cleaned_data['financial_account'],
+                    default_method=form.cleaned_data['default_method'],
+                    post=form.cleaned_data['post'],
+                )
+            except ValidationError as e:
+                errors = e.messages
+            else:
+                message = f"Imported {result['created']} payment(s) totalling ${result['amount']:,.2f}"
+                if form.cleaned_data['post']:
+                    message += f", posted {result['posted']}"
+                messages.success(request, message + '.')
+                for payment, reason in result['failed'][:10]:
+                    messages.warning(request, f'{payment.payment_number}: {reason}')
+                if result['unmatched']:
+                    messages.warning(request, f"{len(result['unmatched'])} row(s) need review.")
+                # Unmatched rows are shown below the form rather than after a redirect
+                form = PaymentImportForm(company=company)
+    else:
+        form = PaymentImportForm(company=company)
+
+    context = {
+        'form': form,
+        'errors': errors,
+        'result': result,
+        'company': company,
+    }
+    return render(request, 'accounting/payment_import.html', context)
+
+
 @staff_member_required
 def expense_update(request, pk):
     """Update an existing expense"""
@@ -174,6 +174,10 @@ DATABASES = {
     }
 }
 
+# Cache alias shared by all workers for invalidating accounting lookups
+# (PostingRule / LedgerAccount). Unset: per-process invalidation only.
+ACCOUNTING_LOOKUP_CACHE = os.getenv("ACCOUNTING_LOOKUP_CACHE") or None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -226,6 +230,14 @@ WHITENOISE_USE_FINDERS = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Rendered invoice/packing slip PDFs (sales.pdf). Kept outside MEDIA_ROOT so they are only
+# reachable through the views; the directory can be emptied at any time.
+INVOICE_PDF_CACHE_DIR = Path(os.getenv("INVOICE_PDF_CACHE_DIR", BASE_DIR / "cache" / "invoice_pdfs"))
+INVOICE_PDF_WORKERS = int(os.getenv("INVOICE_PDF_WORKERS", "2"))
+
+# Seconds the invoice stat cards (sales.stats) stay cached; saving an invoice clears them.
+INVOICE_STATS_TTL = int(os.getenv("INVOICE_STATS_TTL", "60"))
+
 # Django Vite Settings
 DJANGO_VITE = {
     "default": {
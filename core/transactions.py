@@ -0,0 +1,49 @@
+"""
+One on_commit callback per key and transaction.
+
+Signal handlers that fire once per row (payments, search documents, lookup invalidation)
+register a single callback with on_commit_once() and add their work to it, so a
+transaction that touches many rows does the work once, on commit.
+
+A callback only counts as queued while Django still holds it: rolling back the
+transaction, or the savepoint it was registered in, drops it, and the next call
+registers a fresh one.
+"""
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+_local = threading.local()
+
+
+def _holds(connection, callback):
+    # on_commit stores each callback together with its savepoint ids; the layout of those
+    # entries differs between Django versions, so only look for the callback itself
+    for hook in connection.run_on_commit:
+        if hook is callback or (isinstance(hook, tuple) and any(item is callback for item in hook)):
+            return True
+    return False
+
+
+def queued(key, using=DEFAULT_DB_ALIAS):
+    """The callback registered under `key` that still waits for the current transaction, or None."""
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        return None
+    callback = getattr(_local, "callbacks", {}).get((using, key))
+    if callback is None or not _holds(connection, callback):
+        return None
+    return callback
+
+
+def on_commit_once(key, factory, using=DEFAULT_DB_ALIAS):
+    """
+    The callback queued under `key` in the current transaction; if there is none, register
+    factory() with on_commit and return it. Must be called inside a transaction.
+    """
+    callback = queued(key, using)
+    if callback is None:
+        callback = factory()
+        _local.callbacks = {**getattr(_local, "callbacks", {}), (using, key): callback}
+        transaction.on_commit(callback, using=using)
+    return callback
@@ -10,6 +10,7 @@ from django.utils import timezone
 
 from customer.models import Customer, CustomerAddress
 from sales.models import Invoice, InvoiceShipment
+from sales.stats import invoice_stats
 from .forms import ProfileForm, AddressForm, CompanyInfoForm, ProfileImageForm
 from .models import Notification
 
@@ -22,9 +23,6 @@ def test_view(request):
 @login_required
 def dashboard(request):
     """Customer dashboard overview"""
-    from django.db.models import Sum, Count, Avg, Q
-    from datetime import datetime, timedelta
-    
     # Get or create customer profile
     customer, created = Customer.objects.get_or_create(
         user=request.user,
@@ -44,21 +42,13 @@ def dashboard(request):
     # Get recent orders
     recent_orders = all_orders.order_by("-created_at")[:5]
     
-    # Calculate statistics
-    total_orders = all_orders.count()
-    pending_orders = all_orders.filter(status="pending").count()
-    completed_orders = all_orders.filter(status="paid").count()
-    
-    # Calculate total spent
-    total_spent = all_orders.filter(status="paid").aggregate(
-        total=Sum("total_amount")
-    )["total"] or 0
-    
-    # Get orders from last 30 days
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_order_count = all_orders.filter(
-        created_at__gte=thirty_days_ago
-    ).count()
+    # Calculate statistics (one cached aggregate, see sales.stats)
+    stats = invoice_stats(customer=customer, user=request.user, statuses=["pending"])
+    total_orders = stats["count"]
+    pending_orders = stats["status_counts"]["pending"]
+    completed_orders = stats["paid_count"]
+    total_spent = stats["paid_amount"]
+    recent_order_count = stats["recent_count"]
     
     # Get saved addresses
     saved_addresses = CustomerAddress.objects.filter(
@@ -108,9 +98,6 @@ def dashboard(request):
 @login_required
 def order_list(request):
     """List all orders for the logged-in customer"""
-    from django.db.models import Sum, Count
-    from datetime import datetime, timedelta
-    
     customer = Customer.objects.filter(user=request.user).first()
     # Get all orders for the user
     # order_queryset = Invoice.objects.filter(user=request.user).order_by("-created_at")
@@ -124,22 +111,24 @@ def order_list(request):
         # )
     )
     
-    # Calculate statistics
-    total_orders = order_queryset.count()
-    total_spent = order_queryset.filter(status="paid").aggregate(
-        total=Sum("total_amount")
-    )["total"] or 0
+    # Calculate statistics (one cached aggregate, see sales.stats)
+    stats = invoice_stats(
+        customer=customer,
+        user=request.user,
+        statuses=["pending", "processing", "shipped", "cancelled"],
+    )
+    total_orders = stats["count"]
+    total_spent = stats["paid_amount"]
     
     # Status counts
-    pending_count = order_queryset.filter(status="pending").count()
-    processing_count = order_queryset.filter(status="processing").count()
-    paid_count = order_queryset.filter(status="paid").count()
-    shipped_count = order_queryset.filter(status="shipped").count()
-    cancelled_count = order_queryset.filter(status="cancelled").count()
+    pending_count = stats["status_counts"]["pending"]
+    processing_count = stats["status_counts"]["processing"]
+    paid_count = stats["paid_count"]
+    shipped_count = stats["status_counts"]["shipped"]
+    cancelled_count = stats["status_counts"]["cancelled"]
     
     # Recent orders (last 30 days)
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_count = order_queryset.filter(created_at__gte=thirty_days_ago).count()
+    recent_count = stats["recent_count"]
 
     # Pagination
     paginator = Paginator(order_queryset, 10)
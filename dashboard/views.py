@@ -12,6 +12,7 @@ from blog.models import Post
 from blog.forms import PostForm
 from email_campaign.models import EmailCampaign, TargetGroup
 from customer_portal.models import Notification
+from sales.stats import invoice_stats
 from datetime import datetime, timedelta
 
 User = get_user_model()
@@ -50,7 +51,11 @@ def dashboard_home(request):
     published_posts = Post.objects.filter(author=request.user, status='published').count()
     draft_posts = Post.objects.filter(author=request.user, status='draft').count()
     
+    # Sales cards for the current month (cached, see sales.stats)
+    invoice_month = invoice_stats(month=datetime.now().date())
+    
     context = {
+        'invoice_month': invoice_month,
         'total_customers': total_customers,
         'active_customers': active_customers,
         'new_customers': new_customers,
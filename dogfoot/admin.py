@@ -1,2 +1,15 @@
+from django.contrib import admin
 
-# Register your models here.
+from .models import DocumentSequence
+
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'period', 'value']
+    list_filter = ['name']
+    search_fields = ['name', 'period']
+    ordering = ['name', '-period']
+
+    def has_add_permission(self, request):
+        # Counters are created on first use by dogfoot.sequences.reserve()
+        return False
@@ -48,3 +48,19 @@ class MegaMenuSub(models.Model):
 
     def __str__(self):
         return self.sub_name
+
+
+class DocumentSequence(models.Model):
+    """Counter behind document numbers (see dogfoot.sequences). One row per (name, period)."""
+
+    name = models.CharField(max_length=20)
+    period = models.CharField(max_length=20, blank=True, default="")
+    value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "period"], name="document_sequence_unique")
+        ]
+
+    def __str__(self):
+        return f"{self.name}-{self.period}: {self.value}" if self.period else f"{self.name}: {self.value}"
@@ -0,0 +1,85 @@
+"""
+Document number sequences.
+
+Numbers are taken from a DocumentSequence row per (name, period), e.g. ("INV", "20250304"),
+with a single UPDATE ... SET value = value + n. The row lock is held until the caller's
+transaction ends, so concurrent requests never get the same number and a rolled-back
+transaction gives its numbers back.
+
+The first time a (name, period) counter is used it starts after the highest number
+already stored in the document table (the `seed` callable), so existing data keeps
+its numbering.
+
+Bulk creators can reserve a block of numbers with reserve() or SequenceBlock; numbers
+reserved but not used are skipped.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DocumentSequence
+
+
+def last_number(queryset, field, prefix):
+    """Highest integer following `prefix` in `field` (0 if none). Used to seed a new counter."""
+    pattern = re.compile(re.escape(prefix) + r"(\d+)$")
+    highest = 0
+    for value in (
+        queryset.filter(**{f"{field}__startswith": prefix})
+        .values_list(field, flat=True)
+        .iterator()
+    ):
+        match = pattern.match(value)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest
+
+
+def reserve(name, period="", count=1, seed=None):
+    """
+    Take `count` consecutive numbers from the (name, period) counter and return them
+    as a range. seed() gives the last number already in use when the counter is new.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    counter = DocumentSequence.objects.filter(name=name, period=period)
+    with transaction.atomic():
+        if not counter.update(value=F("value") + count):
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(
+                        name=name, period=period, value=(seed() if seed else 0) + count
+                    )
+            except IntegrityError:
+                # Another transaction created the counter first
+                counter.update(value=F("value") + count)
+        last = counter.values_list("value", flat=True).get()
+    return range(last - count + 1, last + 1)
+
+
+def next_value(name, period="", seed=None):
+    return reserve(name, period, 1, seed)[0]
+
+
+class SequenceBlock:
+    """
+    Hands out numbers from blocks of `size` reserved at a time, so a worker creating
+    many documents touches the counter row once per block.
+    """
+
+    def __init__(self, name, period="", size=100, seed=None):
+        self.name = name
+        self.period = period
+        self.size = size
+        self.seed = seed
+        self._numbers = iter(())
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        for number in self._numbers:
+            return number
+        self._numbers = iter(reserve(self.name, self.period, self.size, self.seed))
+        return next(self._numbers)
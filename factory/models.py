@@ -4,6 +4,7 @@ from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from decimal import Decimal
+from dogfoot.sequences import last_number, next_value
 from sales.models import Invoice, InvoiceItem
 from product.models import Product, Inventory
 from customer.models import Customer
@@ -175,15 +176,10 @@ class WorkOrder(models.Model):
     def save(self, *args, **kwargs):
         if not self.work_order_number:
             # Generate work order number
-            last_wo = WorkOrder.objects.order_by('-id').first()
-            if last_wo and last_wo.work_order_number.startswith('WO'):
-                try:
-                    last_number = int(last_wo.work_order_number.split('-')[1])
-                    self.work_order_number = f"WO-{last_number + 1:06d}"
-                except (IndexError, ValueError):
-                    self.work_order_number = "WO-000001"
-            else:
-                self.work_order_number = "WO-000001"
+            number = next_value(
+                'WO', seed=lambda: last_number(WorkOrder.objects, 'work_order_number', 'WO-')
+            )
+            self.work_order_number = f"WO-{number:06d}"
         super().save(*args, **kwargs)
     
     @property
@@ -388,15 +384,10 @@ class Shipment(models.Model):
     def save(self, *args, **kwargs):
         if not self.shipment_number:
             # Generate shipment number
-            last_ship = Shipment.objects.order_by('-id').first()
-            if last_ship and last_ship.shipment_number.startswith('SHIP'):
-                try:
-                    last_number = int(last_ship.shipment_number.split('-')[1])
-                    self.shipment_number = f"SHIP-{last_number + 1:06d}"
-                except (IndexError, ValueError):
-                    self.shipment_number = "SHIP-000001"
-            else:
-                self.shipment_number = "SHIP-000001"
+            number = next_value(
+                'SHIP', seed=lambda: last_number(Shipment.objects, 'shipment_number', 'SHIP-')
+            )
+            self.shipment_number = f"SHIP-{number:06d}"
         
         # Copy shipping address from invoice if not set
         if not self.ship_to_name and self.work_order:
@@ -521,15 +512,10 @@ class SupplyRequest(models.Model):
     def save(self, *args, **kwargs):
         if not self.request_number:
             # Generate request number
-            last_sr = SupplyRequest.objects.order_by('-id').first()
-            if last_sr and last_sr.request_number.startswith('SR'):
-                try:
-                    last_number = int(last_sr.request_number.split('-')[1])
-                    self.request_number = f"SR-{last_number + 1:06d}"
-                except (IndexError, ValueError):
-                    self.request_number = "SR-000001"
-            else:
-                self.request_number = "SR-000001"
+            number = next_value(
+                'SR', seed=lambda: last_number(SupplyRequest.objects, 'request_number', 'SR-')
+            )
+            self.request_number = f"SR-{number:06d}"
         super().save(*args, **kwargs)
     
     def approve(self, user, approved_quantity=None):
@@ -30,6 +30,7 @@ urlpatterns = [
     
     # Packing Slip
     path('packing-slip/<int:invoice_id>/', views.packing_slip, name='packing_slip'),
+    path('packing-slip/<int:invoice_id>/pdf/', views.packing_slip_pdf, name='packing_slip_pdf'),
     
     # Ship Order
     path('ship-order/', views.ship_order, name='ship_order'),
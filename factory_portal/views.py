@@ -11,6 +11,7 @@ from django.urls import reverse
 
 from factory.models import FactoryUser, WorkOrder, FulfillmentItem, Shipment, SupplyRequest
 from sales.models import Invoice, InvoiceItem
+from sales.pdf import PDFRenderError, pdf_response, packing_slip_pdf as packing_slip_pdf_file
 from purchases.models import Supplier, PurchaseOrder, PurchaseOrderItem
 from .forms import FactoryProfileForm, WorkOrderUpdateForm, FulfillmentItemForm, ShipmentForm
 from decimal import Decimal
@@ -559,6 +560,23 @@ def packing_slip(request, invoice_id):
     return render(request, 'factory_portal/packing_slip.html', context)
 
 
+@factory_user_required
+def packing_slip_pdf(request, invoice_id):
+    """Packing slip as a PDF (cached per invoice and supplier, without price information)"""
+    factory_user = request.user.factory_profile
+    invoice = get_object_or_404(Invoice, pk=invoice_id)
+
+    if not invoice.items.filter(product__supplier=factory_user.supplier).exists():
+        return HttpResponseForbidden("You don't have access to this packing slip.")
+
+    try:
+        pdf = packing_slip_pdf_file(invoice, factory_user.supplier)
+    except PDFRenderError as e:
+        messages.error(request, str(e))
+        return redirect('factory_portal:packing_slip', invoice_id=invoice.pk)
+    return pdf_response(request, pdf, as_attachment='download' in request.GET)
+
+
 @factory_user_required
 def create_invoice(request):
     """Create a Purchase Order for the factory to bill the dental company"""
@@ -586,13 +604,6 @@ def create_invoice(request):
             messages.error(request, "No items from your supplier found in this order.")
             return redirect('factory_portal:work_order_list')
         
-        # Generate PO number (you might want to customize this format)
-        last_po = PurchaseOrder.objects.order_by('-id').first()
-        if last_po:
-            po_number = f"PO-{last_po.id + 1:06d}"
-        else:
-            po_number = "PO-000001"
-        
         # Prepare notes
         po_notes = f"Purchase Order for Customer Invoice #{invoice.invoice_number}"
         po_notes += f"\n[Invoice ID: {invoice.id}]"  # Store invoice ID for reference
@@ -601,7 +612,6 @@ def create_invoice(request):
         
         # Create the Purchase Order with shipping cost
         purchase_order = PurchaseOrder.objects.create(
-            order_number=po_number,  # Fixed: use order_number instead of purchase_order_number
             supplier=factory_user.supplier,
             status='sent',  # Automatically mark as sent since it's for billing
             order_date=timezone.now().date(),
@@ -648,7 +658,7 @@ def create_invoice(request):
         
         # Create success message
         total_amount = subtotal + shipping_cost
-        success_msg = f'Purchase Order #{po_number} has been created successfully for billing. '
+        success_msg = f'Purchase Order #{purchase_order.order_number} has been created successfully for billing. '
         success_msg += f'Subtotal: ${subtotal:,.2f} (at cost prices)'
         if shipping_cost > 0:
             success_msg += f', Shipping: ${shipping_cost:,.2f}'
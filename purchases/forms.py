@@ -71,13 +71,9 @@ class PurchaseOrderForm(forms.ModelForm):
         if not self.instance.pk:
             # Set default order date to today for new orders
             self.fields['order_date'].initial = date.today()
-            # Generate order number
-            today = date.today()
-            # Count existing orders for today
-            count = PurchaseOrder.objects.filter(
-                order_number__startswith=f"PO-{today.strftime('%Y%m%d')}"
-            ).count() + 1
-            self.fields['order_number'].initial = f"PO-{today.strftime('%Y%m%d')}-{count:03d}"
+            # Left blank, the order number is assigned from the PO sequence on save
+            self.fields['order_number'].required = False
+            self.fields['order_number'].widget.attrs['placeholder'] = 'Assigned when saved'
 
 
 class PurchaseOrderItemForm(forms.ModelForm):
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchases', '0005_supplierpayment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['supplier', 'order_date'], name='purchases_p_supplie_299bf2_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
+from dogfoot.sequences import last_number, next_value
 from product.models import Product
 from decimal import Decimal
 
@@ -163,16 +164,35 @@ class PurchaseOrder(models.Model):
 
     class Meta:
         ordering = ["-order_date", "-created_at"]
+        indexes = [models.Index(fields=["supplier", "order_date"])]  # AP aging
         verbose_name = "Purchase Order"
         verbose_name_plural = "Purchase Orders"
 
     def __str__(self):
         return f"PO {self.order_number} - {self.supplier.name}"
 
-    def calculate_totals(self):
-        """Recalculate order totals from line items"""
-        items = self.items.all()
-        self.subtotal = sum(item.line_total for item in items) or Decimal("0")
+    def save(self, *args, **kwargs):
+        from django.utils import timezone
+
+        # Generate order number if not set
+        if not self.order_number:
+            today = timezone.now().strftime("%Y%m%d")
+            number = next_value(
+                "PO",
+                today,
+                seed=lambda: last_number(
+                    PurchaseOrder.objects, "order_number", f"PO-{today}-"
+                ),
+            )
+            self.order_number = f"PO-{today}-{number:03d}"
+        super().save(*args, **kwargs)
+
+    # Fields written by calculate_totals() / sales.totals.recalculate()
+    TOTAL_FIELDS = ["subtotal", "discount_amount", "tax_amount", "total_amount"]
+
+    def apply_totals(self, subtotal):
+        """Set the total fields from the line items subtotal (no queries, no save)"""
+        self.subtotal = subtotal or Decimal("0")
 
         # Calculate discount
         self.discount_amount = self.subtotal * (self.discount_percent / Decimal("100"))
@@ -184,7 +204,10 @@ class PurchaseOrder(models.Model):
         # Calculate total
         self.total_amount = taxable_amount + self.tax_amount + self.shipping_cost
 
-        self.save()
+    def calculate_totals(self):
+        """Recalculate order totals from line items (one aggregate query, saves only the totals)"""
+        self.apply_totals(self.items.aggregate(total=models.Sum("line_total"))["total"])
+        self.save(update_fields=[*self.TOTAL_FIELDS, "updated_at"])
 
     def update_receive_status(self):
         """Update order status based on received quantities"""
@@ -286,9 +309,9 @@ class SupplierPayment(models.Model):
     posted_at = models.DateTimeField(null=True, blank=True)
 
     def approve(self):
-        from accounting.usecases import approve_and_post_outgoing_payment
+        from accounting.usecases import approve_outgoing_payment
 
-        return approve_and_post_outgoing_payment(self)
+        return approve_outgoing_payment(self)
 
     def __str__(self):
         return f"VendorPayment#{self.pk} {self.date} {self.amount}"
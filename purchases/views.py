@@ -328,14 +328,14 @@ def supplier_payment_create(request, pk):
             
             # Post to accounting ledger
             try:
-                from accounting.services import post_outgoing_payment
+                from accounting.usecases import queue_outgoing_payment
                 
-                # Post the payment to ledger
-                journal_entry = post_outgoing_payment(payment)
+                # Queue for posting; run_posting_worker writes the journal entry
+                queue_outgoing_payment(payment)
                 
                 messages.success(
                     request,
-                    f"Payment of ${payment.amount} recorded successfully and posted to ledger (Journal Entry #{journal_entry.pk})"
+                    f"Payment of ${payment.amount} recorded successfully and queued for posting to the ledger"
                 )
             except Exception as e:
                 messages.warning(
@@ -931,13 +931,6 @@ class PurchaseOrderCreateStep3View(StaffRequiredMixin, TemplateView):
             supplier_id = request.session.get('po_supplier_id')
             supplier = get_object_or_404(Supplier, pk=supplier_id)
             
-            # Generate order number
-            last_order = PurchaseOrder.objects.order_by('-id').first()
-            if last_order:
-                order_number = f"PO-{last_order.id + 1:05d}"
-            else:
-                order_number = "PO-00001"
-            
             # Create purchase order
             order_date_str = request.session.get('po_order_date')
             if order_date_str:
@@ -973,7 +966,6 @@ class PurchaseOrderCreateStep3View(StaffRequiredMixin, TemplateView):
                 discount_percent = Decimal('0')
             
             order = PurchaseOrder.objects.create(
-                order_number=order_number,
                 supplier=supplier,
                 order_date=order_date,
                 expected_delivery_date=expected_delivery_date,
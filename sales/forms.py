@@ -636,23 +636,6 @@ class PaymentForm(forms.ModelForm):
             # Always hide order if not provided
             self.fields["order"].widget = forms.HiddenInput()
 
-    def save(self, commit=True):
-        instance = super().save(commit=False)
-        # Generate payment number if not set
-        if not instance.payment_number:
-            from django.utils import timezone
-
-            now = timezone.now()
-            # Include date and time for uniqueness (YYYYMMDD-HHMMSS format)
-            datetime_str = now.strftime("%Y%m%d-%H%M%S")
-            # Add microseconds for extra uniqueness in case of concurrent requests
-            microseconds = now.strftime("%f")[:3]  # First 3 digits of microseconds
-            instance.payment_number = f"PAY-{datetime_str}-{microseconds}"
-
-        if commit:
-            instance.save()
-        return instance
-
 
 class InvoiceShipmentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.models import Invoice
+from sales.pdf import PDFRenderError, render_invoices, zip_stream
+from sales.views import filter_invoices
+
+
+class Command(BaseCommand):
+    help = ('Render invoice PDFs into the PDF cache across worker processes and optionally '
+            'write them to a ZIP archive')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First invoice date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last invoice date (YYYY-MM-DD)')
+        parser.add_argument('--status', help='Invoice status, or "overdue" as on the invoice list')
+        parser.add_argument('--ids', help='Comma-separated invoice ids')
+        parser.add_argument('--workers', type=int, default=settings.INVOICE_PDF_WORKERS,
+                            help='Worker processes for rendering')
+        parser.add_argument('--output', help='Write the PDFs to this ZIP file (otherwise only fill the cache)')
+
+    def handle(self, *args, **options):
+        params = {key: options[key] for key in ('date_from', 'date_to', 'status') if options[key]}
+        queryset = filter_invoices(Invoice.objects.all(), params)
+        if options['ids']:
+            try:
+                queryset = queryset.filter(pk__in=[int(pk) for pk in options['ids'].split(',')])
+            except ValueError:
+                raise CommandError('--ids must be a comma-separated list of numbers')
+        pks = list(queryset.order_by('invoice_date', 'pk').values_list('pk', flat=True))
+        if not pks:
+            raise CommandError('No invoices match.')
+
+        start = time.perf_counter()
+        pdfs = render_invoices(pks, workers=options['workers'])
+        count = 0
+        try:
+            if options['output']:
+                def counted():
+                    nonlocal count
+                    for pdf in pdfs:
+                        count += 1
+                        yield pdf
+
+                with open(options['output'], 'wb') as f:
+                    for chunk in zip_stream(counted()):
+                        f.write(chunk)
+            else:
+                for count, _ in enumerate(pdfs, start=1):
+                    if options['verbosity'] > 1 and count % 100 == 0:
+                        self.stdout.write(f'  {count}/{len(pks)}')
+        except PDFRenderError as e:
+            raise CommandError(str(e))
+
+        seconds = time.perf_counter() - start
+        if options['output']:
+            message = f"Wrote {count} invoice PDFs to {options['output']} in {seconds:.1f}s."
+        else:
+            message = f'Cached {count} invoice PDFs in {seconds:.1f}s.'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sales.search import DOCUMENTS, rebuild
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the quote/order/invoice search index, e.g. after bulk imports or updates '
+            'that bypass model signals')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', dest='doc_types', action='append', choices=list(DOCUMENTS),
+                            help='Document type to reindex (repeatable; default: all)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = rebuild(options['doc_types'])
+        for doc_type, count in counts.items():
+            self.stdout.write(f'  {doc_type}: {count} entries written')
+        seconds = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt in {seconds:.1f}s.'))
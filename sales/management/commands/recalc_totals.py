@@ -0,0 +1,46 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from sales.totals import CHUNK_SIZE, MODELS, recalculate
+
+
+class Command(BaseCommand):
+    help = ('Recompute subtotal, discount, tax and total of invoices and purchase orders from '
+            'their line items in chunked bulk updates')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=[*MODELS, 'all'], default='all',
+                            help='Documents to recalculate (default: all)')
+        parser.add_argument('--include-posted', action='store_true',
+                            help='Also change documents already posted to the ledger')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Documents per bulk update')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+        parser.add_argument('--dry-run', action='store_true', help='Only count documents whose totals would change')
+
+    def handle(self, *args, **options):
+        names = list(MODELS) if options['model'] == 'all' else [options['model']]
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows one writer at a time; using a single process.'))
+        for name in names:
+            model = apps.get_model(MODELS[name])
+            queryset = model.objects.all()
+            if not options['include_posted']:
+                # Posted totals are already in the ledger; roll the entry back first
+                queryset = queryset.filter(is_posted=False)
+
+            def log(done, total, changed):
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'  {name}: chunk {done}/{total}, {changed} changed')
+
+            documents, changed = recalculate(
+                queryset,
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                dry_run=options['dry_run'],
+                log=log,
+            )
+            verb = 'would change' if options['dry_run'] else 'changed'
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: {documents} checked, {changed} {verb}.'
+            ))
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.sweep import sweep_invoice_status
+
+
+class Command(BaseCommand):
+    help = ('Move invoices between paid, partial, sent and overdue as their payments and due dates '
+            'change, with bulk updates; safe to run every few minutes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Treat this date (YYYY-MM-DD) as today')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the invoices that would change')
+
+    def handle(self, *args, **options):
+        try:
+            today = options['date'] and date.fromisoformat(options['date'])
+        except ValueError:
+            raise CommandError('--date must be given as YYYY-MM-DD')
+
+        counts = sweep_invoice_status(today=today, dry_run=options['dry_run'])
+        verb = 'would move' if options['dry_run'] else 'moved'
+        summary = ', '.join(f'{count} to {status}' for status, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Invoice status sweep {verb} {summary}.'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0011_add_profile_image'),
+        ('sales', '0014_add_financial_account_to_payment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(condition=models.Q(('balance_due__gt', 0)), fields=['customer', 'due_date'], name='invoice_open_ar_idx'),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:01
+
+from django.db import migrations, models
+
+FTS_TABLE = 'sales_searchentry_fts'
+COLUMNS = 'number, customer, items'
+# Same expression as sales.search.PG_VECTOR, so the planner can use the index
+PG_VECTOR = (
+    "setweight(to_tsvector('simple', number), 'A') || "
+    "setweight(to_tsvector('simple', customer), 'B') || "
+    "setweight(to_tsvector('simple', items), 'C')"
+)
+
+SQLITE_CREATE = [
+    # External content table: the text lives in sales_searchentry, FTS5 only keeps the index
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        {COLUMNS}, content='sales_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER sales_searchentry_ai AFTER INSERT ON sales_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, new.number, new.customer, new.items);
+    END""",
+    f"""CREATE TRIGGER sales_searchentry_ad AFTER DELETE ON sales_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS})
+        VALUES ('delete', old.id, old.number, old.customer, old.items);
+    END""",
+    f"""CREATE TRIGGER sales_searchentry_au AFTER UPDATE ON sales_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS})
+        VALUES ('delete', old.id, old.number, old.customer, old.items);
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES (new.id, new.number, new.customer, new.items);
+    END""",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS sales_searchentry_au',
+    'DROP TRIGGER IF EXISTS sales_searchentry_ad',
+    'DROP TRIGGER IF EXISTS sales_searchentry_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+POSTGRES_CREATE = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX sales_searchentry_vector_idx ON sales_searchentry USING gin (({PG_VECTOR}))',
+    'CREATE INDEX sales_searchentry_number_trgm_idx ON sales_searchentry USING gin (number gin_trgm_ops)',
+]
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS sales_searchentry_number_trgm_idx',
+    'DROP INDEX IF EXISTS sales_searchentry_vector_idx',
+]
+
+# doc_type, model, number field, item model, item field pointing at the document
+DOCUMENTS = [
+    ('quote', 'Quote', 'quote_number', 'QuoteItem', 'quote'),
+    ('order', 'Order', 'order_number', 'OrderItem', 'order'),
+    ('invoice', 'Invoice', 'invoice_number', 'InvoiceItem', 'invoice'),
+]
+CUSTOMER_FIELDS = ['customer__first_name', 'customer__last_name', 'customer__company_name', 'customer__email']
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_CREATE)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_CREATE)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_DROP)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_DROP)
+
+
+def backfill_search_entries(apps, schema_editor):
+    SearchEntry = apps.get_model('sales', 'SearchEntry')
+    db = schema_editor.connection.alias
+    for doc_type, model_name, number_field, item_model_name, parent in DOCUMENTS:
+        model = apps.get_model('sales', model_name)
+        item_model = apps.get_model('sales', item_model_name)
+        fields = CUSTOMER_FIELDS + (['first_name', 'last_name', 'email'] if doc_type == 'invoice' else [])
+        pks = list(model.objects.using(db).order_by('pk').values_list('pk', flat=True))
+        for i in range(0, len(pks), 500):
+            texts = {}
+            for pk, number, *names in (
+                model.objects.using(db).filter(pk__in=pks[i:i + 500]).values_list('pk', number_field, *fields)
+            ):
+                texts[pk] = (number, ' '.join(dict.fromkeys(name for name in names if name)), [])
+            for pk, description in (
+                item_model.objects.using(db).filter(**{f'{parent}__in': list(texts)})
+                .order_by(parent, 'pk').values_list(parent, 'description')
+            ):
+                texts[pk][2].append(description)
+            SearchEntry.objects.using(db).bulk_create(
+                SearchEntry(doc_type=doc_type, object_id=pk, number=number, customer=customer, items=' '.join(items))
+                for pk, (number, customer, items) in texts.items()
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0016_invoice_status_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(choices=[('quote', 'Quote'), ('order', 'Order'), ('invoice', 'Invoice')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('number', models.CharField(max_length=50)),
+                ('customer', models.TextField(blank=True)),
+                ('items', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name_plural': 'search entries',
+                'unique_together': {('doc_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_search_entries, migrations.RunPython.noop),
+    ]
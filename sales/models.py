@@ -3,6 +3,7 @@ from django.conf import settings
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from customer.models import Customer
+from dogfoot.sequences import last_number, next_value
 from product.models import Product
 
 
@@ -362,28 +363,18 @@ class Invoice(models.Model):
         import uuid
         from django.utils import timezone
 
-        # Generate invoice number if not set
+        # Generate invoice number if not set (SO- for shop orders, INV- otherwise)
         if not self.invoice_number:
-            if self.is_shop_order:
-                # For shop orders, use SO- prefix
-                today = timezone.now().strftime("%Y%m%d")
-                count = (
-                    Invoice.objects.filter(
-                        invoice_number__startswith=f"SO-{today}"
-                    ).count()
-                    + 1
-                )
-                self.invoice_number = f"SO-{today}-{count:04d}"
-            else:
-                # For regular invoices, use INV- prefix
-                today = timezone.now().strftime("%Y%m%d")
-                count = (
-                    Invoice.objects.filter(
-                        invoice_number__startswith=f"INV-{today}"
-                    ).count()
-                    + 1
-                )
-                self.invoice_number = f"INV-{today}-{count:04d}"
+            prefix = "SO" if self.is_shop_order else "INV"
+            today = timezone.now().strftime("%Y%m%d")
+            number = next_value(
+                prefix,
+                today,
+                seed=lambda: last_number(
+                    Invoice.objects, "invoice_number", f"{prefix}-{today}-"
+                ),
+            )
+            self.invoice_number = f"{prefix}-{today}-{number:04d}"
 
         # Generate tracking code for shop orders if not set
         if self.is_shop_order and not self.tracking_code:
@@ -400,12 +391,12 @@ class Invoice(models.Model):
 
         super().save(*args, **kwargs)
 
-    # ✅ 승인 메서드: 승인 + 전기
+    # ✅ 승인 메서드: 승인 + 전기 대기열 등록(run_posting_worker 가 전기)
     def approve(self):
         # 순환 임포트 방지: 함수 내부에서 import
-        from accounting.usecases import approve_and_post_sale
+        from accounting.usecases import approve_sale
 
-        return approve_and_post_sale(self)
+        return approve_sale(self)
 
     def __str__(self):
         if self.customer:
@@ -436,13 +427,23 @@ class Invoice(models.Model):
         """Alias for compatibility with existing shop templates"""
         return self.invoice_date
 
-    def calculate_totals(self):
-        """Calculate invoice totals from items"""
+    # Fields written by calculate_totals() / sales.totals.recalculate()
+    TOTAL_FIELDS = [
+        "subtotal",
+        "discount_amount",
+        "tax_amount",
+        "shipping_cost",
+        "total_amount",
+        "balance_due",
+    ]
+    # Fields written by recalculate_paid_amount() / sales.paid_amounts
+    PAID_FIELDS = ["paid_amount", "balance_due", "status"]
+
+    def apply_totals(self, subtotal):
+        """Set the total fields from the items subtotal (no queries, no save)"""
         from decimal import Decimal, ROUND_HALF_UP
 
-        self.subtotal = sum(item.line_total for item in self.items.all()) or Decimal(
-            "0"
-        )
+        self.subtotal = subtotal or Decimal("0")
         # Calculate discount amount based on discount percent
         self.discount_amount = self.subtotal * (self.discount_percent / Decimal("100"))
         # Apply discount to subtotal before calculating tax
@@ -469,20 +470,22 @@ class Invoice(models.Model):
         self.balance_due = (self.total_amount - self.paid_amount).quantize(
             Decimal("0.01"), rounding=ROUND_HALF_UP
         )
-        self.save()
 
-    def recalculate_paid_amount(self):
-        """Recalculate the total paid amount from all completed payments"""
+    def calculate_totals(self):
+        """Calculate invoice totals from items (one aggregate query, saves only the totals)"""
         from django.db.models import Sum
-        from decimal import Decimal, ROUND_HALF_UP
 
-        # Calculate total from completed payments only
-        total_paid = self.payments.filter(status="completed").aggregate(
-            total=Sum("amount")
-        )["total"] or Decimal("0")
+        self.apply_totals(self.items.aggregate(total=Sum("line_total"))["total"])
+        self.save(update_fields=[*self.TOTAL_FIELDS, "updated_at"])
+
+    def apply_paid_amount(self, total_paid):
+        """Set paid_amount, balance_due and status from the completed payments total (no queries, no save)"""
+        from decimal import Decimal, ROUND_HALF_UP
 
         # Round to 2 decimal places
-        self.paid_amount = total_paid.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        self.paid_amount = (total_paid or Decimal("0")).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
         self.balance_due = (self.total_amount - self.paid_amount).quantize(
             Decimal("0.01"), rounding=ROUND_HALF_UP
         )
@@ -496,7 +499,15 @@ class Invoice(models.Model):
             # If it was marked as paid but payment was removed/reduced
             self.status = "sent"
 
-        self.save()
+    def recalculate_paid_amount(self):
+        """Recalculate the total paid amount from all completed payments"""
+        from django.db.models import Sum
+
+        # Calculate total from completed payments only
+        self.apply_paid_amount(
+            self.payments.filter(status="completed").aggregate(total=Sum("amount"))["total"]
+        )
+        self.save(update_fields=[*self.PAID_FIELDS, "updated_at"])
 
     def update_status(self):
         """Update invoice status based on payments and due date"""
@@ -516,6 +527,16 @@ class Invoice(models.Model):
 
     class Meta:
         ordering = ["-invoice_date", "-created_at"]
+        indexes = [
+            # AR aging (accounting.aging): only invoices with an open balance
+            models.Index(
+                fields=["customer", "due_date"],
+                condition=models.Q(balance_due__gt=0),
+                name="invoice_open_ar_idx",
+            ),
+            # Status filters and the status sweep (sales.sweep)
+            models.Index(fields=["status", "due_date"], name="invoice_status_due_idx"),
+        ]
 
 
 class InvoiceItem(models.Model):
@@ -651,6 +672,22 @@ class Payment(models.Model):
         customer_name = self.customer.get_full_name() if self.customer else "Anonymous"
         return f"Payment {self.payment_number} - ${self.amount} from {customer_name}"
 
+    def save(self, *args, **kwargs):
+        from django.utils import timezone
+
+        # Generate payment number if not set
+        if not self.payment_number:
+            today = timezone.now().strftime("%Y%m%d")
+            number = next_value(
+                "PAY",
+                today,
+                seed=lambda: last_number(
+                    Payment.objects, "payment_number", f"PAY-{today}-"
+                ),
+            )
+            self.payment_number = f"PAY-{today}-{number:04d}"
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ["-payment_date", "-created_at"]
 
@@ -894,15 +931,13 @@ class InvoiceShipment(models.Model):
     def save(self, *args, **kwargs):
         if not self.shipment_number:
             # Generate shipment number
-            last_shipment = InvoiceShipment.objects.order_by("-id").first()
-            if last_shipment and last_shipment.shipment_number.startswith("SH"):
-                try:
-                    last_number = int(last_shipment.shipment_number[2:])
-                    self.shipment_number = f"SH{last_number + 1:08d}"
-                except (ValueError, IndexError):
-                    self.shipment_number = "SH00000001"
-            else:
-                self.shipment_number = "SH00000001"
+            number = next_value(
+                "SH",
+                seed=lambda: last_number(
+                    InvoiceShipment.objects, "shipment_number", "SH"
+                ),
+            )
+            self.shipment_number = f"SH{number:08d}"
 
         # Copy shipping address from invoice if not set
         if not self.ship_to_name and self.invoice:
@@ -996,3 +1031,30 @@ class ShipmentItem(models.Model):
 
     def __str__(self):
         return f"{self.invoice_item.description} - Qty: {self.quantity_shipped}"
+
+
+class SearchEntry(models.Model):
+    """
+    Search text for one quote, order or invoice: its number, the customer's names, company
+    and email, and the item descriptions. The database full-text index is built on this
+    table (sales.search); signals keep the rows current.
+    """
+
+    DOC_TYPE_CHOICES = [
+        ("quote", "Quote"),
+        ("order", "Order"),
+        ("invoice", "Invoice"),
+    ]
+
+    doc_type = models.CharField(max_length=10, choices=DOC_TYPE_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    number = models.CharField(max_length=50)
+    customer = models.TextField(blank=True)
+    items = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = [["doc_type", "object_id"]]
+        verbose_name_plural = "search entries"
+
+    def __str__(self):
+        return f"{self.get_doc_type_display()} {self.number}"
@@ -0,0 +1,101 @@
+"""
+Coalesced invoice paid-amount recalculation.
+
+The Payment post_save/post_delete signals (sales.signals) call schedule() instead of
+recalculating on the spot. Inside a transaction the invoice ids are collected and
+recalculated once, on commit, by recalculate_paid_amounts(): one grouped aggregate over the
+completed payments and one bulk_update of the invoices whose paid amount, balance or status
+changed. Outside a transaction the recalculation runs immediately, as before.
+
+bulk_payments() collects the ids of every payment written inside the block and
+recalculates them on exit — for imports and other bulk payment work that should see the
+updated invoices before the transaction ends.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.transactions import on_commit_once
+
+from . import stats
+from .models import Invoice, Payment
+
+CHUNK_SIZE = 500
+
+_local = threading.local()
+
+
+def recalculate_paid_amounts(invoice_ids, using=DEFAULT_DB_ALIAS):
+    """Recalculate paid_amount, balance_due and status of `invoice_ids`. Returns the number changed."""
+    ids = sorted({pk for pk in invoice_ids if pk is not None})
+    changed = []
+    for i in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[i:i + CHUNK_SIZE]
+        totals = dict(
+            Payment.objects.using(using)
+            .filter(invoice_id__in=chunk, status="completed")
+            .order_by()
+            .values_list("invoice_id")
+            .annotate(total=Sum("amount"))
+        )
+        for invoice in Invoice.objects.using(using).filter(pk__in=chunk).order_by():
+            before = [getattr(invoice, name) for name in Invoice.PAID_FIELDS]
+            invoice.apply_paid_amount(totals.get(invoice.pk))
+            if [getattr(invoice, name) for name in Invoice.PAID_FIELDS] != before:
+                invoice.updated_at = timezone.now()
+                changed.append(invoice)
+    if changed:
+        Invoice.objects.using(using).bulk_update(
+            changed, [*Invoice.PAID_FIELDS, "updated_at"], batch_size=CHUNK_SIZE
+        )
+        stats.invalidate()  # bulk_update sends no post_save
+    return len(changed)
+
+
+class _Pending:
+    """Invoice ids waiting for one on_commit recalculation."""
+
+    def __init__(self, using):
+        self.using = using
+        self.ids = set()
+
+    def __call__(self):
+        recalculate_paid_amounts(self.ids, self.using)
+
+
+def schedule(invoice_id, using=DEFAULT_DB_ALIAS):
+    """Recalculate invoice `invoice_id` once the current transaction commits (now if there is none)."""
+    batch = getattr(_local, "batch", None)
+    if batch is not None:
+        batch.add(invoice_id)
+        return
+    if not connections[using].in_atomic_block:
+        recalculate_paid_amounts([invoice_id], using)
+        return
+
+    on_commit_once(__name__, lambda: _Pending(using), using).ids.add(invoice_id)
+
+
+@contextmanager
+def bulk_payments(using=DEFAULT_DB_ALIAS):
+    """
+    Collect the invoices touched by Payment saves/deletes inside the block and recalculate
+    them together on exit. Nested blocks join the outermost one.
+    """
+    if getattr(_local, "batch", None) is not None:
+        yield
+        return
+    _local.batch = batch = set()
+    try:
+        yield
+    except BaseException:
+        _local.batch = None
+        # Let the transaction decide: recalculated on commit, dropped on rollback
+        for invoice_id in batch:
+            schedule(invoice_id, using)
+        raise
+    _local.batch = None
+    recalculate_paid_amounts(batch, using)
@@ -0,0 +1,249 @@
+"""
+Invoice and packing slip PDFs (xhtml2pdf).
+
+Rendered files are cached under settings.INVOICE_PDF_CACHE_DIR. A file's name carries a
+digest of everything the document depends on — invoice id and updated_at, the company
+letterhead's updated_at, the supplier for packing slips and RENDER_VERSION — so editing an
+invoice gives it a new file (the old one is removed) and the digest doubles as the ETag.
+Bump RENDER_VERSION when a PDF template changes.
+
+Batches render the missing files in a process pool and stream them into a ZIP that is
+written chunk by chunk, so neither the PDFs nor the archive are held in memory.
+"""
+import hashlib
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils.text import get_valid_filename
+from xhtml2pdf import pisa
+
+from customer.models import Organization
+
+from .models import Invoice
+
+RENDER_VERSION = 1
+BATCH_SIZE = 500
+ZIP_CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class PDFRenderError(Exception):
+    pass
+
+
+class CachedPDF(NamedTuple):
+    path: Path
+    etag: str
+    filename: str
+
+
+def render_pdf(template_name, context):
+    html = render_to_string(template_name, context)
+    output = io.BytesIO()
+    result = pisa.CreatePDF(html, dest=output, encoding="utf-8")
+    if result.err:
+        raise PDFRenderError(f"Could not render {template_name} ({result.err} errors)")
+    return output.getvalue()
+
+
+def _company():
+    return Organization.objects.first()
+
+
+def _company_context(company):
+    if company is None:
+        return {}
+    return {
+        "company_name": company.name,
+        "company_address": company.full_address,
+        "company_phone": company.phone,
+        "company_email": company.email,
+    }
+
+
+def _cached(prefix, parts, filename, render):
+    """Return the cached file for `prefix` + digest of `parts`, rendering it if missing."""
+    directory = Path(settings.INVOICE_PDF_CACHE_DIR)
+    key = ":".join(str(part) for part in (RENDER_VERSION, prefix, *parts))
+    etag = hashlib.sha256(key.encode()).hexdigest()[:32]
+    path = directory / f"{prefix}-{etag}.pdf"
+    if not path.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        data = render()
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)  # readers never see a half-written file
+        for old in directory.glob(f"{prefix}-*.pdf"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    return CachedPDF(path, etag, filename)
+
+
+def invoice_pdf(invoice, company=None):
+    company = company or _company()
+
+    def render():
+        context = {
+            "invoice": invoice,
+            "items": invoice.items.select_related("product"),
+            **_company_context(company),
+        }
+        return render_pdf("sales/invoice_pdf.html", context)
+
+    return _cached(
+        f"invoice-{invoice.pk}",
+        [invoice.updated_at.isoformat(), company and company.updated_at.isoformat()],
+        get_valid_filename(f"{invoice.invoice_number or invoice.pk}.pdf"),
+        render,
+    )
+
+
+def packing_slip_pdf(invoice, supplier, company=None):
+    """Packing slip listing only `supplier`'s items, without prices."""
+    company = company or _company()
+
+    def render():
+        context = {
+            "invoice": invoice,
+            "items": invoice.items.filter(product__supplier=supplier).select_related(
+                "product", "inventory"
+            ),
+            "supplier": supplier,
+            **_company_context(company),
+        }
+        return render_pdf("factory_portal/packing_slip_pdf.html", context)
+
+    return _cached(
+        f"packing-slip-{invoice.pk}-{supplier.pk}",
+        [invoice.updated_at.isoformat(), company and company.updated_at.isoformat()],
+        get_valid_filename(f"packing-slip-{invoice.invoice_number or invoice.pk}.pdf"),
+        render,
+    )
+
+
+def pdf_response(request, pdf, as_attachment=False):
+    """
+    Serve a cached PDF. Answers If-None-Match with 304 and a single `bytes=` Range with 206;
+    anything else gets the whole file.
+    """
+    etag = f'"{pdf.etag}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    size = pdf.path.stat().st_size
+    match = _RANGE.match(request.headers.get("Range", "").strip())
+    if match and request.headers.get("If-Range", etag) != etag:
+        match = None  # the client's partial copy is stale; send everything
+    if match and match.groups() != ("", ""):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        with open(pdf.path, "rb") as f:
+            f.seek(start)
+            response = HttpResponse(f.read(end - start + 1), status=206, content_type="application/pdf")
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        response = FileResponse(
+            open(pdf.path, "rb"),
+            content_type="application/pdf",
+            as_attachment=as_attachment,
+            filename=pdf.filename,
+        )
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# -----------------------------
+# Batches
+# -----------------------------
+def _init_worker():
+    django.setup()  # for pools started with spawn (fork already has Django ready)
+
+
+def _render_invoice(pk):
+    try:
+        invoice = Invoice.objects.filter(pk=pk).first()
+        return invoice and invoice_pdf(invoice)
+    finally:
+        connections.close_all()
+
+
+def render_invoices(pks, workers=1):
+    """
+    Yield a CachedPDF per invoice id, in order, skipping ids that no longer exist. Files
+    that are not cached yet are rendered in `workers` processes.
+    """
+    pks = list(pks)
+    if workers > 1 and len(pks) > 1:
+        connections.close_all()  # forked workers must not share the parent's connection
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pks)), initializer=_init_worker
+        ) as pool:
+            for pdf in pool.map(_render_invoice, pks, chunksize=8):
+                if pdf:
+                    yield pdf
+    else:
+        company = _company()
+        for i in range(0, len(pks), BATCH_SIZE):
+            invoices = Invoice.objects.in_bulk(pks[i:i + BATCH_SIZE])
+            for pk in pks[i:i + BATCH_SIZE]:
+                if pk in invoices:
+                    yield invoice_pdf(invoices[pk], company)
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only buffer that ZipFile fills and zip_stream drains as it goes."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_stream(pdfs):
+    """
+    Yield a ZIP archive of `pdfs` as byte chunks. The buffer is not seekable, so ZipFile
+    writes data descriptors after each entry and nothing has to be rewound.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_STORED) as archive:
+        for pdf in pdfs:
+            with open(pdf.path, "rb") as source, archive.open(pdf.filename, "w") as entry:
+                while chunk := source.read(ZIP_CHUNK_SIZE):
+                    entry.write(chunk)
+                    if data := stream.drain():
+                        yield data
+            if data := stream.drain():
+                yield data  # data descriptor
+    yield stream.drain()  # central directory
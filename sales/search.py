@@ -0,0 +1,234 @@
+"""
+Full-text search over quotes, orders and invoices.
+
+SearchEntry keeps one row of search text per document. Migration 0017 indexes it:
+
+- SQLite: an FTS5 table (sales_searchentry_fts) over number, customer and items that reads
+  its content from sales_searchentry and is kept in step by triggers. Matches are ranked
+  with bm25, weighting the number over the customer over the items.
+- PostgreSQL: a GIN index over the weighted tsvector below, ranked with ts_rank, and a
+  trigram index on number for matches inside a document number.
+- Other databases: icontains over the one table (still no joins).
+
+Every word of the query is matched as a prefix, so "acm 2025" finds Acme Corp's
+INV-20250304-0007. The list views filter with search_queryset(); the autocomplete endpoint
+uses top_matches().
+
+The Quote/Order/Invoice, item and Customer signals (sales.signals) call schedule(), which
+refreshes every touched document once, on commit. Writes that skip signals (bulk_create,
+queryset.update()) are picked up by manage.py rebuild_search_index.
+"""
+import re
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from core.transactions import on_commit_once
+
+from .models import Invoice, InvoiceItem, Order, OrderItem, Quote, QuoteItem, SearchEntry
+
+CHUNK_SIZE = 500
+MAX_TERMS = 8
+
+# doc_type -> (document model, number field, item model, item field pointing at the document)
+DOCUMENTS = {
+    "quote": (Quote, "quote_number", QuoteItem, "quote"),
+    "order": (Order, "order_number", OrderItem, "order"),
+    "invoice": (Invoice, "invoice_number", InvoiceItem, "invoice"),
+}
+DOC_TYPES = {model: doc_type for doc_type, (model, *_) in DOCUMENTS.items()}
+
+CUSTOMER_FIELDS = [
+    "customer__first_name",
+    "customer__last_name",
+    "customer__company_name",
+    "customer__email",
+]
+# Shop invoices may have no customer, only the contact fields on the invoice
+CONTACT_FIELDS = {"invoice": ["first_name", "last_name", "email"]}
+
+FTS_TABLE = "sales_searchentry_fts"
+FTS_WEIGHTS = "10.0, 4.0, 1.0"  # bm25 weights for number, customer, items
+# Must stay identical to the expression of the GIN index in migration 0017
+PG_VECTOR = (
+    "setweight(to_tsvector('simple', number), 'A') || "
+    "setweight(to_tsvector('simple', customer), 'B') || "
+    "setweight(to_tsvector('simple', items), 'C')"
+)
+
+# -----------------------------
+# Indexing
+# -----------------------------
+def _texts(doc_type, pks, using):
+    """{pk: (number, customer text, item text)} for the documents of `pks` that exist."""
+    model, number_field, item_model, parent = DOCUMENTS[doc_type]
+    fields = CUSTOMER_FIELDS + CONTACT_FIELDS.get(doc_type, [])
+    texts = {}
+    for pk, number, *names in (
+        model.objects.using(using)
+        .filter(pk__in=pks)
+        .order_by()
+        .values_list("pk", number_field, *fields)
+    ):
+        texts[pk] = (number, " ".join(dict.fromkeys(name for name in names if name)), [])
+    for pk, description in (
+        item_model.objects.using(using)
+        .filter(**{f"{parent}__in": list(texts)})
+        .order_by(parent, "pk")
+        .values_list(parent, "description")
+    ):
+        texts[pk][2].append(description)
+    return {pk: (number, customer, " ".join(items)) for pk, (number, customer, items) in texts.items()}
+
+
+def index_documents(doc_type, pks, using=DEFAULT_DB_ALIAS):
+    """
+    Bring the entries of the `doc_type` documents `pks` up to date: create or update them,
+    and delete those whose document is gone. Returns the number of entries written.
+    """
+    pks = sorted({pk for pk in pks if pk is not None})
+    entries = SearchEntry.objects.using(using).filter(doc_type=doc_type)
+    written = 0
+    for i in range(0, len(pks), CHUNK_SIZE):
+        chunk = pks[i:i + CHUNK_SIZE]
+        texts = _texts(doc_type, chunk, using)
+        existing = {entry.object_id: entry for entry in entries.filter(object_id__in=chunk)}
+        gone = [pk for pk in existing if pk not in texts]
+        if gone:
+            entries.filter(object_id__in=gone).delete()
+
+        new, changed = [], []
+        for pk, (number, customer, items) in texts.items():
+            entry = existing.get(pk)
+            if entry is None:
+                new.append(SearchEntry(
+                    doc_type=doc_type, object_id=pk, number=number, customer=customer, items=items
+                ))
+            elif (entry.number, entry.customer, entry.items) != (number, customer, items):
+                entry.number, entry.customer, entry.items = number, customer, items
+                changed.append(entry)
+        # The FTS5 triggers / PostgreSQL indexes follow these writes in the same statements
+        SearchEntry.objects.using(using).bulk_create(new)
+        SearchEntry.objects.using(using).bulk_update(changed, ["number", "customer", "items"])
+        written += len(new) + len(changed)
+    return written
+
+
+def rebuild(doc_types=None, using=DEFAULT_DB_ALIAS):
+    """Reindex every document of `doc_types` (all by default). Returns {doc_type: entries written}."""
+    counts = {}
+    with transaction.atomic(using=using):
+        for doc_type in doc_types or DOCUMENTS:
+            model = DOCUMENTS[doc_type][0]
+            documents = model.objects.using(using).order_by("pk").values_list("pk", flat=True)
+            counts[doc_type] = index_documents(doc_type, documents, using)
+            SearchEntry.objects.using(using).filter(doc_type=doc_type).exclude(
+                object_id__in=model.objects.using(using).values("pk")
+            ).delete()
+        connection = connections[using]
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                # Re-read the content table in case the FTS index drifted, then merge its segments
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+class _Pending:
+    """Documents waiting for one on_commit reindex."""
+
+    def __init__(self, using):
+        self.using = using
+        self.pks = defaultdict(set)
+
+    def __call__(self):
+        for doc_type, pks in self.pks.items():
+            index_documents(doc_type, pks, self.using)
+
+
+def schedule(doc_type, pks, using=DEFAULT_DB_ALIAS):
+    """Reindex the `doc_type` documents `pks` once the current transaction commits (now if there is none)."""
+    if not connections[using].in_atomic_block:
+        index_documents(doc_type, pks, using)
+        return
+
+    on_commit_once(__name__, lambda: _Pending(using), using).pks[doc_type].update(pks)
+
+
+# -----------------------------
+# Searching
+# -----------------------------
+def _terms(text):
+    return re.findall(r"\w+", (text or "").lower())[:MAX_TERMS]
+
+
+def _like(text):
+    return "%" + re.sub(r"([%_\\])", r"\\\1", text.strip()) + "%"
+
+
+def _fallback(doc_types, terms, using):
+    entries = SearchEntry.objects.using(using).filter(doc_type__in=doc_types)
+    for term in terms:
+        entries = entries.filter(
+            Q(number__icontains=term) | Q(customer__icontains=term) | Q(items__icontains=term)
+        )
+    return entries
+
+
+def search_queryset(queryset, text):
+    """Narrow `queryset` (quotes, orders or invoices) to the documents matching every word of `text`."""
+    terms = _terms(text)
+    if not terms:
+        return queryset.none()
+    doc_type = DOC_TYPES[queryset.model]
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        sql = (
+            f"SELECT e.object_id FROM {FTS_TABLE} f JOIN sales_searchentry e ON e.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND e.doc_type = %s"
+        )
+        params = [" ".join(f'"{term}"*' for term in terms), doc_type]
+    elif vendor == "postgresql":
+        sql = (
+            f"SELECT object_id FROM sales_searchentry WHERE doc_type = %s "
+            f"AND (({PG_VECTOR}) @@ to_tsquery('simple', %s) OR number ILIKE %s)"
+        )
+        params = [doc_type, " & ".join(f"{term}:*" for term in terms), _like(text)]
+    else:
+        entries = _fallback([doc_type], terms, queryset.db)
+        return queryset.filter(pk__in=entries.values("object_id"))
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def top_matches(text, doc_types=None, limit=10, using=DEFAULT_DB_ALIAS):
+    """Best `limit` matches for `text` as [(doc_type, object_id, number, customer)], best first."""
+    terms = _terms(text)
+    if not terms:
+        return []
+    doc_types = list(doc_types or DOCUMENTS)
+    placeholders = ", ".join(["%s"] * len(doc_types))
+    vendor = connections[using].vendor
+    if vendor == "sqlite":
+        sql = (
+            f"SELECT e.doc_type, e.object_id, e.number, e.customer "
+            f"FROM {FTS_TABLE} f JOIN sales_searchentry e ON e.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND e.doc_type IN ({placeholders}) "
+            f"ORDER BY bm25({FTS_TABLE}, {FTS_WEIGHTS}), e.number LIMIT %s"
+        )
+        params = [" ".join(f'"{term}"*' for term in terms), *doc_types, limit]
+    elif vendor == "postgresql":
+        sql = (
+            f"SELECT doc_type, object_id, number, customer "
+            f"FROM sales_searchentry, to_tsquery('simple', %s) query "
+            f"WHERE doc_type IN ({placeholders}) AND (({PG_VECTOR}) @@ query OR number ILIKE %s) "
+            f"ORDER BY ts_rank({PG_VECTOR}, query) DESC, number LIMIT %s"
+        )
+        params = [" & ".join(f"{term}:*" for term in terms), *doc_types, _like(text), limit]
+    else:
+        entries = _fallback(doc_types, terms, using).order_by("number")
+        return list(entries.values_list("doc_type", "object_id", "number", "customer")[:limit])
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
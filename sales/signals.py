@@ -1,25 +1,92 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Payment
+from customer.models import Customer
+from .models import Invoice, InvoiceItem, Order, OrderItem, Payment, Quote, QuoteItem
+from . import search, stats
+from .paid_amounts import schedule
 
 
 @receiver(post_save, sender=Payment)
-def payment_saved_handler(sender, instance, created, **kwargs):
+def payment_saved_handler(sender, instance, created, using, **kwargs):
     """
     Signal handler that recalculates invoice paid_amount when a Payment is created or updated.
-    This ensures the invoice's paid_amount always reflects the actual total of completed payments.
+    The recalculation is deferred to the end of the transaction and done once per invoice
+    (sales.paid_amounts), so saving many payments costs one grouped update.
     """
-    if instance.invoice:
-        # Recalculate the paid amount for the associated invoice
-        instance.invoice.recalculate_paid_amount()
+    if instance.invoice_id:
+        schedule(instance.invoice_id, using)
 
 
 @receiver(post_delete, sender=Payment)
-def payment_deleted_handler(sender, instance, **kwargs):
+def payment_deleted_handler(sender, instance, using, **kwargs):
     """
     Signal handler that recalculates invoice paid_amount when a Payment is deleted.
-    This ensures the invoice's paid_amount is updated when payments are removed.
+    Deferred and coalesced like payment_saved_handler.
     """
-    if instance.invoice:
-        # Recalculate the paid amount for the associated invoice
-        instance.invoice.recalculate_paid_amount()
\ No newline at end of file
+    if instance.invoice_id:
+        schedule(instance.invoice_id, using)
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invoice_changed_handler(sender, instance, **kwargs):
+    """Drop the cached invoice stat cards (sales.stats) when an invoice is saved or deleted."""
+    stats.invalidate()
+
+
+@receiver(post_save, sender=Quote)
+@receiver(post_delete, sender=Quote)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def document_search_handler(sender, instance, using, **kwargs):
+    """Refresh the search entry (sales.search) of a saved or deleted quote, order or invoice on commit."""
+    search.schedule(search.DOC_TYPES[sender], [instance.pk], using)
+
+
+@receiver(post_save, sender=QuoteItem)
+@receiver(post_delete, sender=QuoteItem)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def item_search_handler(sender, instance, using, **kwargs):
+    """Item descriptions are searchable, so refresh the entry of the item's document."""
+    for doc_type, (_, _, item_model, parent) in search.DOCUMENTS.items():
+        if item_model is sender:
+            search.schedule(doc_type, [getattr(instance, f"{parent}_id")], using)
+
+
+# Customer fields copied into the search entries of their documents
+CUSTOMER_SEARCH_FIELDS = [field.split("__", 1)[1] for field in search.CUSTOMER_FIELDS]
+
+
+@receiver(pre_save, sender=Customer)
+def customer_search_pre_save(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """Remember the searchable fields of an existing customer before they are overwritten."""
+    instance._old_search_fields = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+    if update_fields is not None and not set(update_fields) & set(CUSTOMER_SEARCH_FIELDS):
+        return  # e.g. last_login or profile saves: nothing searchable is written
+    instance._old_search_fields = (
+        Customer.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list(*CUSTOMER_SEARCH_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Customer)
+def customer_search_handler(sender, instance, created, using, **kwargs):
+    """Refresh the entries of a customer's documents when their names, company or email changed."""
+    old = getattr(instance, "_old_search_fields", None)
+    instance._old_search_fields = None
+    if created or old is None:
+        return
+    if old == tuple(getattr(instance, field) for field in CUSTOMER_SEARCH_FIELDS):
+        return
+    for doc_type, (model, *_) in search.DOCUMENTS.items():
+        pks = model.objects.using(using).filter(customer=instance).values_list("pk", flat=True)
+        search.schedule(doc_type, pks, using)
@@ -0,0 +1,114 @@
+"""
+Invoice stat cards shared by the invoice list, the staff dashboard and the customer portal.
+
+All cards come from one aggregate() with filtered Count/Sum. Results are cached for
+settings.INVOICE_STATS_TTL seconds per month and customer. The cache keys carry a version
+token that the Invoice post_save/post_delete signals replace (sales.signals), so a saved
+invoice shows up on the next page view; bulk updates that bypass signals show up when the
+TTL runs out.
+"""
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Invoice
+
+OPEN_STATUSES = ["sent", "partial", "overdue", "draft"]
+RECENT_DAYS = 30
+
+_VERSION_KEY = "sales:invoice_stats:version"
+
+
+def _version():
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # Missing or evicted: plant a new token so no older entry is reused
+        cache.add(_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _bump():
+    cache.set(_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def invalidate():
+    """
+    Drop every cached stats entry. Bumped once now and once on commit, so a page rendered
+    between the save and the commit cannot cache the old numbers for everyone else.
+    """
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def _month_range(month, today):
+    start = month.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start, min(end, today)
+
+
+def invoice_stats(month=None, customer=None, user=None, statuses=()):
+    """
+    Stats for the invoices dated in `month` (any date in it; the current month runs up to
+    today) or for all invoices when month is None, limited to the invoices of `customer`
+    and/or `user` when given. Returns a dict with count, total_amount, paid_count,
+    paid_amount, open_count, recent_count (created in the last RECENT_DAYS days) and
+    status_counts for each status in `statuses`.
+    """
+    today = timezone.now().date()
+    date_range = month and _month_range(month, today)
+    key = ":".join(
+        str(part)
+        for part in (
+            "sales:invoice_stats",
+            _version(),
+            date_range and date_range[0].isoformat(),
+            getattr(customer, "pk", customer),
+            getattr(user, "pk", user),
+            ",".join(statuses),
+        )
+    )
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute(date_range, customer, user, statuses)
+        cache.set(key, stats, settings.INVOICE_STATS_TTL)
+    return stats
+
+
+def _compute(date_range, customer, user, statuses):
+    queryset = Invoice.objects.order_by()
+    if date_range:
+        queryset = queryset.filter(invoice_date__range=date_range)
+    scope = Q()
+    if customer is not None:
+        scope |= Q(customer=customer)
+    if user is not None:
+        scope |= Q(user=user)
+    queryset = queryset.filter(scope)
+
+    paid = Q(status="paid")
+    since = timezone.now() - timedelta(days=RECENT_DAYS)
+    totals = queryset.aggregate(
+        count=Count("pk"),
+        invoiced=Sum("total_amount"),
+        paid_count=Count("pk", filter=paid),
+        paid_total=Sum("total_amount", filter=paid),
+        open_count=Count("pk", filter=Q(status__in=OPEN_STATUSES)),
+        recent_count=Count("pk", filter=Q(created_at__gte=since)),
+        **{f"status_{status}": Count("pk", filter=Q(status=status)) for status in statuses},
+    )
+    return {
+        "count": totals["count"],
+        "total_amount": totals["invoiced"] or Decimal("0.00"),
+        "paid_count": totals["paid_count"],
+        "paid_amount": totals["paid_total"] or Decimal("0.00"),
+        "open_count": totals["open_count"],
+        "recent_count": totals["recent_count"],
+        "status_counts": {status: totals[f"status_{status}"] for status in statuses},
+    }
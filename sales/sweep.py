@@ -0,0 +1,71 @@
+"""
+Set-based invoice status sweep (manage.py sweep_invoice_status).
+
+Invoice.update_status() only runs when an invoice is saved, so an unpaid invoice never
+turns overdue by itself. sweep_invoice_status() applies the same rules to every invoice
+with one UPDATE per transition, served by the (status, due_date) index:
+
+- paid:    payments cover the total
+- partial: some, but not all, of the total is paid (wins over overdue, as in update_status);
+           also paid invoices whose payments were reduced
+- sent:    paid/partial invoices whose payments were all failed, refunded or deleted
+- overdue: issued, nothing paid and past the due date
+- sent:    overdue invoices whose due date was moved out again
+
+The reverse moves keep the sweep in line with Invoice.apply_paid_amount(). Drafts,
+cancelled and refunded invoices are never touched. Each UPDATE only matches rows whose
+status is about to change, so the sweep is idempotent and cheap to run every few minutes
+from cron or a job runner. The invoice list's overdue filter reads the stored status, so
+an invoice only shows up there once a sweep has marked it.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import stats
+from .models import Invoice
+
+LIVE_STATUSES = ["unsent", "sent", "viewed", "partial", "overdue"]
+ISSUED_STATUSES = ["sent", "viewed"]
+
+
+def overdue_condition(today):
+    """Issued, nothing paid and past the due date: the invoices the sweep marks overdue."""
+    return Q(status__in=ISSUED_STATUSES, due_date__lt=today, paid_amount__lte=0)
+
+
+def _transitions(today):
+    """[(new status, filter)] in the order they are applied."""
+    return [
+        ("paid", Q(status__in=LIVE_STATUSES, paid_amount__gt=0, paid_amount__gte=F("total_amount"))),
+        (
+            "partial",
+            Q(status__in=[s for s in LIVE_STATUSES if s != "partial"] + ["paid"], paid_amount__gt=0)
+            & Q(paid_amount__lt=F("total_amount")),
+        ),
+        # Before overdue, so an invoice that lost its payments after the due date ends up overdue
+        ("sent", Q(status__in=["paid", "partial"], paid_amount__lte=0, total_amount__gt=0)),
+        ("overdue", overdue_condition(today)),
+        ("sent", Q(status="overdue", due_date__gte=today, paid_amount__lte=0)),
+    ]
+
+
+def sweep_invoice_status(today=None, dry_run=False):
+    """
+    Move invoices to paid/partial/overdue (and overdue back to sent) in bulk.
+    Returns {new status: number of invoices moved}; with dry_run only counts them.
+    """
+    today = today or timezone.now().date()
+    counts = {}
+    with transaction.atomic():
+        for status, condition in _transitions(today):
+            queryset = Invoice.objects.filter(condition)
+            if dry_run:
+                moved = queryset.count()
+            else:
+                # updated_at changes too, so cached PDFs (sales.pdf) pick up the new status
+                moved = queryset.update(status=status, updated_at=timezone.now())
+            counts[status] = counts.get(status, 0) + moved
+        if not dry_run and any(counts.values()):
+            stats.invalidate()  # queryset.update() sends no post_save
+    return counts
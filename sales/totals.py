@@ -0,0 +1,126 @@
+"""
+Bulk recalculation of document totals (manage.py recalc_totals).
+
+Works for any model with `items` (a reverse FK from line items carrying `line_total`),
+`TOTAL_FIELDS` and `apply_totals(subtotal)` — Invoice and PurchaseOrder. Each chunk of
+documents costs one aggregate query for the item subtotals and one executemany UPDATE for
+the documents whose totals actually changed. Chunks are independent, so on databases with
+concurrent writers they can run in a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import django
+from django.apps import apps
+from django.db import connection, connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+CHUNK_SIZE = 2000
+
+MODELS = {
+    "invoice": "sales.Invoice",
+    "purchaseorder": "purchases.PurchaseOrder",
+}
+
+
+def _quantizers(model):
+    return {
+        name: Decimal(1).scaleb(-model._meta.get_field(name).decimal_places)
+        for name in model.TOTAL_FIELDS
+    }
+
+
+def recalculate_chunk(model, pks, dry_run=False):
+    """Recalculate the totals of documents `pks`. Returns the number that changed."""
+    items = model._meta.get_field("items")
+    item_model, parent = items.related_model, items.field.name
+    quantizers = _quantizers(model)
+
+    subtotals = dict(
+        item_model.objects.filter(**{f"{parent}_id__in": pks})
+        .order_by()
+        .values_list(f"{parent}_id")
+        .annotate(total=Sum("line_total"))
+    )
+    changed = []
+    with transaction.atomic():
+        documents = model.objects.filter(pk__in=pks).order_by()
+        if not dry_run:
+            documents = documents.select_for_update()
+        for document in documents:
+            before = [getattr(document, name) for name in model.TOTAL_FIELDS]
+            document.apply_totals(subtotals.get(document.pk))
+            after = [
+                Decimal(getattr(document, name)).quantize(quantizers[name])
+                for name in model.TOTAL_FIELDS
+            ]
+            if after != before:
+                document.updated_at = timezone.now()
+                changed.append(document)
+        if changed and not dry_run:
+            _save_totals(model, changed)
+    return len(changed)
+
+
+def _save_totals(model, documents):
+    """
+    Write TOTAL_FIELDS and updated_at. bulk_update's CASE WHEN costs several ms of
+    expression resolving per row, so one UPDATE statement runs through executemany
+    (as accounting.reconciliation does for bank matches).
+    """
+    fields = [model._meta.get_field(name) for name in [*model.TOTAL_FIELDS, "updated_at"]]
+    qn = connection.ops.quote_name
+    sql = (
+        f"UPDATE {qn(model._meta.db_table)} SET "
+        + ", ".join(f"{qn(field.column)} = %s" for field in fields)
+        + f" WHERE {qn(model._meta.pk.column)} = %s"
+    )
+    rows = [
+        [field.get_db_prep_save(getattr(document, field.attname), connection) for field in fields]
+        + [document.pk]
+        for document in documents
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def _init_worker():
+    django.setup()  # for pools started with spawn (fork already has Django ready)
+
+
+def _run_chunk(task):
+    label, pks, dry_run = task
+    try:
+        return recalculate_chunk(apps.get_model(label), pks, dry_run)
+    finally:
+        connections.close_all()
+
+
+def recalculate(queryset, chunk_size=CHUNK_SIZE, workers=1, dry_run=False, log=None):
+    """
+    Recalculate totals for every document in `queryset` in chunks of `chunk_size`,
+    optionally spread over `workers` processes. Returns (documents, changed).
+    """
+    label = queryset.model._meta.label
+    pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+    tasks = [(label, pks[i:i + chunk_size], dry_run) for i in range(0, len(pks), chunk_size)]
+
+    changed = 0
+    if connection.vendor == "sqlite":
+        workers = 1  # SQLite allows one writer at a time; parallel chunks would only wait on the lock
+    if workers > 1 and len(tasks) > 1:
+        connections.close_all()  # forked workers must not share the parent's connection
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)), initializer=_init_worker
+        ) as pool:
+            for done, count in enumerate(pool.map(_run_chunk, tasks), start=1):
+                changed += count
+                if log:
+                    log(done, len(tasks), changed)
+    else:
+        for done, (_, chunk, _) in enumerate(tasks, start=1):
+            changed += recalculate_chunk(queryset.model, chunk, dry_run)
+            if log:
+                log(done, len(tasks), changed)
+    return len(pks), changed
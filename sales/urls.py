@@ -46,6 +46,7 @@ urlpatterns = [
     path('invoices/<int:pk>/mark-shipped/', views.invoice_mark_shipped, name='invoice_mark_shipped'),
     path('invoices/<int:pk>/recalculate/', views.invoice_recalculate, name='invoice_recalculate'),
     path('invoices/<int:pk>/pdf/', views.InvoicePDFView.as_view(), name='invoice_pdf'),
+    path('invoices/pdf/batch/', views.InvoicePDFBatchView.as_view(), name='invoice_pdf_batch'),
     
     # Invoice Items
     path('invoices/<int:invoice_pk>/items/add/', views.InvoiceItemCreateView.as_view(), name='invoice_item_add'),
@@ -81,4 +82,5 @@ urlpatterns = [
     
     # API URLs
     path('api/inventory/available/<int:product_id>/', views.AvailableInventoryAPIView.as_view(), name='api_available_inventory'),
+    path('api/search/', views.SearchAutocompleteView.as_view(), name='search_autocomplete'),
 ]
\ No newline at end of file
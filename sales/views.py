@@ -11,13 +11,15 @@ from django.views.generic import (
 )
 from django.contrib import messages
 from django.db.models import Sum, Q, F
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 from django.db import transaction
+from django.utils import timezone
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timedelta
 import json
@@ -44,6 +46,9 @@ from .forms import (
     InvoiceShipmentForm,
     ShipmentItemFormSet,
 )
+from .pdf import PDFRenderError, invoice_pdf, pdf_response, render_invoices, zip_stream
+from .search import DOCUMENTS as SEARCH_DOCUMENTS, search_queryset, top_matches
+from .stats import invoice_stats
 from customer.models import Customer, CustomerAddress
 from product.models import Product, Inventory
 from purchases.models import Supplier
@@ -68,8 +73,8 @@ class InvoiceApproveView(UpdateView):
             invoice.accounting_status == Invoice.ACCOUNTING_STATUS_CHOICES.APPROVED
             and not invoice.is_posted
         ):
-            invoice.approve()  # 승인 & 전기
-            messages.success(self.request, f"매출 #{invoice.pk} 승인/전기 완료")
+            invoice.approve()  # 승인 & 전기 대기열 등록
+            messages.success(self.request, f"매출 #{invoice.pk} 승인 완료 (전기 대기 중)")
         return resp
 
 
@@ -93,12 +98,7 @@ class QuoteListView(StaffRequiredMixin, ListView):
         # Search functionality
         search = self.request.GET.get("search")
         if search:
-            queryset = queryset.filter(
-                Q(quote_number__icontains=search)
-                | Q(customer__first_name__icontains=search)
-                | Q(customer__last_name__icontains=search)
-                | Q(customer__company_name__icontains=search)
-            )
+            queryset = search_queryset(queryset, search)
 
         # Status filter
         status = self.request.GET.get("status")
@@ -221,12 +221,7 @@ class OrderListView(StaffRequiredMixin, ListView):
         # Search functionality
         search = self.request.GET.get("search")
         if search:
-            queryset = queryset.filter(
-                Q(order_number__icontains=search)
-                | Q(customer__first_name__icontains=search)
-                | Q(customer__last_name__icontains=search)
-                | Q(customer__company_name__icontains=search)
-            )
+            queryset = search_queryset(queryset, search)
 
         # Status filter
         status = self.request.GET.get("status")
@@ -337,6 +332,35 @@ class OrderItemDeleteView(StaffRequiredMixin, DeleteView):
 
 
 # Invoice Views
+def filter_invoices(queryset, params):
+    """Apply the invoice list filters (search, status, date range) from `params`."""
+    # Search functionality
+    search = params.get("search")
+    if search:
+        queryset = search_queryset(queryset, search)
+
+    # Status filter. "overdue" is stored by the sweep_invoice_status job; past-due partial
+    # invoices stay partial there, so they are matched here too. Both use the (status, due_date) index
+    status = params.get("status")
+    if status == "overdue":
+        queryset = queryset.filter(
+            Q(status="overdue") | Q(status="partial", due_date__lt=timezone.now().date())
+        )
+    elif status:
+        queryset = queryset.filter(status=status)
+
+    # Date range filter
+    date_from = params.get("date_from")
+    if date_from:
+        queryset = queryset.filter(invoice_date__gte=date_from)
+
+    date_to = params.get("date_to")
+    if date_to:
+        queryset = queryset.filter(invoice_date__lte=date_to)
+
+    return queryset
+
+
 class InvoiceListView(StaffRequiredMixin, ListView):
     model = Invoice
     template_name = "sales/invoice_list_daisyui.html"
@@ -345,74 +369,18 @@ class InvoiceListView(StaffRequiredMixin, ListView):
 
     def get_queryset(self):
         queryset = super().get_queryset().select_related("customer")
-
-        # Search functionality
-        search = self.request.GET.get("search")
-        if search:
-            queryset = queryset.filter(
-                Q(invoice_number__icontains=search)
-                | Q(customer__first_name__icontains=search)
-                | Q(customer__last_name__icontains=search)
-                | Q(customer__company_name__icontains=search)
-            )
-
-        # Status filter
-        status = self.request.GET.get("status")
-        if status:
-            if status == "overdue":
-                # Special handling for overdue - check if due_date has passed and not paid
-                from django.utils import timezone
-
-                today = timezone.now().date()
-                queryset = queryset.filter(
-                    due_date__lt=today, status__in=["sent", "partial"]
-                )
-            else:
-                queryset = queryset.filter(status=status)
-
-        # Date range filter
-        date_from = self.request.GET.get("date_from")
-        if date_from:
-            queryset = queryset.filter(invoice_date__gte=date_from)
-
-        date_to = self.request.GET.get("date_to")
-        if date_to:
-            queryset = queryset.filter(invoice_date__lte=date_to)
-
+        queryset = filter_invoices(queryset, self.request.GET)
         return queryset.order_by("-created_at")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Calculate stats for current month
-        from django.utils import timezone
-        from django.db.models import Sum, Count
-        from datetime import datetime
-
-        # Get current month's start and end dates
-        today = timezone.now().date()
-        month_start = today.replace(day=1)
-
-        # Get all invoices for current month (not filtered)
-        month_invoices = Invoice.objects.filter(
-            invoice_date__gte=month_start, invoice_date__lte=today
-        )
-
-        # Calculate statistics
-        context["total_invoices"] = month_invoices.count()
-
-        # Total revenue (sum of total_amount for all invoices this month)
-        context["total_revenue"] = (
-            month_invoices.aggregate(total=Sum("total_amount"))["total"] or 0
-        )
-
-        # Paid count (invoices with status 'paid' this month)
-        context["paid_count"] = month_invoices.filter(status="paid").count()
-
-        # Pending count (invoices with status in 'sent', 'partial', 'overdue' this month)
-        context["pending_count"] = month_invoices.filter(
-            status__in=["sent", "partial", "overdue", "draft"]
-        ).count()
+        # Stat cards for the current month (one cached aggregate, see sales.stats)
+        stats = invoice_stats(month=timezone.now().date())
+        context["total_invoices"] = stats["count"]
+        context["total_revenue"] = stats["total_amount"]
+        context["paid_count"] = stats["paid_count"]
+        context["pending_count"] = stats["open_count"]
 
         # Add filter values to context for form persistence
         context["search_query"] = self.request.GET.get("search", "")
@@ -642,12 +610,10 @@ class InvoiceCreateStep3View(StaffRequiredMixin, TemplateView):
         context["tax_amount"] = tax_amount
         context["total_amount"] = subtotal + tax_amount + context["shipping_cost"]
 
-        # Get or generate invoice number
+        # Invoice number is assigned from the INV sequence when the invoice is saved
         from datetime import datetime
 
-        context["invoice_number"] = (
-            f"INV-{datetime.now().strftime('%Y%m%d')}-{Invoice.objects.count() + 1:04d}"
-        )
+        context["invoice_number"] = ""
         context["invoice_date"] = datetime.now().date()
         context["due_date"] = datetime.now().date() + timedelta(days=30)
 
@@ -785,7 +751,7 @@ class InvoiceCreateStep3View(StaffRequiredMixin, TemplateView):
         if "invoice_shipping_cost" in request.session:
             del request.session["invoice_shipping_cost"]
 
-        messages.success(request, f"Invoice {invoice_number} created successfully!")
+        messages.success(request, f"Invoice {invoice.invoice_number} created successfully!")
         return redirect("sales:invoice_detail", pk=invoice.pk)
 
 
@@ -1360,9 +1326,34 @@ class InvoicePDFView(StaffRequiredMixin, DetailView):
 
     def get(self, request, *args, **kwargs):
         invoice = self.get_object()
-        # TODO: Implement PDF generation
-        messages.info(request, "PDF generation not implemented yet")
-        return redirect("sales:invoice_detail", pk=invoice.pk)
+        try:
+            pdf = invoice_pdf(invoice)
+        except PDFRenderError as e:
+            messages.error(request, str(e))
+            return redirect("sales:invoice_detail", pk=invoice.pk)
+        return pdf_response(request, pdf, as_attachment="download" in request.GET)
+
+
+class InvoicePDFBatchView(StaffRequiredMixin, View):
+    """ZIP of the PDFs of the invoices matching the list filters (or ?ids=1,2,3)."""
+
+    def get(self, request, *args, **kwargs):
+        queryset = filter_invoices(Invoice.objects.all(), request.GET)
+        ids = request.GET.get("ids")
+        if ids:
+            queryset = queryset.filter(pk__in=[int(pk) for pk in ids.split(",") if pk.strip().isdigit()])
+        pks = list(queryset.order_by("invoice_date", "pk").values_list("pk", flat=True))
+        if not pks:
+            messages.warning(request, "No invoices match the current filters.")
+            return redirect(f"{reverse('sales:invoice_list')}?{request.GET.urlencode()}")
+
+        response = StreamingHttpResponse(
+            zip_stream(render_invoices(pks, workers=settings.INVOICE_PDF_WORKERS)),
+            content_type="application/zip",
+        )
+        filename = f"invoices-{timezone.now():%Y%m%d-%H%M%S}.zip"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
 
 # Invoice Item Views
@@ -1475,7 +1466,7 @@ class PaymentCreateView(StaffRequiredMixin, CreateView):
         if form.instance.status == "completed":
             try:
                 # Import accounting service
-                from accounting.services import post_incoming_payment
+                from accounting.usecases import queue_incoming_payment
                 from customer.models import Organization as Company
                 
                 # Get or create company (using first company for now)
@@ -1489,18 +1480,12 @@ class PaymentCreateView(StaffRequiredMixin, CreateView):
                 except:
                     company = None
                 
-                # Set required fields for posting
-                payment = form.instance
-                payment.company = company
-                payment.date = payment.payment_date
-                payment.sale = invoice  # Map invoice to sale for the service
-                
-                # Post to ledger
-                journal_entry = post_incoming_payment(payment)
+                # Queue for posting; run_posting_worker writes the journal entry
+                queue_incoming_payment(form.instance, company)
                 
                 messages.info(
                     self.request, 
-                    f"Payment posted to accounting ledger (Journal Entry #{journal_entry.pk})"
+                    "Payment queued for posting to the accounting ledger"
                 )
             except Exception as e:
                 messages.warning(
@@ -1551,7 +1536,7 @@ class PaymentUpdateView(StaffRequiredMixin, UpdateView):
         if old_status != "completed" and new_status == "completed":
             try:
                 # Import accounting service
-                from accounting.services import post_incoming_payment
+                from accounting.usecases import queue_incoming_payment
                 from customer.models import Organization as Company
                 
                 # Get or create company
@@ -1565,18 +1550,12 @@ class PaymentUpdateView(StaffRequiredMixin, UpdateView):
                 except:
                     company = None
                 
-                # Set required fields for posting
-                payment = form.instance
-                payment.company = company
-                payment.date = payment.payment_date
-                payment.sale = payment.invoice  # Map invoice to sale
-                
-                # Post to ledger
-                journal_entry = post_incoming_payment(payment)
+                # Queue for posting; run_posting_worker writes the journal entry
+                queue_incoming_payment(form.instance, company)
                 
                 messages.info(
                     self.request, 
-                    f"Payment posted to accounting ledger (Journal Entry #{journal_entry.pk})"
+                    "Payment queued for posting to the accounting ledger"
                 )
             except Exception as e:
                 messages.warning(
@@ -2479,3 +2458,28 @@ class AvailableInventoryAPIView(StaffRequiredMixin, View):
             return JsonResponse(
                 {"success": False, "error": "Product not found"}, status=404
             )
+
+
+class SearchAutocompleteView(StaffRequiredMixin, View):
+    """Ranked quote/order/invoice suggestions for the list search boxes (sales.search)."""
+
+    min_length = 2
+    limit = 10
+
+    def get(self, request):
+        query = request.GET.get("q", "").strip()
+        doc_type = request.GET.get("type")
+        doc_types = [doc_type] if doc_type in SEARCH_DOCUMENTS else None
+        results = []
+        if len(query) >= self.min_length:
+            for doc_type, pk, number, customer in top_matches(query, doc_types, self.limit):
+                results.append(
+                    {
+                        "type": doc_type,
+                        "id": pk,
+                        "number": number,
+                        "customer": customer,
+                        "url": reverse(f"sales:{doc_type}_detail", kwargs={"pk": pk}),
+                    }
+                )
+        return JsonResponse({"results": results})